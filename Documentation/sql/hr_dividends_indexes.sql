@@ -0,0 +1,20 @@
+-- ----------------------------
+-- Dividends indexes (HUMAN_2025, SQL Server)
+-- Backing cho GET /api/hr/dividends (keyset theo DividendDate, DividendID),
+-- /api/hr/dividends/rollup và /api/hr/dividends/stream
+-- ----------------------------
+
+-- Lọc theo employee + khoảng ngày. DividendID (clustered key) nằm sẵn trong index
+-- nên ORDER BY DividendDate, DividendID không cần sort; INCLUDE amount để rollup chỉ đọc index
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Dividends_EmployeeID_DividendDate')
+    CREATE NONCLUSTERED INDEX IX_Dividends_EmployeeID_DividendDate
+        ON dbo.Dividends (EmployeeID, DividendDate)
+        INCLUDE (DividendAmount);
+GO
+
+-- Khoảng ngày không lọc employee
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Dividends_DividendDate')
+    CREATE NONCLUSTERED INDEX IX_Dividends_DividendDate
+        ON dbo.Dividends (DividendDate)
+        INCLUDE (EmployeeID, DividendAmount);
+GO
@@ -0,0 +1,77 @@
+-- ----------------------------
+-- Payroll summary tables (payroll_2026)
+-- Materialized department × month totals, refresh incremental bởi
+-- backend/app/modules/payroll_analytics/summary.py
+-- ----------------------------
+
+-- UpdatedAt để refresh chỉ đọc rows thay đổi từ watermark trước,
+-- EmployeeID để execute_sync chỉ đọc rows của employees bị chuyển department
+ALTER TABLE `salaries`
+  ADD COLUMN `UpdatedAt` datetime NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  ADD INDEX `ix_salaries_UpdatedAt` (`UpdatedAt`),
+  ADD INDEX `ix_salaries_SalaryMonth` (`SalaryMonth`),
+  ADD INDEX `ix_salaries_EmployeeID` (`EmployeeID`);
+
+ALTER TABLE `attendance`
+  ADD COLUMN `UpdatedAt` datetime NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  ADD INDEX `ix_attendance_UpdatedAt` (`UpdatedAt`),
+  ADD INDEX `ix_attendance_AttendanceMonth` (`AttendanceMonth`),
+  ADD INDEX `ix_attendance_EmployeeID` (`EmployeeID`);
+
+DROP TABLE IF EXISTS `payroll_department_month_summary`;
+CREATE TABLE `payroll_department_month_summary`  (
+  `DepartmentID` int NOT NULL COMMENT '-1 = chưa phân công',
+  `SummaryMonth` date NOT NULL,
+  `Headcount` int NOT NULL DEFAULT 0,
+  `GrossSalary` decimal(16, 2) NOT NULL DEFAULT 0.00,
+  `NetSalary` decimal(16, 2) NOT NULL DEFAULT 0.00,
+  `Deductions` decimal(16, 2) NOT NULL DEFAULT 0.00,
+  `Bonus` decimal(16, 2) NOT NULL DEFAULT 0.00,
+  `AttendanceHeadcount` int NOT NULL DEFAULT 0,
+  `WorkDays` int NOT NULL DEFAULT 0,
+  `AbsentDays` int NOT NULL DEFAULT 0,
+  `LeaveDays` int NOT NULL DEFAULT 0,
+  `SalaryRows` int NOT NULL DEFAULT 0,
+  `AttendanceRows` int NOT NULL DEFAULT 0,
+  `RefreshedAt` datetime NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`DepartmentID`, `SummaryMonth`) USING BTREE,
+  INDEX `ix_summary_SummaryMonth` (`SummaryMonth`)
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = DYNAMIC;
+
+DROP TABLE IF EXISTS `payroll_summary_state`;
+CREATE TABLE `payroll_summary_state`  (
+  `Source` varchar(50) NOT NULL,
+  `Watermark` datetime NULL DEFAULT NULL,
+  `SourceRows` int NOT NULL DEFAULT 0,
+  `RefreshedAt` datetime NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`Source`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = DYNAMIC;
+
+-- Rows bị xóa (hoặc chuyển sang tháng khác) không để lại UpdatedAt:
+-- triggers ghi tháng cũ vào tombstones, refresh tính lại các tháng đó rồi xóa tombstones đã xử lý
+DROP TABLE IF EXISTS `payroll_summary_tombstones`;
+CREATE TABLE `payroll_summary_tombstones`  (
+  `TombstoneID` int NOT NULL AUTO_INCREMENT,
+  `Source` varchar(50) NOT NULL,
+  `SourceMonth` date NOT NULL,
+  `CreatedAt` datetime NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`TombstoneID`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = DYNAMIC;
+
+DROP TRIGGER IF EXISTS `salaries_summary_delete`;
+CREATE TRIGGER `salaries_summary_delete` AFTER DELETE ON `salaries` FOR EACH ROW
+  INSERT INTO `payroll_summary_tombstones` (`Source`, `SourceMonth`) VALUES ('salaries', OLD.`SalaryMonth`);
+
+DROP TRIGGER IF EXISTS `salaries_summary_move`;
+CREATE TRIGGER `salaries_summary_move` AFTER UPDATE ON `salaries` FOR EACH ROW
+  INSERT INTO `payroll_summary_tombstones` (`Source`, `SourceMonth`)
+  SELECT 'salaries', OLD.`SalaryMonth` FROM DUAL WHERE NOT (OLD.`SalaryMonth` <=> NEW.`SalaryMonth`);
+
+DROP TRIGGER IF EXISTS `attendance_summary_delete`;
+CREATE TRIGGER `attendance_summary_delete` AFTER DELETE ON `attendance` FOR EACH ROW
+  INSERT INTO `payroll_summary_tombstones` (`Source`, `SourceMonth`) VALUES ('attendance', OLD.`AttendanceMonth`);
+
+DROP TRIGGER IF EXISTS `attendance_summary_move`;
+CREATE TRIGGER `attendance_summary_move` AFTER UPDATE ON `attendance` FOR EACH ROW
+  INSERT INTO `payroll_summary_tombstones` (`Source`, `SourceMonth`)
+  SELECT 'attendance', OLD.`AttendanceMonth` FROM DUAL WHERE NOT (OLD.`AttendanceMonth` <=> NEW.`AttendanceMonth`);
@@ -0,0 +1,103 @@
+"""
+DataLoader - Gom các lookups theo key trong cùng một request thành một batch
+Các load() gọi trong cùng một vòng event loop được dispatch chung (loop.call_soon),
+mỗi key chỉ được load một lần trong một request.
+Request scope: middleware mở request_scope(), code gọi request_loader(name, batch_fn)
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, Iterator, List, Optional, Set, TypeVar
+import asyncio
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchFn = Callable[[List[K]], Awaitable[Dict[K, V]]]
+
+
+class DataLoader(Generic[K, V]):
+    """
+    batch_fn nhận danh sách keys (không trùng) và trả về dict key -> value,
+    key không có trong dict được resolve thành None
+    """
+
+    def __init__(self, batch_fn: BatchFn):
+        self.batch_fn = batch_fn
+        self._futures: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+        # Giữ reference tới các batch tasks đang chạy
+        self._tasks: Set[asyncio.Task] = set()
+        self.lookups = 0
+        self.batches = 0
+        self.keys_loaded = 0
+
+    @property
+    def coalesced(self) -> int:
+        """Số lookups không cần query riêng (gộp vào batch khác hoặc lấy từ cache của request)"""
+        return self.lookups - self.batches
+
+    def load(self, key: K) -> Awaitable[Optional[V]]:
+        """Await để lấy value của key"""
+        self.lookups += 1
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            if not self._queue:
+                loop.call_soon(self._dispatch)
+            self._queue.append(key)
+        return future
+
+    def load_many(self, keys: Iterable[K]) -> Awaitable[List[Optional[V]]]:
+        return asyncio.gather(*(self.load(key) for key in keys))
+
+    def _dispatch(self):
+        keys, self._queue = self._queue, []
+        self.batches += 1
+        self.keys_loaded += len(keys)
+        task = asyncio.ensure_future(self._resolve(keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, keys: List[K]):
+        try:
+            values = await self.batch_fn(keys)
+        except Exception as e:
+            # Bỏ khỏi cache để lookup sau trong cùng request được thử lại
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(values.get(key))
+
+
+_request_loaders: ContextVar[Optional[Dict[str, DataLoader]]] = ContextVar("request_loaders", default=None)
+
+
+@contextmanager
+def request_scope() -> Iterator[Dict[str, DataLoader]]:
+    """Loaders dùng chung trong một request, yield dict name -> DataLoader để đọc counters"""
+    loaders: Dict[str, DataLoader] = {}
+    token = _request_loaders.set(loaders)
+    try:
+        yield loaders
+    finally:
+        _request_loaders.reset(token)
+
+
+def request_loader(name: str, batch_fn: BatchFn) -> DataLoader:
+    """
+    Loader `name` của request hiện tại (tạo ở lần gọi đầu tiên)
+    Ngoài request scope (background jobs, scripts) trả về loader mới, không gộp giữa các calls
+    """
+    loaders = _request_loaders.get()
+    if loaders is None:
+        return DataLoader(batch_fn)
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = DataLoader(batch_fn)
+    return loader
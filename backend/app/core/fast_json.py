@@ -0,0 +1,56 @@
+"""
+Fast JSON Responses - Bỏ qua lần validate thứ hai của response_model
+Services đã build schemas (validate một lần trong pydantic-core), route trả về
+FastJSONResponse nên FastAPI không model_dump + validate + serialize lại.
+Dùng orjson nếu có, fallback về serializer của pydantic-core
+"""
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from decimal import Decimal
+from typing import Any, Optional
+import os
+
+import pydantic_core
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true"
+
+
+def _orjson_default(obj: Any):
+    """Types orjson không tự serialize"""
+    if isinstance(obj, BaseModel):
+        # Schemas không dùng alias/exclude nên __dict__ chính là output của model_dump
+        return obj.__dict__
+    if isinstance(obj, Decimal):
+        # Giống pydantic JSON mode: Decimal -> string
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize models/lists/dicts ra JSON bytes, không validate"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+    return pydantic_core.to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse render bằng orjson (hoặc pydantic-core)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json(content: Any, headers: Optional[dict] = None):
+    """
+    Trả về FastJSONResponse khi FAST_JSON_RESPONSES bật,
+    ngược lại trả về content để FastAPI xử lý như bình thường
+    """
+    if not FAST_JSON_ENABLED:
+        return content
+    return FastJSONResponse(content, headers=headers)
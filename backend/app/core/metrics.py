@@ -0,0 +1,338 @@
+"""
+Metrics - Counters/histograms trong memory, render ở Prometheus text format cho /metrics
+HTTP latency theo route (middleware), SQL latency và row counts theo database
+(SQLAlchemy before/after_cursor_execute), SQL time của mỗi route và mock-data fallbacks
+Không cần prometheus_client
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import threading
+import time
+
+from sqlalchemy import event
+
+from .query_log import (
+    N_PLUS_ONE_THRESHOLD, SLOW_QUERY_SECONDS, log_repeated_statements, log_slow_query, repeated_statements
+)
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+# (name, type, help, [(sample name, labels, value)]) - dùng cho collectors đọc stats lúc scrape
+Family = Tuple[str, str, str, List[Tuple[str, Dict[str, str], float]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(round(value, 9))
+    return str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(dict(zip(self.labelnames, labels)))} {_number(value)}"
+
+
+class Histogram:
+    """Buckets lưu không cumulative, cộng dồn lúc render"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., count trên bucket cuối, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._values.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = sorted((labels, list(series)) for labels, series in self._values.items())
+        for labels, series in values:
+            names = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels({**names, 'le': _number(float(bound))})} {cumulative}"
+            yield f"{self.name}_sum{_labels(names)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(names)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        """collector() được gọi mỗi lần scrape, trả về các metric families đọc từ stats hiện tại"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"⚠️  Metrics collector failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{sample}{_labels(labels)} {_number(value)}" for sample, labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency theo route template",
+    ("method", "route", "status"), HTTP_BUCKETS
+)
+db_query_seconds = metrics.histogram(
+    "db_query_duration_seconds", "Thời gian thực thi SQL statement",
+    ("database", "operation"), QUERY_BUCKETS
+)
+db_query_rows = metrics.histogram(
+    "db_query_rows", "Rows của mỗi statement (cursor.rowcount, SELECT trên driver trả -1 thì đếm rows đã fetch)",
+    ("database", "operation"), ROW_BUCKETS
+)
+db_query_errors = metrics.counter(
+    "db_query_errors_total", "SQL statements lỗi", ("database",)
+)
+db_route_seconds = metrics.counter(
+    "db_route_query_seconds_total", "Tổng thời gian SQL của các requests theo route", ("route", "database")
+)
+db_route_queries = metrics.counter(
+    "db_route_queries_total", "Số SQL statements của các requests theo route", ("route", "database")
+)
+db_slow_queries = metrics.counter(
+    "db_slow_queries_total", "SQL statements chạy lâu hơn SLOW_QUERY_MS", ("database",)
+)
+db_repeated_statements = metrics.counter(
+    "db_repeated_statements_total", "Requests có một statement shape lặp lại >= N_PLUS_ONE_THRESHOLD lần (nghi N+1)",
+    ("route", "database")
+)
+mock_fallbacks = metrics.counter(
+    "mock_data_fallbacks_total", "Số responses trả về mock data thay vì database",
+    ("endpoint", "reason")
+)
+
+
+class RequestQueries:
+    """SQL time và số statements của request hiện tại, theo database và theo statement"""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        # Các statements của một request có thể chạy song song trên nhiều worker threads
+        self._lock = threading.Lock()
+        self.seconds: Dict[str, float] = {}
+        self.queries: Dict[str, int] = {}
+        # (database, statement) -> số lần, gộp theo shape khi request kết thúc
+        self.statements: Dict[Tuple[str, str], int] = {}
+
+    @property
+    def total(self) -> int:
+        return sum(self.queries.values())
+
+    def add(self, database: str, elapsed: float, statement: str = ""):
+        key = (database, statement)
+        with self._lock:
+            self.seconds[database] = self.seconds.get(database, 0.0) + elapsed
+            self.queries[database] = self.queries.get(database, 0) + 1
+            self.statements[key] = self.statements.get(key, 0) + 1
+
+    def route(self) -> str:
+        return route_label(self.scope) if self.scope is not None else "unknown"
+
+
+_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+@contextmanager
+def request_queries(scope: Optional[dict] = None) -> Iterator[RequestQueries]:
+    """
+    Ghi SQL time của request vào RequestQueries (context được copy sang worker threads
+    của sync routes và db_manager.run_*, nên statements chạy ở đó vẫn được tính)
+    scope: ASGI scope của request, để slow-query log biết route
+    """
+    queries = RequestQueries(scope)
+    token = _request_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _request_queries.reset(token)
+
+
+def route_label(scope) -> str:
+    """
+    Route template của request ("/api/hr/employees/{employee_id}"), "unmatched" nếu không có route
+    Routers được include lồng nhau chỉ giữ path tương đối với router, prefix được lấy lại
+    từ các segments đầu của path thật (prefix luôn là literal)
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    prefix = "/".join(segments[:max(len(segments) - template.count("/"), 0)])
+    return prefix + template
+
+
+def observe_request(method: str, route: str, status: int, elapsed: float, queries: RequestQueries):
+    """Ghi latency + SQL time của request, log các statements lặp lại (N+1)"""
+    http_request_seconds.observe(elapsed, method, route, str(status))
+    for database, seconds in queries.seconds.items():
+        db_route_seconds.inc(route, database, amount=seconds)
+        db_route_queries.inc(route, database, amount=queries.queries[database])
+    if queries.total >= N_PLUS_ONE_THRESHOLD > 0:
+        repeated = repeated_statements(queries.statements, N_PLUS_ONE_THRESHOLD)
+        for database in {database for database, _, _ in repeated}:
+            db_repeated_statements.inc(route, database)
+        log_repeated_statements(route, repeated)
+
+
+def record_mock_fallback(endpoint: str, reason: str):
+    """reason: "unavailable" (database chưa kết nối) hoặc "error" (query lỗi)"""
+    mock_fallbacks.inc(endpoint, reason)
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:6].upper()
+    if keyword.startswith("WITH"):
+        return "SELECT"
+    return keyword if keyword in OPERATIONS else "OTHER"
+
+
+class _RowCountingCursor:
+    """
+    DBAPI cursor proxy cho SELECT khi driver không báo rowcount (pyodbc, sqlite3 trả -1):
+    đếm rows đã fetch, observe db_query_rows khi SQLAlchemy đóng cursor
+    """
+    __slots__ = ("_cursor", "_labels", "_rows")
+
+    def __init__(self, cursor, *labels: str):
+        self._cursor = cursor
+        self._labels = labels
+        self._rows = 0
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._rows += len(rows)
+        return rows
+
+    def close(self):
+        if self._labels:
+            db_query_rows.observe(self._rows, *self._labels)
+            self._labels = ()
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def instrument_engine(engine, database: str):
+    """Đo latency + rows của mọi statement trên engine (label database)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = _operation(statement)
+        db_query_seconds.observe(elapsed, database, operation)
+        if cursor.rowcount >= 0:
+            db_query_rows.observe(cursor.rowcount, database, operation)
+        elif operation == "SELECT" and context is not None and cursor.description is not None:
+            # CursorResult đọc rows qua context.cursor nên proxy thấy mọi lần fetch
+            context.cursor = _RowCountingCursor(cursor, database, operation)
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.add(database, elapsed, statement)
+        if elapsed >= SLOW_QUERY_SECONDS > 0:
+            db_slow_queries.inc(database)
+            log_slow_query(database, queries.route() if queries else "background", statement, parameters, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        db_query_errors.inc(database)
@@ -4,8 +4,9 @@ Mock Data Service - For testing when databases are unavailable
 from datetime import datetime
 from typing import List
 from ..modules.hr_management.schemas import (
-    EmployeeListItem, DepartmentSchema, SyncCheckResponse, SyncNeed
+    EmployeeListItem, EmployeePage, EmployeeSuggestion, DepartmentSchema, SyncCheckResponse, SyncNeed
 )
+from ..modules.hr_management.search_index import fold
 
 
 class MockDataService:
@@ -62,6 +63,40 @@ class MockDataService:
             ),
         ]
     
+    @staticmethod
+    def get_mock_employee_page(
+        limit: int = 100,
+        sort_by: str = "EmployeeID",
+        sort_order: str = "asc"
+    ) -> EmployeePage:
+        """Return mock employee data as a single page"""
+        employees = sorted(
+            MockDataService.get_mock_employees(),
+            key=lambda emp: getattr(emp, sort_by),
+            reverse=sort_order == "desc"
+        )
+        return EmployeePage(
+            Items=employees[:limit],
+            NextCursor=None,
+            HasMore=False,
+            Limit=limit,
+            SortBy=sort_by,
+            SortOrder=sort_order
+        )
+    
+    @staticmethod
+    def get_mock_suggestions(query: str, limit: int = 10) -> List[EmployeeSuggestion]:
+        """Mock type-ahead: prefix của tên, của một từ trong tên hoặc của EmployeeID"""
+        folded_query = fold(query)
+        suggestions = []
+        for employee in MockDataService.get_mock_employees():
+            name = fold(employee.FullName)
+            if (name.startswith(folded_query)
+                    or f" {folded_query}" in f" {name}"
+                    or str(employee.EmployeeID).startswith(folded_query)):
+                suggestions.append(EmployeeSuggestion(EmployeeID=employee.EmployeeID, FullName=employee.FullName))
+        return suggestions[:limit]
+    
     @staticmethod
     def get_mock_departments() -> List[DepartmentSchema]:
         """Return mock department data"""
@@ -0,0 +1,76 @@
+"""
+Query Log - Slow-query log và phát hiện N+1 trong một request
+Statement được chuẩn hóa thành "shape": literals -> ?, danh sách placeholders của IN -> (?...),
+nên log không chứa giá trị và các lần lặp cùng một query (khác tham số) được gộp lại
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+import os
+import re
+
+# Statement chạy lâu hơn ngưỡng này được log (0 = tắt)
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_MS", "200")) / 1000
+# Cùng một shape lặp lại từ chừng này lần trong một request -> nghi N+1 (0 = tắt)
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+# Server-Timing + X-DB-Queries headers trên mọi response
+QUERY_TIMING_HEADERS = os.getenv("QUERY_TIMING_HEADERS", "true").lower() == "true"
+SHAPE_LOG_LENGTH = 500
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LISTS = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """SQL không có literals, IN lists độ dài bất kỳ có cùng shape"""
+    shape = _LITERALS.sub("?", statement)
+    shape = _PLACEHOLDER_LISTS.sub("(?...)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+def _parameter_count(parameters) -> int:
+    if isinstance(parameters, dict):
+        return len(parameters)
+    if isinstance(parameters, (list, tuple)):
+        return len(parameters)
+    return 0
+
+
+def log_slow_query(database: str, route: str, statement: str, parameters, elapsed: float):
+    """Chỉ log shape và số parameters, không log giá trị"""
+    shape = statement_shape(statement)
+    if len(shape) > SHAPE_LOG_LENGTH:
+        shape = shape[:SHAPE_LOG_LENGTH] + "..."
+    print(f"🐢 Slow query {database} {elapsed * 1000:.0f}ms [{route}] "
+          f"params=<{_parameter_count(parameters)} redacted>: {shape}")
+
+
+def repeated_statements(statements: Dict[Tuple[str, str], int], threshold: int) -> List[Tuple[str, str, int]]:
+    """(database, shape, số lần) của các shapes lặp lại >= threshold lần, nhiều nhất trước"""
+    if threshold <= 0:
+        return []
+    shapes: Dict[Tuple[str, str], int] = {}
+    for (database, statement), count in statements.items():
+        key = (database, statement_shape(statement))
+        shapes[key] = shapes.get(key, 0) + count
+    repeated = [(database, shape, count) for (database, shape), count in shapes.items() if count >= threshold]
+    return sorted(repeated, key=lambda item: -item[2])
+
+
+def log_repeated_statements(route: str, repeated: Iterable[Tuple[str, str, int]]):
+    for database, shape, count in repeated:
+        if len(shape) > SHAPE_LOG_LENGTH:
+            shape = shape[:SHAPE_LOG_LENGTH] + "..."
+        print(f"🔁 Likely N+1 [{route}] {database}: {count}× {shape}")
+
+
+def server_timing(seconds: Dict[str, float], queries: Dict[str, int], total: float) -> str:
+    """Server-Timing header: db-<database> (thời gian SQL + số statements) và total của request"""
+    entries = [
+        f'db-{database};dur={seconds[database] * 1000:.1f};desc="{queries[database]} queries"'
+        for database in sorted(seconds)
+    ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
@@ -0,0 +1,87 @@
+"""
+Circuit Breaker - Fail fast khi một database đang down
+closed: requests đi qua, đếm lỗi mất kết nối liên tiếp (không tính lỗi SQL, pool timeout)
+open: get_*_db() raise DatabaseUnavailable ngay, background prober (DatabaseManager)
+kết nối lại bằng engine mới với backoff rồi đóng circuit
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+import threading
+
+
+class DatabaseUnavailable(RuntimeError):
+    """Database chưa kết nối hoặc circuit đang mở"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, probe_seconds: float, probe_max_seconds: float):
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.probe_seconds = max(probe_seconds, 0.01)
+        self.probe_max_seconds = max(probe_max_seconds, self.probe_seconds)
+        self._lock = threading.Lock()
+        # Mở cho tới khi kết nối được lần đầu
+        self.state = "open"
+        self.failures = 0
+        self.trips = 0
+        self.recoveries = 0
+        self.opened_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def closed(self) -> bool:
+        return self.state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            if self.state == "closed":
+                self.failures = 0
+
+    def record_failure(self, error) -> bool:
+        """Returns True nếu lần lỗi này làm circuit mở"""
+        with self._lock:
+            self.last_error = str(error)[:200]
+            if self.state != "closed":
+                return False
+            self.failures += 1
+            if self.failures < self.failure_threshold:
+                return False
+            self._open()
+            return True
+
+    def trip(self, error) -> bool:
+        """Mở circuit ngay (database chưa kết nối được, hoặc bị tắt thủ công)"""
+        with self._lock:
+            self.last_error = str(error)[:200]
+            if self.state != "closed":
+                return False
+            self._open()
+            return True
+
+    def close(self):
+        with self._lock:
+            if self.state != "closed" and self.opened_at is not None:
+                self.recoveries += 1
+            self.state = "closed"
+            self.failures = 0
+            self.opened_at = None
+
+    def probe_delay(self, attempt: int) -> float:
+        """Backoff giữa các lần probe: probe_seconds × 2^attempt, tối đa probe_max_seconds"""
+        return min(self.probe_seconds * (2 ** min(attempt, 16)), self.probe_max_seconds)
+
+    def _open(self):
+        self.state = "open"
+        self.trips += 1
+        self.opened_at = datetime.utcnow()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "trips": self.trips,
+                "recoveries": self.recoveries,
+                "opened_at": self.opened_at.isoformat() if self.opened_at else None,
+                "last_error": self.last_error,
+            }
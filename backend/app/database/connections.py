@@ -2,13 +2,20 @@
 Database Connection Manager với Improved Error Handling
 Manages dual database connections to SQL Server (HUMAN_2025) and MySQL (PAYROLL_2026)
 """
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
+from datetime import datetime
+import anyio
 import os
+import threading
 from dotenv import load_dotenv
 
+from .circuit import CircuitBreaker, DatabaseUnavailable
+from .pool import InstrumentedQueuePool, PoolSettings, prewarm
+from ..core.metrics import instrument_engine
+
 load_dotenv()
 
 # Base classes for ORM models
@@ -24,116 +31,177 @@ class DatabaseManager:
         self.mysql_engine = None
         self.SessionLocal_HR = None
         self.SessionLocal_Payroll = None
-        self.sql_server_available = False
-        self.mysql_available = False
+        self.sql_server_pool = PoolSettings.from_env("SQL_SERVER")
+        self.mysql_pool = PoolSettings.from_env("MYSQL")
+        # Liveness check thay cho pool_pre_ping (một round trip mỗi checkout)
+        self.liveness_interval = float(os.getenv("DB_LIVENESS_INTERVAL_SECONDS", "30"))
+        self.liveness = {"sql_server": {}, "mysql": {}}
+        # Circuit breaker mỗi database: fail fast khi down, prober kết nối lại khi database sống lại
+        self.circuits = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("DB_CIRCUIT_FAILURE_THRESHOLD", "3")),
+                probe_seconds=float(os.getenv("DB_CIRCUIT_PROBE_SECONDS", "5")),
+                probe_max_seconds=float(os.getenv("DB_CIRCUIT_PROBE_MAX_SECONDS", "60"))
+            )
+            for name in ("sql_server", "mysql")
+        }
+        self._swap_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitoring = False
+        self._liveness_thread = None
+        self._probers = {}
+    
+    # Available = đã có engine và circuit đang đóng; set thủ công để bật/tắt một database
+    @property
+    def sql_server_available(self):
+        return self.SessionLocal_HR is not None and self.circuits["sql_server"].closed
+    
+    @sql_server_available.setter
+    def sql_server_available(self, available):
+        self._set_available("sql_server", available)
+    
+    @property
+    def mysql_available(self):
+        return self.SessionLocal_Payroll is not None and self.circuits["mysql"].closed
+    
+    @mysql_available.setter
+    def mysql_available(self, available):
+        self._set_available("mysql", available)
+    
+    def _set_available(self, name, available):
+        if available:
+            self.circuits[name].close()
+        else:
+            self.circuits[name].trip("disabled")
+    
+    def _sql_server_url(self):
+        from urllib.parse import quote_plus
+        
+        sql_server_host = os.getenv('SQL_SERVER_HOST', '127.0.0.1')
+        sql_server_port = os.getenv('SQL_SERVER_PORT', '1433')
+        sql_server_user = os.getenv('SQL_SERVER_USER')
+        sql_server_password = os.getenv('SQL_SERVER_PASSWORD')
+        sql_server_db = os.getenv('SQL_SERVER_DATABASE')
+        login_timeout = os.getenv('SQL_SERVER_LOGIN_TIMEOUT', '10')
+        
+        # Build ODBC connection string
+        odbc_conn_str = (
+            f"DRIVER={{ODBC Driver 18 for SQL Server}};"
+            f"SERVER={sql_server_host},{sql_server_port};"
+            f"DATABASE={sql_server_db};"
+            f"UID={sql_server_user};"
+            f"PWD={sql_server_password};"
+            f"TrustServerCertificate=yes;"
+            f"Encrypt=no;"
+            f"LoginTimeout={login_timeout}"
+        )
+        
+        # SQLAlchemy connection string with URL encoded ODBC string
+        return f"mssql+pyodbc:///?odbc_connect={quote_plus(odbc_conn_str)}", {}
+    
+    def _mysql_url(self):
+        mysql_host = os.getenv('MYSQL_HOST', 'localhost')
+        mysql_port = os.getenv('MYSQL_PORT', '3306')
+        mysql_user = os.getenv('MYSQL_USER')
+        mysql_password = os.getenv('MYSQL_PASSWORD', '')
+        mysql_db = os.getenv('MYSQL_DATABASE')
+        
+        if mysql_password:
+            mysql_conn_str = (
+                f"mysql+pymysql://{mysql_user}:{mysql_password}"
+                f"@{mysql_host}:{mysql_port}/{mysql_db}"
+            )
+        else:
+            mysql_conn_str = (
+                f"mysql+pymysql://{mysql_user}"
+                f"@{mysql_host}:{mysql_port}/{mysql_db}"
+            )
+        return mysql_conn_str, {"connect_timeout": int(os.getenv('MYSQL_CONNECT_TIMEOUT', '10'))}
+    
+    def _create_engine(self, name):
+        """Engine mới của database name, đã gắn metrics và circuit breaker listeners"""
+        url, connect_args = self._sql_server_url() if name == "sql_server" else self._mysql_url()
+        settings = self.sql_server_pool if name == "sql_server" else self.mysql_pool
+        engine = create_engine(url, connect_args=connect_args, **settings.engine_options())
+        instrument_engine(engine, name)
+        self._watch_engine(engine, name)
+        return engine
+    
+    def _watch_engine(self, engine, name):
+        """
+        Lỗi mất kết nối và lỗi không mở được connection (connection=None, ví dụ MySQL 2003,
+        SQL Server login timeout) được đếm vào circuit của database
+        """
+        circuit = self.circuits[name]
+        
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            if exception_context.is_disconnect or exception_context.connection is None:
+                self._on_failure(name, exception_context.original_exception)
+        
+        @event.listens_for(engine, "connect")
+        def connect(dbapi_connection, connection_record):
+            circuit.record_success()
+    
+    def _connect(self, name):
+        """
+        Tạo engine mới, mở sẵn connections rồi thay engine + sessionmaker cũ (hot swap)
+        Sessions đang mở vẫn dùng engine cũ tới khi đóng, pool cũ được dispose
+        Returns True nếu kết nối được
+        """
+        settings = self.sql_server_pool if name == "sql_server" else self.mysql_pool
+        engine = self._create_engine(name)
+        try:
+            # Test connection + mở sẵn connections để request đầu tiên không phải chờ login
+            prewarm(engine, settings.prewarm)
+        except Exception as e:
+            engine.dispose()
+            self.circuits[name].trip(e)
+            raise
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with self._swap_lock:
+            if name == "sql_server":
+                old, self.sql_server_engine, self.SessionLocal_HR = self.sql_server_engine, engine, session_factory
+            else:
+                old, self.mysql_engine, self.SessionLocal_Payroll = self.mysql_engine, engine, session_factory
+            if old is not None:
+                # Giữ counters của pool qua các lần reconnect
+                if isinstance(old.pool, InstrumentedQueuePool):
+                    engine.pool.telemetry = old.pool.telemetry
+                old.dispose()
+            self.circuits[name].close()
+        return True
         
     def init_databases(self):
         """Initialize both database connections with graceful error handling"""
         # Try SQL Server Connection
         try:
             print("🔵 Attempting SQL Server connection...")
-            from urllib.parse import quote_plus
-            
-            sql_server_host = os.getenv('SQL_SERVER_HOST', '127.0.0.1')
-            sql_server_port = os.getenv('SQL_SERVER_PORT', '1433')
-            sql_server_user = os.getenv('SQL_SERVER_USER')
-            sql_server_password = os.getenv('SQL_SERVER_PASSWORD')
-            sql_server_db = os.getenv('SQL_SERVER_DATABASE')
-            
-            # Build ODBC connection string
-            odbc_conn_str = (
-                f"DRIVER={{ODBC Driver 18 for SQL Server}};"
-                f"SERVER={sql_server_host},{sql_server_port};"
-                f"DATABASE={sql_server_db};"
-                f"UID={sql_server_user};"
-                f"PWD={sql_server_password};"
-                f"TrustServerCertificate=yes;"
-                f"Encrypt=no;"
-                f"LoginTimeout=30"
-            )
-            
-            # SQLAlchemy connection string with URL encoded ODBC string
-            sql_server_conn_str = f"mssql+pyodbc:///?odbc_connect={quote_plus(odbc_conn_str)}"
-            
-            self.sql_server_engine = create_engine(
-                sql_server_conn_str,
-                pool_pre_ping=True,
-                pool_size=5,
-                max_overflow=10,
-                pool_timeout=30
-            )
-            
-            # Test connection
-            with self.sql_server_engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
-            
-            self.SessionLocal_HR = sessionmaker(
-                autocommit=False,
-                autoflush=False,
-                bind=self.sql_server_engine
-            )
-            
-            self.sql_server_available = True
-            print("✅ SQL Server connected successfully")
+            self._connect("sql_server")
+            print(f"✅ SQL Server connected successfully (pool {self.sql_server_pool.pool_size}"
+                  f"+{self.sql_server_pool.max_overflow}, {self.sql_server_pool.prewarm} pre-warmed)")
             
         except Exception as e:
             print(f"⚠️  SQL Server unavailable: {str(e)[:100]}")
             print("   API will run with limited functionality")
-            self.sql_server_engine = None
-            self.SessionLocal_HR = None
         
         # Try MySQL Connection
         try:
             print("🟢 Attempting MySQL connection...")
-            mysql_host = os.getenv('MYSQL_HOST', 'localhost')
-            mysql_port = os.getenv('MYSQL_PORT', '3306')
-            mysql_user = os.getenv('MYSQL_USER')
-            mysql_password = os.getenv('MYSQL_PASSWORD', '')
-            mysql_db = os.getenv('MYSQL_DATABASE')
-            
-            if mysql_password:
-                mysql_conn_str = (
-                    f"mysql+pymysql://{mysql_user}:{mysql_password}"
-                    f"@{mysql_host}:{mysql_port}/{mysql_db}"
-                )
-            else:
-                mysql_conn_str = (
-                    f"mysql+pymysql://{mysql_user}"
-                    f"@{mysql_host}:{mysql_port}/{mysql_db}"
-                )
-            
-            self.mysql_engine = create_engine(
-                mysql_conn_str,
-                pool_pre_ping=True,
-                pool_size=5,
-                max_overflow=10,
-                pool_timeout=3
-            )
-            
-            # Test connection
-            with self.mysql_engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
-            
-            self.SessionLocal_Payroll = sessionmaker(
-                autocommit=False,
-                autoflush=False,
-                bind=self.mysql_engine
-            )
-            
-            self.mysql_available = True
-            print("✅ MySQL connected successfully")
+            self._connect("mysql")
+            print(f"✅ MySQL connected successfully (pool {self.mysql_pool.pool_size}"
+                  f"+{self.mysql_pool.max_overflow}, {self.mysql_pool.prewarm} pre-warmed)")
             
         except Exception as e:
             print(f"⚠️  MySQL unavailable: {str(e)[:100]}")
             print("   API will run with limited functionality")
-            self.mysql_engine = None
-            self.SessionLocal_Payroll = None
         
     @contextmanager
     def get_hr_db(self):
-        """Get SQL Server (HR) database session"""
-        if not self.SessionLocal_HR:
-            raise RuntimeError("SQL Server not available. Please check database configuration.")
+        """Get SQL Server (HR) database session, fail fast khi circuit đang mở"""
+        if not self.sql_server_available:
+            raise DatabaseUnavailable("SQL Server not available. Please check database configuration.")
         db = self.SessionLocal_HR()
         try:
             yield db
@@ -142,15 +210,181 @@ class DatabaseManager:
             
     @contextmanager
     def get_payroll_db(self):
-        """Get MySQL (Payroll) database session"""
-        if not self.SessionLocal_Payroll:
-            raise RuntimeError("MySQL not available. Please check database configuration.")
+        """Get MySQL (Payroll) database session, fail fast khi circuit đang mở"""
+        if not self.mysql_available:
+            raise DatabaseUnavailable("MySQL not available. Please check database configuration.")
         db = self.SessionLocal_Payroll()
         try:
             yield db
         finally:
             db.close()
     
+    async def run_hr(self, fn, *args, **kwargs):
+        """
+        Chạy fn(hr_db, *args, **kwargs) trong worker thread với session riêng
+        Cho phép async routes chạy HR và Payroll queries song song (asyncio.gather)
+        """
+        def call():
+            with self.get_hr_db() as db:
+                return fn(db, *args, **kwargs)
+        return await anyio.to_thread.run_sync(call)
+    
+    async def run_payroll(self, fn, *args, **kwargs):
+        """Chạy fn(payroll_db, *args, **kwargs) trong worker thread với session riêng"""
+        def call():
+            with self.get_payroll_db() as db:
+                return fn(db, *args, **kwargs)
+        return await anyio.to_thread.run_sync(call)
+    
+    async def run_hr_payroll(self, fn, *args, **kwargs):
+        """Chạy fn(hr_db, payroll_db, ...) trong worker thread, dùng cho logic cần cả 2 sessions tuần tự"""
+        def call():
+            with self.get_hr_db() as hr_db, self.get_payroll_db() as payroll_db:
+                return fn(hr_db, payroll_db, *args, **kwargs)
+        return await anyio.to_thread.run_sync(call)
+    
+    def _engines(self):
+        return {"sql_server": self.sql_server_engine, "mysql": self.mysql_engine}
+    
+    def _on_failure(self, name, error):
+        """Lỗi mất kết nối: đủ DB_CIRCUIT_FAILURE_THRESHOLD lần liên tiếp thì mở circuit và bắt đầu probe"""
+        if self.circuits[name].record_failure(error):
+            print(f"🔴 {name} circuit open, failing fast until reconnect: {str(error)[:100]}")
+            self._start_prober(name)
+    
+    def check_liveness(self):
+        """
+        SELECT 1 trên mỗi engine có circuit đóng, lỗi được tính như một lỗi mất kết nối
+        (thay cho pool_pre_ping). Database có circuit mở do prober kiểm tra
+        Bỏ qua pool không có connection rảnh: connections đang được dùng nên database vẫn sống,
+        không chiếm thêm slot khi pool đang bão hòa
+        """
+        for name, engine in self._engines().items():
+            if engine is None or not self.circuits[name].closed:
+                continue
+            pool = engine.pool
+            if pool.checkedin() == 0 and pool.checkedout() > 0:
+                continue
+            state = self.liveness[name]
+            state["checked_at"] = datetime.utcnow().isoformat()
+            try:
+                with engine.connect() as conn:
+                    conn.exec_driver_sql("SELECT 1")
+                state["ok"] = True
+                state.pop("error", None)
+                self.circuits[name].record_success()
+            except Exception as e:
+                print(f"⚠️  {name} liveness check failed, disposing pool: {str(e)[:100]}")
+                state["ok"] = False
+                state["error"] = str(e)[:200]
+                state["failures"] = state.get("failures", 0) + 1
+                engine.dispose()
+                self._on_failure(name, e)
+    
+    def _start_prober(self, name):
+        """Thread kết nối lại database name (engine mới) với backoff tới khi thành công"""
+        if not self._monitoring:
+            return
+        with self._swap_lock:
+            prober = self._probers.get(name)
+            if prober is not None and prober.is_alive():
+                return
+            circuit = self.circuits[name]
+            
+            def run():
+                attempt = 0
+                while not self._stop.wait(circuit.probe_delay(attempt)):
+                    try:
+                        self._connect(name)
+                    except Exception:
+                        attempt += 1
+                        continue
+                    print(f"🟢 {name} reconnected after {attempt + 1} probe(s), circuit closed")
+                    return
+            
+            prober = self._probers[name] = threading.Thread(target=run, name=f"db-probe-{name}", daemon=True)
+            prober.start()
+    
+    def start_health_checks(self):
+        """
+        Liveness thread (mỗi DB_LIVENESS_INTERVAL_SECONDS, 0 = tắt) + probers cho các databases
+        chưa kết nối được lúc startup
+        """
+        self._stop.clear()
+        self._monitoring = True
+        if self.liveness_interval > 0 and self._liveness_thread is None:
+            def run():
+                while not self._stop.wait(self.liveness_interval):
+                    self.check_liveness()
+            
+            self._liveness_thread = threading.Thread(target=run, name="db-liveness", daemon=True)
+            self._liveness_thread.start()
+        for name, circuit in self.circuits.items():
+            if not circuit.closed:
+                self._start_prober(name)
+    
+    def shutdown(self):
+        """Dừng liveness thread + probers và đóng connections trong pools"""
+        self._monitoring = False
+        self._stop.set()
+        threads = [self._liveness_thread, *self._probers.values()]
+        for thread in threads:
+            if thread is not None:
+                thread.join(timeout=5)
+        self._liveness_thread = None
+        self._probers = {}
+        for engine in self._engines().values():
+            if engine is not None:
+                engine.dispose()
+    
+    def pool_stats(self):
+        """Pool statistics mỗi database (checked-out, overflow, thời gian chờ, timeouts, liveness, circuit)"""
+        stats = {}
+        for name, engine in self._engines().items():
+            circuit = self.circuits[name].stats()
+            if engine is None:
+                stats[name] = {"status": "disconnected", "circuit": circuit}
+            elif isinstance(engine.pool, InstrumentedQueuePool):
+                stats[name] = {**engine.pool.stats(), "liveness": dict(self.liveness[name]), "circuit": circuit}
+            else:
+                stats[name] = {"status": engine.pool.status(), "circuit": circuit}
+        return stats
+    
+    def pool_metrics(self):
+        """Metric families cho /metrics, đọc từ pool_stats() lúc scrape"""
+        all_stats = self.pool_stats()
+        yield "db_circuit_open", "gauge", "1 khi circuit của database đang mở (fail fast)", [
+            ("db_circuit_open", {"database": name}, int(pool["circuit"]["state"] != "closed"))
+            for name, pool in all_stats.items()
+        ]
+        yield "db_circuit_trips_total", "counter", "Số lần circuit mở", [
+            ("db_circuit_trips_total", {"database": name}, pool["circuit"]["trips"])
+            for name, pool in all_stats.items()
+        ]
+        stats = {name: pool for name, pool in all_stats.items() if "checked_out" in pool}
+        gauges = [
+            ("db_pool_size", "pool_size", "Số connections cố định của pool"),
+            ("db_pool_checked_out", "checked_out", "Connections đang được dùng"),
+            ("db_pool_overflow", "overflow", "Connections overflow đang mở"),
+        ]
+        for metric, key, help in gauges:
+            yield metric, "gauge", help, [
+                (metric, {"database": name}, pool[key]) for name, pool in stats.items()
+            ]
+        yield "db_pool_checkout_timeouts_total", "counter", "Số lần checkout hết pool_timeout", [
+            ("db_pool_checkout_timeouts_total", {"database": name}, pool["timeouts"])
+            for name, pool in stats.items()
+        ]
+        wait = "db_pool_checkout_wait_seconds"
+        samples = []
+        for name, pool in stats.items():
+            labels = {"database": name}
+            for bound, count in pool["wait_buckets"].items():
+                samples.append((f"{wait}_bucket", {**labels, "le": bound}, count))
+            samples.append((f"{wait}_sum", labels, pool["wait_seconds_total"]))
+            samples.append((f"{wait}_count", labels, pool["wait_buckets"]["+Inf"]))
+        yield wait, "histogram", "Thời gian chờ checkout connection", samples
+    
     def test_connections(self):
         """Test both database connections"""
         all_ok = True
@@ -2,7 +2,7 @@
 SQLAlchemy Models for SQL Server (HUMAN_2025) Database
 Tables: Employees, Departments, Positions, Dividends
 """
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database.connections import Base_HR
@@ -60,6 +60,14 @@ class Position(Base_HR):
 class Dividend(Base_HR):
     """Dividend model mapping to SQL Server Dividends table"""
     __tablename__ = 'Dividends'
+    __table_args__ = (
+        # Lọc theo employee + khoảng ngày; DividendID (clustered key) nằm sẵn trong index nên
+        # keyset (DividendDate, DividendID) không cần sort, INCLUDE amount để rollup chỉ đọc index
+        Index('IX_Dividends_EmployeeID_DividendDate', 'EmployeeID', 'DividendDate',
+              mssql_include=['DividendAmount']),
+        # Khoảng ngày không lọc employee
+        Index('IX_Dividends_DividendDate', 'DividendDate', mssql_include=['EmployeeID', 'DividendAmount']),
+    )
     
     DividendID = Column(Integer, primary_key=True, autoincrement=True)
     EmployeeID = Column(Integer, ForeignKey('Employees.EmployeeID'), nullable=True)
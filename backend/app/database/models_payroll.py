@@ -1,8 +1,9 @@
 """
 SQLAlchemy Models for MySQL (PAYROLL_2026) Database
-Tables: employees_payroll, departments_payroll, positions_payroll
+Tables: employees_payroll, departments_payroll, positions_payroll, salaries, attendance,
+        payroll_department_month_summary, payroll_summary_state, payroll_summary_tombstones
 """
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Date, Numeric
 from datetime import datetime
 from ..database.connections import Base_Payroll
 
@@ -35,3 +36,80 @@ class PositionPayroll(Base_Payroll):
     PositionID = Column(Integer, primary_key=True)
     PositionName = Column(String(100), nullable=False)
     SyncedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Salary(Base_Payroll):
+    """Bảng lương tháng, mapping to MySQL salaries table"""
+    __tablename__ = 'salaries'
+    
+    SalaryID = Column(Integer, primary_key=True, autoincrement=True)
+    EmployeeID = Column(Integer, nullable=True, index=True)
+    SalaryMonth = Column(Date, nullable=False, index=True)
+    BaseSalary = Column(Numeric(12, 2), nullable=False)
+    Bonus = Column(Numeric(12, 2), nullable=True, default=0)
+    Deductions = Column(Numeric(12, 2), nullable=True, default=0)
+    NetSalary = Column(Numeric(12, 2), nullable=False)
+    CreatedAt = Column(DateTime, default=datetime.utcnow)
+    UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+
+class Attendance(Base_Payroll):
+    """Chấm công tháng, mapping to MySQL attendance table"""
+    __tablename__ = 'attendance'
+    
+    AttendanceID = Column(Integer, primary_key=True, autoincrement=True)
+    EmployeeID = Column(Integer, nullable=True, index=True)
+    WorkDays = Column(Integer, nullable=False)
+    AbsentDays = Column(Integer, nullable=True, default=0)
+    LeaveDays = Column(Integer, nullable=True, default=0)
+    AttendanceMonth = Column(Date, nullable=False, index=True)
+    CreatedAt = Column(DateTime, default=datetime.utcnow)
+    UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+
+class PayrollDepartmentMonthSummary(Base_Payroll):
+    """
+    Summary table: một row cho mỗi department × month
+    Được refresh incremental từ salaries/attendance (xem payroll_analytics/summary.py)
+    DepartmentID = -1: employees chưa phân công
+    """
+    __tablename__ = 'payroll_department_month_summary'
+
+    DepartmentID = Column(Integer, primary_key=True, autoincrement=False)
+    SummaryMonth = Column(Date, primary_key=True)
+    Headcount = Column(Integer, nullable=False, default=0)
+    GrossSalary = Column(Numeric(16, 2), nullable=False, default=0)
+    NetSalary = Column(Numeric(16, 2), nullable=False, default=0)
+    Deductions = Column(Numeric(16, 2), nullable=False, default=0)
+    Bonus = Column(Numeric(16, 2), nullable=False, default=0)
+    AttendanceHeadcount = Column(Integer, nullable=False, default=0)
+    WorkDays = Column(Integer, nullable=False, default=0)
+    AbsentDays = Column(Integer, nullable=False, default=0)
+    LeaveDays = Column(Integer, nullable=False, default=0)
+    # Số rows gốc (kể cả rows trùng)
+    SalaryRows = Column(Integer, nullable=False, default=0)
+    AttendanceRows = Column(Integer, nullable=False, default=0)
+    RefreshedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PayrollSummaryState(Base_Payroll):
+    """Watermark MAX(UpdatedAt) và tổng số rows của mỗi bảng nguồn ở lần refresh trước"""
+    __tablename__ = 'payroll_summary_state'
+
+    Source = Column(String(50), primary_key=True)
+    Watermark = Column(DateTime, nullable=True)
+    SourceRows = Column(Integer, nullable=False, default=0)
+    RefreshedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PayrollSummaryTombstone(Base_Payroll):
+    """
+    Tháng có rows salaries/attendance bị xóa (hoặc chuyển sang tháng khác), ghi bởi triggers
+    (Documentation/sql/payroll_summary.sql); refresh tính lại các tháng này rồi xóa tombstones
+    """
+    __tablename__ = 'payroll_summary_tombstones'
+
+    TombstoneID = Column(Integer, primary_key=True, autoincrement=True)
+    Source = Column(String(50), nullable=False)
+    SourceMonth = Column(Date, nullable=False)
+    CreatedAt = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,150 @@
+"""
+Connection Pool - Cấu hình pool từ env và telemetry cho mỗi database
+InstrumentedQueuePool đo thời gian chờ checkout và số lần timeout,
+pool_pre_ping được thay bằng pool_recycle + liveness check chạy nền (DatabaseManager)
+"""
+from sqlalchemy.pool import QueuePool
+from sqlalchemy import exc
+from typing import Any, Dict, NamedTuple
+import os
+import threading
+import time
+
+# Upper bounds (seconds) của histogram thời gian chờ checkout
+WAIT_BUCKETS = (0.001, 0.005, 0.025, 0.1, 0.5, 1.0, 5.0)
+
+
+def _env(prefix: str, name: str, default: str) -> str:
+    """<PREFIX>_<NAME>, fallback DB_<NAME> (áp dụng cho cả 2 databases), rồi default"""
+    return os.getenv(f"{prefix}_{name}", os.getenv(f"DB_{name}", default))
+
+
+class PoolSettings(NamedTuple):
+    """Cấu hình pool của một database"""
+    pool_size: int
+    max_overflow: int
+    timeout: float
+    recycle: int
+    prewarm: int
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "PoolSettings":
+        """Đọc <PREFIX>_POOL_SIZE, _MAX_OVERFLOW, _POOL_TIMEOUT, _POOL_RECYCLE, _POOL_PREWARM"""
+        pool_size = max(int(_env(prefix, "POOL_SIZE", "5")), 1)
+        return cls(
+            pool_size=pool_size,
+            max_overflow=max(int(_env(prefix, "MAX_OVERFLOW", "10")), 0),
+            timeout=float(_env(prefix, "POOL_TIMEOUT", "5")),
+            recycle=int(_env(prefix, "POOL_RECYCLE", "1800")),
+            prewarm=min(max(int(_env(prefix, "POOL_PREWARM", str(pool_size))), 0), pool_size),
+        )
+
+    def engine_options(self) -> Dict[str, Any]:
+        """Keyword arguments cho create_engine"""
+        return {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.timeout,
+            "pool_recycle": self.recycle,
+            "pool_pre_ping": False,
+        }
+
+
+class PoolTelemetry:
+    """Counters checkout của một pool, giữ nguyên qua engine.dispose()"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    self.wait_buckets[index] += 1
+                    break
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / attempts, 6) if attempts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                # Cumulative như Prometheus histogram, attempts > bucket cuối nằm ở "+Inf"
+                "wait_buckets": dict(zip(
+                    [str(bound) for bound in WAIT_BUCKETS] + ["+Inf"],
+                    [sum(self.wait_buckets[:index + 1]) for index in range(len(WAIT_BUCKETS))] + [attempts]
+                )),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool ghi lại thời gian của mỗi checkout (chờ slot trống + mở connection mới nếu overflow)
+    và các lần hết pool_timeout (TimeoutError)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.telemetry.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.telemetry.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        # engine.dispose() thay pool mới, counters vẫn được cộng dồn
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+    def stats(self) -> Dict[str, Any]:
+        """Trạng thái hiện tại + counters"""
+        checked_out = self.checkedout()
+        limit = self.size() + max(self._max_overflow, 0)
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "recycle": self._recycle,
+            "checked_out": checked_out,
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "saturated": checked_out >= limit,
+            **self.telemetry.snapshot(),
+        }
+
+
+def prewarm(engine, count: int):
+    """
+    Mở sẵn count connections rồi trả về pool (ít nhất 1 để kiểm tra kết nối)
+    Giữ tất cả cùng lúc để pool mở đủ count connections thay vì dùng lại một connection
+    """
+    connections = []
+    try:
+        for _ in range(max(count, 1)):
+            connections.append(engine.connect())
+        connections[0].exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
@@ -0,0 +1,53 @@
+"""
+Query helpers dùng chung cho SQL Server và MySQL
+"""
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Iterable, Iterator, List
+
+# SQL Server giới hạn 2100 parameters mỗi statement, chừa lại cho các filter khác
+MAX_IN_PARAMS = 2000
+
+
+def chunked(values: Iterable[int], size: int = MAX_IN_PARAMS) -> Iterator[List[int]]:
+    """Chia danh sách IDs thành các chunk cho câu IN (...)"""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class UnsupportedDialect(ValueError):
+    """Helper chỉ có cài đặt cho một số dialects, message nêu tên dialect"""
+
+    def __init__(self, feature: str, dialect: str):
+        super().__init__(f"{feature} not supported for dialect '{dialect}'")
+        self.feature = feature
+        self.dialect = dialect
+
+
+def bulk_upsert(session, model, rows: List[dict], update_columns: List[str], chunk_size: int = 500):
+    """
+    Multi-row upsert theo dialect của session
+    MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+    SQLite (benchmarks): INSERT ... ON CONFLICT DO UPDATE
+    Raises UnsupportedDialect cho dialect khác (kể cả khi rows rỗng, để lỗi cấu hình lộ ra sớm)
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect not in ("mysql", "sqlite"):
+        raise UnsupportedDialect("bulk_upsert", dialect)
+    primary_keys = [col.name for col in model.__table__.primary_key.columns]
+
+    for start in range(0, len(rows), chunk_size):
+        batch = rows[start:start + chunk_size]
+        if dialect == "mysql":
+            stmt = mysql_insert(model).values(batch)
+            stmt = stmt.on_duplicate_key_update(
+                {col: stmt.inserted[col] for col in update_columns}
+            )
+        else:
+            stmt = sqlite_insert(model).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=primary_keys,
+                set_={col: stmt.excluded[col] for col in update_columns}
+            )
+        session.execute(stmt)
@@ -2,13 +2,23 @@
 FastAPI Main Application
 Entry point cho HR & Payroll Dashboard Backend
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import MutableHeaders
 import os
+import time
 from dotenv import load_dotenv
 
 from .database.connections import db_manager
+from .database.circuit import DatabaseUnavailable
+from .core.dataloader import request_scope
+from .core.metrics import metrics, observe_request, request_queries, route_label
+from .core.query_log import QUERY_TIMING_HEADERS, server_timing
 from .modules.hr_management.routes import router as hr_router
+from .modules.payroll_analytics.routes import router as payroll_analytics_router
+from .modules.hr_management.sync_jobs import sync_job_manager
+from .modules.hr_management.search_index import employee_name_index
 
 # Load environment variables
 load_dotenv()
@@ -31,9 +41,87 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Profile-Lookups", "X-Profile-Lookups-Coalesced", "Server-Timing", "X-DB-Queries", "X-Search-Truncated"],
 )
 
 
+@app.middleware("http")
+async def dataloader_scope(request: Request, call_next):
+    """
+    Mỗi request một bộ DataLoaders (per-ID lookups được gộp thành batch queries)
+    Header X-<Loader>-Lookups / X-<Loader>-Lookups-Coalesced cho biết số lookups đã gộp
+    """
+    with request_scope() as loaders:
+        response = await call_next(request)
+    for name, loader in loaders.items():
+        response.headers[f"X-{name}-Lookups"] = str(loader.lookups)
+        response.headers[f"X-{name}-Lookups-Coalesced"] = str(loader.coalesced)
+    return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Latency theo route template (không theo path thật để giữ cardinality thấp)
+    và SQL time của request, cộng vào db_route_query_seconds_total
+    Pure ASGI (không phải BaseHTTPMiddleware) để đo tới message body cuối cùng:
+    SQL chạy trong lúc streaming response (/employees/stream, /sync/check/stream...) vẫn được tính
+    Header Server-Timing (SQL time + số statements mỗi database) và X-DB-Queries
+    được gắn lúc gửi headers, với streaming responses chỉ gồm SQL trước byte đầu tiên
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        observed = False
+
+        def observe():
+            nonlocal observed
+            if not observed:
+                observed = True
+                elapsed = time.perf_counter() - started
+                observe_request(scope["method"], route_label(scope), status, elapsed, queries)
+
+        async def send_observed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if QUERY_TIMING_HEADERS:
+                    headers = MutableHeaders(scope=message)
+                    elapsed = time.perf_counter() - started
+                    headers["Server-Timing"] = server_timing(queries.seconds, queries.queries, elapsed)
+                    headers["X-DB-Queries"] = str(queries.total)
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Trước background tasks của response
+                observe()
+            await send(message)
+
+        with request_queries(scope) as queries:
+            try:
+                await self.app(scope, receive, send_observed)
+            finally:
+                observe()
+
+
+app.add_middleware(RequestMetricsMiddleware)
+
+
+metrics.register_collector(db_manager.pool_metrics)
+
+
+@app.exception_handler(DatabaseUnavailable)
+async def database_unavailable_handler(request: Request, exc: DatabaseUnavailable):
+    """Circuit đang mở: trả 503 ngay thay vì chờ login/pool timeout"""
+    retry_after = max(int(min(circuit.probe_seconds for circuit in db_manager.circuits.values())), 1)
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(retry_after)})
+
+
 # ============================================================================
 # Startup và Shutdown Events
 # ============================================================================
@@ -43,18 +131,29 @@ async def startup_event():
     """Initialize database connections on startup"""
     print("🚀 Starting HR & Payroll Dashboard API...")
     db_manager.init_databases()
+    db_manager.start_health_checks()
     
     # Test connections
     if db_manager.test_connections():
         print("✅ All database connections ready")
     else:
         print("⚠️  Warning: Some database connections failed")
+    
+    # Build search index trước request đầu tiên (nếu lỗi sẽ build lazily khi search)
+    if db_manager.sql_server_available:
+        try:
+            with db_manager.get_hr_db() as hr_db:
+                employee_name_index.build(hr_db)
+        except Exception as e:
+            print(f"⚠️  Employee name index build failed: {e}")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("👋 Shutting down HR & Payroll Dashboard API...")
+    sync_job_manager.shutdown()
+    db_manager.shutdown()
 
 
 # ============================================================================
@@ -79,12 +178,25 @@ def health_check():
     return {
         "status": "healthy",
         "database": {
-            "sql_server": "connected" if db_manager.sql_server_engine else "disconnected",
-            "mysql": "connected" if db_manager.mysql_engine else "disconnected"
-        }
+            "sql_server": "connected" if db_manager.sql_server_available else "disconnected",
+            "mysql": "connected" if db_manager.mysql_available else "disconnected"
+        },
+        "circuits": {name: circuit.state for name, circuit in db_manager.circuits.items()}
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus text format: HTTP/SQL latency histograms, mock fallbacks, pool stats"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/health/pools")
+def pool_health():
+    """Connection pool statistics mỗi database (pool bão hòa -> saturated, timeouts tăng)"""
+    return db_manager.pool_stats()
+
+
 # ============================================================================
 # Include Routers
 # ============================================================================
@@ -92,6 +204,9 @@ def health_check():
 # HR Management Routes
 app.include_router(hr_router, prefix="/api")
 
+# Payroll Analytics Routes
+app.include_router(payroll_analytics_router, prefix="/api")
+
 
 if __name__ == "__main__":
     import uvicorn
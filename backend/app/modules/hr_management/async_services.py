@@ -0,0 +1,75 @@
+"""
+Async HR Services - Chạy HR (SQL Server) và Payroll (MySQL) reads song song
+Mỗi phía chạy trong worker thread với session riêng qua db_manager.run_hr/run_payroll,
+latency ≈ max(HR, Payroll) thay vì tổng.
+Profile lookups theo từng ID đi qua request-scoped DataLoader (core/dataloader.py)
+"""
+import asyncio
+import anyio
+from typing import Dict, List, Optional
+
+from ...database.connections import db_manager
+from ...core.dataloader import request_loader
+from .services import HRService
+from .sync_service import SyncService
+from .schemas import EmployeeBatchResponse, EmployeeDetail, OrgStructureResponse, SyncCheckResponse
+
+# Tên của profile loader trong request scope (header X-Profile-Lookups)
+PROFILE_LOADER = "Profile"
+
+
+class AsyncHRService:
+    """Async wrappers cho các services đọc cả 2 databases"""
+    
+    @staticmethod
+    async def get_unified_employee_profile(employee_id: int) -> Optional[EmployeeDetail]:
+        """
+        Unified profile qua request-scoped DataLoader: các lookups trong cùng request
+        được gộp thành một HR query và một payroll query (get_unified_employee_profiles)
+        """
+        return await request_loader(PROFILE_LOADER, AsyncHRService._load_profiles).load(employee_id)
+    
+    @staticmethod
+    async def _load_profiles(employee_ids: List[int]) -> Dict[int, EmployeeDetail]:
+        """Batch function của profile loader"""
+        batch = await AsyncHRService.get_unified_employee_profiles(employee_ids)
+        return {profile.EmployeeID: profile for profile in batch.Items}
+    
+    @staticmethod
+    async def get_unified_employee_profiles(employee_ids: List[int]) -> EmployeeBatchResponse:
+        """Batch profiles: chunked HR query và payroll IN query chạy đồng thời"""
+        unique_ids = list(dict.fromkeys(employee_ids))
+        employees, payroll_employees = await asyncio.gather(
+            db_manager.run_hr(HRService._load_employees, unique_ids),
+            db_manager.run_payroll(HRService._load_payroll_snapshot, unique_ids)
+        )
+        return HRService._to_batch_response(unique_ids, employees, payroll_employees)
+    
+    @staticmethod
+    async def get_organization_structure() -> OrgStructureResponse:
+        """Org structure: HR departments/employees và payroll snapshot query đồng thời"""
+        (departments, employees), payroll_employees = await asyncio.gather(
+            db_manager.run_hr(HRService._load_org_employees),
+            db_manager.run_payroll(HRService._load_payroll_snapshot)
+        )
+        # Grouping là CPU work, chạy ngoài event loop
+        return await anyio.to_thread.run_sync(
+            HRService._build_org_structure, departments, employees, payroll_employees
+        )
+    
+    @staticmethod
+    async def check_sync_needs(mode: str = "full") -> SyncCheckResponse:
+        """
+        Full check: load 2 phía đồng thời rồi so sánh
+        Incremental/merkle check đi từng bước giữa 2 databases nên chạy tuần tự trong 1 worker thread
+        """
+        if mode in ("incremental", "merkle"):
+            return await db_manager.run_hr_payroll(SyncService.check_sync_needs, mode=mode)
+        
+        hr_side, payroll_side = await asyncio.gather(
+            db_manager.run_hr(SyncService._load_hr_side),
+            db_manager.run_payroll(SyncService._load_payroll_side)
+        )
+        return await anyio.to_thread.run_sync(
+            SyncService._finish_full_check, hr_side, payroll_side
+        )
@@ -0,0 +1,293 @@
+"""
+In-process Caches cho HR Management
+PayrollSnapshotCache: employees_payroll (ID -> DepartmentID/PositionID/Status/FullName)
+Bảng này chỉ thay đổi qua SyncService.execute_sync nên cache được patch write-through,
+TTL chỉ là lưới an toàn cho thay đổi từ bên ngoài
+ReferenceDataCache: ID -> Name của Departments/Positions (HR và Payroll),
+refresh khi version probe (MAX timestamp, COUNT) thay đổi
+expect(version): routes có ETag báo version vừa probe để caches không cũ hơn ETag
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from datetime import datetime
+import os
+import threading
+import time
+
+from ...database.models_hr import Department, Position
+from ...database.models_payroll import EmployeePayroll, DepartmentPayroll, PositionPayroll
+from ...database.query_utils import chunked
+
+
+class PayrollSnapshot(NamedTuple):
+    """Các cột của employees_payroll cần cho so sánh sync"""
+    EmployeeID: int
+    FullName: str
+    DepartmentID: Optional[int]
+    PositionID: Optional[int]
+    Status: Optional[str]
+    SyncedAt: Optional[datetime]
+
+
+def load_payroll_rows(
+    payroll_db: Session,
+    employee_ids: Optional[List[int]] = None
+) -> Dict[int, PayrollSnapshot]:
+    """Đọc trực tiếp từ MySQL: toàn bộ bảng hoặc chunked IN (...)"""
+    query = payroll_db.query(
+        EmployeePayroll.EmployeeID,
+        EmployeePayroll.FullName,
+        EmployeePayroll.DepartmentID,
+        EmployeePayroll.PositionID,
+        EmployeePayroll.Status,
+        EmployeePayroll.SyncedAt
+    )
+
+    if employee_ids is None:
+        return {row.EmployeeID: PayrollSnapshot(*row) for row in query}
+
+    rows = {}
+    for id_chunk in chunked(employee_ids):
+        rows.update(
+            (row.EmployeeID, PayrollSnapshot(*row))
+            for row in query.filter(EmployeePayroll.EmployeeID.in_(id_chunk))
+        )
+    return rows
+
+
+class PayrollSnapshotCache:
+    """
+    Snapshot employees_payroll trong memory với TTL
+    Full reads (org structure, sync check) nạp lại cả bảng khi hết hạn;
+    paged reads lúc cache nguội chỉ query IDs cần thiết
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._rows: Optional[Dict[int, PayrollSnapshot]] = None
+        self._loaded_at = 0.0
+        # Tăng mỗi lần patch/invalidate để reload đang chạy không ghi đè dữ liệu mới hơn
+        self._generation = 0
+        # (MAX SyncedAt, COUNT) đã probe cho ETag mà snapshot mới ít nhất bằng
+        self._version: Optional[Tuple] = None
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.patches = 0
+        self.invalidations = 0
+
+    def _fresh(self) -> bool:
+        return (
+            self._rows is not None
+            and time.monotonic() - self._loaded_at < self.ttl_seconds
+        )
+
+    def get(
+        self,
+        payroll_db: Session,
+        employee_ids: Optional[List[int]] = None
+    ) -> Dict[int, PayrollSnapshot]:
+        """
+        Trả về snapshot (read-only) cho toàn bộ bảng hoặc cho employee_ids
+        """
+        with self._lock:
+            rows = self._rows if self._fresh() else None
+            if rows is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if rows is None:
+            if employee_ids is not None:
+                return load_payroll_rows(payroll_db, employee_ids)
+            rows = self.reload(payroll_db)
+
+        if employee_ids is None:
+            return rows
+        return {emp_id: rows[emp_id] for emp_id in employee_ids if emp_id in rows}
+
+    def reload(self, payroll_db: Session) -> Dict[int, PayrollSnapshot]:
+        """Nạp lại toàn bộ employees_payroll"""
+        with self._lock:
+            generation = self._generation
+        rows = load_payroll_rows(payroll_db)
+        with self._lock:
+            if generation == self._generation:
+                self._rows = rows
+                self._loaded_at = time.monotonic()
+                self.loads += 1
+        return rows
+
+    def expect(self, version: Tuple):
+        """
+        Version vừa probe cho ETag: khác version của snapshot thì bỏ snapshot,
+        get() sau đó nạp lại sau probe nên body không cũ hơn ETag
+        """
+        with self._lock:
+            if version == self._version:
+                return
+            self._version = version
+            self._generation += 1
+            if self._rows is not None:
+                self._rows = None
+                self.invalidations += 1
+
+    def patch(self, rows: Iterable[PayrollSnapshot]):
+        """Write-through sau khi execute_sync commit (copy-on-write để readers không bị ảnh hưởng)"""
+        with self._lock:
+            self._generation += 1
+            self._version = None
+            if self._rows is None:
+                return
+            updated = dict(self._rows)
+            updated.update((row.EmployeeID, row) for row in rows)
+            self._rows = updated
+            self.patches += 1
+
+    def invalidate(self):
+        """Bỏ snapshot, lần đọc sau sẽ nạp lại từ MySQL"""
+        with self._lock:
+            self._generation += 1
+            self._version = None
+            self._rows = None
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters cho /hr/cache/stats"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "TTLSeconds": self.ttl_seconds,
+                "Size": len(self._rows) if self._rows is not None else 0,
+                "AgeSeconds": round(time.monotonic() - self._loaded_at, 3) if self._rows is not None else None,
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "HitRate": round(self.hits / lookups, 4) if lookups else None,
+                "Loads": self.loads,
+                "Patches": self.patches,
+                "Invalidations": self.invalidations,
+            }
+
+
+class ReferenceTable:
+    """
+    Cache ID -> Name của một bảng reference nhỏ
+    Probe (MAX(version_column), COUNT(*)) tối đa mỗi probe_seconds,
+    chỉ reload cả bảng khi version thay đổi
+    """
+
+    def __init__(self, id_column, name_column, version_column, probe_seconds: float):
+        self.id_column = id_column
+        self.name_column = name_column
+        self.version_column = version_column
+        self.probe_seconds = probe_seconds
+        self._lock = threading.Lock()
+        self._names: Optional[Dict[int, str]] = None
+        self._version: Optional[Tuple] = None
+        self._probed_at = 0.0
+        self.hits = 0
+        self.probes = 0
+        self.reloads = 0
+
+    def names(self, db: Session) -> Dict[int, str]:
+        """ID -> Name (read-only dict)"""
+        with self._lock:
+            names = self._names
+            if names is not None and time.monotonic() - self._probed_at < self.probe_seconds:
+                self.hits += 1
+                return names
+
+        version = tuple(db.query(func.max(self.version_column), func.count(self.id_column)).one())
+        with self._lock:
+            self.probes += 1
+            self._probed_at = time.monotonic()
+            if self._names is not None and version == self._version:
+                return self._names
+
+        names = dict(db.query(self.id_column, self.name_column).all())
+        with self._lock:
+            self._names = names
+            self._version = version
+            self.reloads += 1
+        return names
+
+    def expect(self, version: Tuple):
+        """Version vừa probe cho ETag: khác version đang cache thì names() tiếp theo probe lại ngay"""
+        with self._lock:
+            if version != self._version:
+                self._probed_at = 0.0
+
+    def add(self, entity_id: int, name: str):
+        """Write-through khi sync insert một row mới (copy-on-write)"""
+        with self._lock:
+            if self._names is None:
+                return
+            updated = dict(self._names)
+            updated[entity_id] = name
+            self._names = updated
+
+    def invalidate(self):
+        """Bỏ cache, lần đọc sau sẽ probe và reload"""
+        with self._lock:
+            self._names = None
+            self._version = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "Size": len(self._names) if self._names is not None else 0,
+                "Version": [str(part) for part in self._version] if self._version else None,
+                "Hits": self.hits,
+                "Probes": self.probes,
+                "Reloads": self.reloads,
+            }
+
+
+class ReferenceDataCache:
+    """Departments/Positions của cả HR (UpdatedAt) và Payroll (SyncedAt)"""
+
+    def __init__(self, probe_seconds: float):
+        self.departments = ReferenceTable(
+            Department.DepartmentID, Department.DepartmentName, Department.UpdatedAt, probe_seconds
+        )
+        self.positions = ReferenceTable(
+            Position.PositionID, Position.PositionName, Position.UpdatedAt, probe_seconds
+        )
+        self.payroll_departments = ReferenceTable(
+            DepartmentPayroll.DepartmentID, DepartmentPayroll.DepartmentName,
+            DepartmentPayroll.SyncedAt, probe_seconds
+        )
+        self.payroll_positions = ReferenceTable(
+            PositionPayroll.PositionID, PositionPayroll.PositionName,
+            PositionPayroll.SyncedAt, probe_seconds
+        )
+
+    def invalidate(self):
+        """Bỏ toàn bộ reference data"""
+        self.departments.invalidate()
+        self.positions.invalidate()
+        self.invalidate_payroll()
+
+    def invalidate_payroll(self):
+        """Gọi khi sync rollback để bỏ các rows đã add nhưng chưa commit"""
+        self.payroll_departments.invalidate()
+        self.payroll_positions.invalidate()
+
+    def stats(self) -> dict:
+        return {
+            "Departments": self.departments.stats(),
+            "Positions": self.positions.stats(),
+            "PayrollDepartments": self.payroll_departments.stats(),
+            "PayrollPositions": self.payroll_positions.stats(),
+        }
+
+
+payroll_snapshot_cache = PayrollSnapshotCache(
+    ttl_seconds=float(os.getenv("PAYROLL_CACHE_TTL_SECONDS", "60"))
+)
+
+reference_cache = ReferenceDataCache(
+    probe_seconds=float(os.getenv("REFERENCE_CACHE_PROBE_SECONDS", "5"))
+)
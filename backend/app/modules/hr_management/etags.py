@@ -0,0 +1,82 @@
+"""
+ETags cho HR read endpoints
+ETag được tính từ data-version probes rẻ (MAX timestamp, COUNT) thay vì từ payload,
+nên If-None-Match khớp thì trả về 304 mà không chạy main queries
+Body dựng từ caches nên caches được revalidate theo cùng versions (expect_versions)
+"""
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from typing import Optional, Tuple
+import hashlib
+import json
+
+from ...database.models_hr import Employee, Department, Position, Dividend
+from ...database.models_payroll import EmployeePayroll
+from .caches import payroll_snapshot_cache, reference_cache
+from .search_index import employee_name_index
+
+
+class DataVersions:
+    """Mỗi probe là một statement duy nhất gồm các scalar subqueries"""
+
+    @staticmethod
+    def hr(hr_db: Session, include_dividends: bool = False) -> Tuple:
+        """Employees + Departments + Positions (và Dividends nếu cần)"""
+        probes = [
+            select(func.max(Employee.UpdatedAt)).scalar_subquery(),
+            select(func.count(Employee.EmployeeID)).scalar_subquery(),
+            select(func.max(Department.UpdatedAt)).scalar_subquery(),
+            select(func.count(Department.DepartmentID)).scalar_subquery(),
+            select(func.max(Position.UpdatedAt)).scalar_subquery(),
+            select(func.count(Position.PositionID)).scalar_subquery(),
+        ]
+        if include_dividends:
+            # Dividends không có UpdatedAt, SUM bắt được thay đổi DividendAmount
+            probes.extend([
+                select(func.count(Dividend.DividendID)).scalar_subquery(),
+                select(func.max(Dividend.DividendID)).scalar_subquery(),
+                select(func.sum(Dividend.DividendAmount)).scalar_subquery(),
+            ])
+        return tuple(hr_db.execute(select(*probes)).one())
+
+    @staticmethod
+    def payroll(payroll_db: Session) -> Tuple:
+        """employees_payroll quyết định SyncStatus"""
+        return tuple(payroll_db.query(
+            func.max(EmployeePayroll.SyncedAt),
+            func.count(EmployeePayroll.EmployeeID)
+        ).one())
+
+
+def expect_versions(hr_version: Tuple, payroll_version: Optional[Tuple] = None):
+    """
+    Báo cho caches versions vừa probe: cache nào cũ hơn sẽ probe/nạp lại trước khi dựng body,
+    nên body không bao giờ cũ hơn ETag tính từ cùng versions
+    hr_version theo thứ tự của DataVersions.hr: Employees, Departments, Positions
+    """
+    employee_name_index.expect(hr_version[0:2])
+    reference_cache.departments.expect(hr_version[2:4])
+    reference_cache.positions.expect(hr_version[4:6])
+    if payroll_version is not None:
+        payroll_snapshot_cache.expect(payroll_version)
+
+
+def make_etag(scope: str, params, *versions) -> str:
+    """Strong ETag từ path + query params + data versions"""
+    payload = json.dumps([scope, params, versions], default=str, sort_keys=True)
+    return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match có thể là "*" hoặc danh sách ETags (weak comparison theo RFC 9110)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,213 @@
+"""
+Merkle Reconciliation - So sánh HR và Payroll mà không kéo toàn bộ rows qua network
+Employees được chia bucket theo khoảng EmployeeID; mỗi database tự tính fingerprint
+(COUNT, SUM(hash32)) của từng bucket bằng SQL, chỉ đi xuống các bucket lệch nhau
+(anti-entropy kiểu Dynamo/Cassandra). Ở leaf buckets lệch chỉ đọc (EmployeeID, hash32),
+rows đầy đủ chỉ được đọc cho các IDs có hash khác nhau
+
+Row hash = 4 byte đầu của SHA-256 trên chuỗi UTF-8
+"EmployeeID|FullName|DepartmentID|PositionID|Status" (NULL -> chuỗi rỗng)
+SQL Server: HASHBYTES('SHA2_256') qua collation UTF-8 (SQL Server 2019+)
+MySQL: SHA2(..., 256) trên cột utf8mb4
+"""
+from sqlalchemy import Integer, BigInteger, cast, collate, func, literal_column, or_
+from sqlalchemy.dialects.mssql import BINARY, VARCHAR
+from sqlalchemy.orm import Session
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import os
+
+from ...database.models_hr import Employee
+from ...database.models_payroll import EmployeePayroll
+from ...database.query_utils import MAX_IN_PARAMS, UnsupportedDialect, chunked
+
+HASH_SEPARATOR = "|"
+MSSQL_UTF8_COLLATION = "Latin1_General_100_CI_AS_SC_UTF8"
+SQLITE_HASH_FUNCTION = "merkle_row_hash"
+# Dialects có hash_expression; dialect khác thì sync check dùng full mode
+MERKLE_DIALECTS = ("mssql", "mysql", "sqlite")
+
+# Mỗi range dùng 2 parameters (BETWEEN)
+RANGES_PER_STATEMENT = MAX_IN_PARAMS // 2
+
+IdRange = Tuple[int, int]
+Fingerprint = Tuple[int, int]
+
+
+def row_hash32(*values) -> int:
+    """Python reference của row hash, dùng cho SQLite và để kiểm tra 2 dialects khớp nhau"""
+    payload = HASH_SEPARATOR.join("" if value is None else str(value) for value in values)
+    return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:4], "big")
+
+
+class MerkleDiff(NamedTuple):
+    """Kết quả reconciliation: rows có hash lệch ở cả 2 phía"""
+    TotalEmployees: int
+    HRRows: List
+    PayrollRows: Dict[int, object]
+    Stats: Dict[str, int]
+
+
+class MerkleSide:
+    """Một phía của reconciliation (bảng employees của HR hoặc Payroll)"""
+
+    def __init__(self, model):
+        self.model = model
+        self.id_column = model.EmployeeID
+        self.columns = (
+            model.EmployeeID, model.FullName, model.DepartmentID, model.PositionID, model.Status
+        )
+
+    def hash_expression(self, db: Session):
+        """Biểu thức SQL tính hash32 của một row theo dialect của session"""
+        bind = db.get_bind()
+        dialect = bind.dialect.name
+        if dialect == "mssql":
+            parts = []
+            for column in self.columns:
+                # CONCAT coi NULL là chuỗi rỗng và tự convert số
+                parts.extend([column, literal_column("'|'")])
+            text_value = cast(
+                collate(func.concat(*parts[:-1]), MSSQL_UTF8_COLLATION), VARCHAR(4000)
+            )
+            digest = func.HASHBYTES(literal_column("'SHA2_256'"), text_value)
+            return cast(cast(digest, BINARY(4)), BigInteger)
+        if dialect == "mysql":
+            parts = []
+            for column in self.columns:
+                # CONCAT của MySQL trả về NULL nếu có NULL
+                parts.extend([func.coalesce(column, ""), HASH_SEPARATOR])
+            digest = func.sha2(func.concat(*parts[:-1]), 256)
+            return cast(func.conv(func.left(digest, 8), 16, 10), Integer)
+        if dialect == "sqlite":
+            db.connection().connection.driver_connection.create_function(
+                SQLITE_HASH_FUNCTION, len(self.columns), row_hash32, deterministic=True
+            )
+            return getattr(func, SQLITE_HASH_FUNCTION)(*self.columns)
+        raise UnsupportedDialect("Merkle reconciliation", dialect)
+
+    def in_ranges(self, ranges: List[IdRange]):
+        """EmployeeID BETWEEN ... OR ... cho danh sách ranges"""
+        return or_(*(self.id_column.between(start, end) for start, end in ranges))
+
+
+class MerkleReconciler:
+    """
+    Bucket tree với fanout cố định: leaf width = leaf_size IDs,
+    mỗi level phía trên rộng gấp fanout lần nên bucket con luôn nằm gọn trong bucket cha
+    """
+
+    def __init__(self, fanout: int, leaf_size: int):
+        self.fanout = max(fanout, 2)
+        self.leaf_size = max(leaf_size, 1)
+        self.hr = MerkleSide(Employee)
+        self.payroll = MerkleSide(EmployeePayroll)
+
+    @staticmethod
+    def supports(*dbs: Session) -> bool:
+        """True nếu mọi session đều thuộc dialect có hash_expression"""
+        return all(db.get_bind().dialect.name in MERKLE_DIALECTS for db in dbs)
+
+    def diff(self, hr_db: Session, payroll_db: Session) -> MerkleDiff:
+        """Tìm các rows lệch giữa 2 phía và trả về các cột sync của chúng"""
+        stats = {"Levels": 0, "Queries": 0, "BucketRows": 0, "HashRows": 0, "LeafRows": 0}
+
+        hr_root = self._root(hr_db, self.hr, stats)
+        payroll_root = self._root(payroll_db, self.payroll, stats)
+        total_employees = hr_root[2]
+        if hr_root[2:] == payroll_root[2:]:
+            return MerkleDiff(total_employees, [], {}, stats)
+
+        bounds = [value for value in (hr_root[0], hr_root[1], payroll_root[0], payroll_root[1]) if value is not None]
+        low, high = min(bounds), max(bounds)
+
+        width = self.leaf_size
+        while width < high - low + 1:
+            width *= self.fanout
+
+        ranges = [(low, low + width - 1)]
+        while ranges and width > self.leaf_size:
+            width //= self.fanout
+            stats["Levels"] += 1
+            hr_buckets = self._buckets(hr_db, self.hr, ranges, low, width, stats)
+            payroll_buckets = self._buckets(payroll_db, self.payroll, ranges, low, width, stats)
+            ranges = [
+                (low + bucket * width, low + (bucket + 1) * width - 1)
+                for bucket in sorted(hr_buckets.keys() | payroll_buckets.keys())
+                if hr_buckets.get(bucket) != payroll_buckets.get(bucket)
+            ]
+
+        hr_hashes = self._row_hashes(hr_db, self.hr, ranges, stats)
+        payroll_hashes = self._row_hashes(payroll_db, self.payroll, ranges, stats)
+        drifted_ids = sorted(
+            emp_id for emp_id in hr_hashes.keys() | payroll_hashes.keys()
+            if hr_hashes.get(emp_id) != payroll_hashes.get(emp_id)
+        )
+
+        hr_rows = self._rows(hr_db, self.hr, drifted_ids, stats)
+        payroll_rows = {row.EmployeeID: row for row in self._rows(payroll_db, self.payroll, drifted_ids, stats)}
+        return MerkleDiff(total_employees, hr_rows, payroll_rows, stats)
+
+    def _root(self, db: Session, side: MerkleSide, stats) -> Tuple[Optional[int], Optional[int], int, int]:
+        """MIN/MAX EmployeeID và fingerprint của cả bảng"""
+        low, high, count, hash_sum = db.query(
+            func.min(side.id_column),
+            func.max(side.id_column),
+            func.count(side.id_column),
+            func.sum(side.hash_expression(db))
+        ).one()
+        stats["Queries"] += 1
+        return low, high, count or 0, int(hash_sum or 0)
+
+    def _buckets(
+        self,
+        db: Session,
+        side: MerkleSide,
+        ranges: List[IdRange],
+        low: int,
+        width: int,
+        stats
+    ) -> Dict[int, Fingerprint]:
+        """Fingerprint (COUNT, SUM(hash32)) của các bucket con nằm trong ranges"""
+        # Literal thay vì bind params để SELECT và GROUP BY render cùng một biểu thức (SQL Server)
+        bucket = (
+            (side.id_column - literal_column(str(int(low)), Integer))
+            // literal_column(str(int(width)), Integer)
+        )
+        hash_value = side.hash_expression(db)
+        buckets = {}
+        for range_chunk in chunked(ranges, RANGES_PER_STATEMENT):
+            rows = db.query(bucket, func.count(side.id_column), func.sum(hash_value)).filter(
+                side.in_ranges(range_chunk)
+            ).group_by(bucket).all()
+            stats["Queries"] += 1
+            stats["BucketRows"] += len(rows)
+            buckets.update((int(index), (count, int(hash_sum or 0))) for index, count, hash_sum in rows)
+        return buckets
+
+    def _row_hashes(self, db: Session, side: MerkleSide, ranges: List[IdRange], stats) -> Dict[int, int]:
+        """EmployeeID -> hash32 của rows trong leaf buckets lệch"""
+        hash_value = side.hash_expression(db)
+        hashes = {}
+        for range_chunk in chunked(ranges, RANGES_PER_STATEMENT):
+            rows = db.query(side.id_column, hash_value).filter(side.in_ranges(range_chunk)).all()
+            stats["Queries"] += 1
+            stats["HashRows"] += len(rows)
+            hashes.update((emp_id, int(row_hash)) for emp_id, row_hash in rows)
+        return hashes
+
+    def _rows(self, db: Session, side: MerkleSide, employee_ids: List[int], stats) -> List:
+        """Các cột cần cho so sánh sync của rows có hash lệch"""
+        rows = []
+        for id_chunk in chunked(employee_ids):
+            chunk_rows = db.query(*side.columns).filter(side.id_column.in_(id_chunk)).all()
+            stats["Queries"] += 1
+            stats["LeafRows"] += len(chunk_rows)
+            rows.extend(chunk_rows)
+        return rows
+
+
+merkle_reconciler = MerkleReconciler(
+    fanout=int(os.getenv("MERKLE_FANOUT", "16")),
+    leaf_size=int(os.getenv("MERKLE_LEAF_SIZE", "32"))
+)
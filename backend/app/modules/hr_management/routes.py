@@ -2,68 +2,217 @@
 API Routes for HR Management Module
 Endpoints: /employees, /org-structure, /sync, /dividends
 """
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Dict, Iterable, Iterator, List, Optional, Literal, Tuple
+from datetime import date
+import asyncio
+import itertools
 
 from ...database.connections import db_manager
 from ...core.mock_data import mock_service
+from ...core.metrics import record_mock_fallback
+from ...core.fast_json import fast_json
 from .services import HRService
+from .async_services import AsyncHRService
+from .caches import payroll_snapshot_cache, reference_cache
+from .search_index import employee_name_index
 from .sync_service import SyncService
+from .sync_jobs import SyncJobQueueFull, sync_job_manager
+from .sync_events import sync_event_broadcaster
+from .etags import DataVersions, etag_matches, expect_versions, make_etag
 from .schemas import (
-    EmployeeDetail, EmployeeListItem, DepartmentSchema, DividendSchema,
-    SyncCheckResponse, SyncExecuteRequest, SyncExecuteResponse,
-    OrgStructureResponse
+    EmployeeDetail, EmployeeBatchRequest, EmployeeBatchResponse, EmployeePage,
+    EmployeeSuggestion, DepartmentSchema,
+    DividendPage, DividendRollup,
+    SyncCheckResponse, SyncCheckSummary, SyncExecuteRequest, SyncExecuteResponse,
+    SyncJobStatus, OrgStructureResponse
 )
 
 router = APIRouter(prefix="/hr", tags=["HR Management"])
 
+# Gom NDJSON lines thành chunk ~64KB trước khi gửi
+NDJSON_CHUNK_BYTES = 64 * 1024
+
+
+def _ndjson(items: Iterable[BaseModel]) -> Iterator[bytes]:
+    """Serialize từng model thành một dòng JSON, flush theo chunk"""
+    buffer = bytearray()
+    for item in items:
+        buffer += item.model_dump_json().encode("utf-8")
+        buffer += b"\n"
+        if len(buffer) >= NDJSON_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _ndjson_response(items: Iterable[BaseModel]) -> StreamingResponse:
+    """
+    Chạy items tới phần tử đầu tiên trước khi trả về response: lỗi mở session hoặc query
+    (DatabaseUnavailable -> 503) raise trong route thay vì thành body 200 bị cắt
+    """
+    items = iter(items)
+    first = next(items, None)
+    if first is not None:
+        items = itertools.chain((first,), items)
+    return StreamingResponse(_ndjson(items), media_type="application/x-ndjson")
+
+
+def _etag(
+    request: Request,
+    hr_version: Tuple,
+    payroll_version: Optional[Tuple] = None
+) -> Tuple[Dict[str, str], Optional[Response]]:
+    """
+    ETag (từ path, query params và data versions) + 304 nếu If-None-Match khớp
+    để route bỏ qua main queries. Caches được revalidate theo cùng versions
+    Headers chỉ được gắn vào body thành công qua _tagged(), không bao giờ vào mock fallback
+    """
+    versions = (hr_version,) if payroll_version is None else (hr_version, payroll_version)
+    etag = make_etag(request.url.path, sorted(request.query_params.multi_items()), *versions)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return headers, Response(status_code=304, headers=headers)
+    expect_versions(hr_version, payroll_version)
+    return headers, None
+
+
+def _tagged(content, response: Response, headers: Dict[str, str]):
+    """Body đã dựng xong: gắn ETag (response cũng nhận headers khi tắt FAST_JSON_RESPONSES)"""
+    response.headers.update(headers)
+    return fast_json(content, headers=headers)
+
 
 # ============================================================================
 # Employee Endpoints
 # ============================================================================
 
-@router.get("/employees", response_model=List[EmployeeListItem])
+@router.get("/employees", response_model=EmployeePage)
 def list_employees(
+    request: Request,
+    response: Response,
     department_id: Optional[int] = Query(None, description="Filter by DepartmentID"),
-    search: Optional[str] = Query(None, description="Search by employee name")
+    search: Optional[str] = Query(None, description="Search by employee name (không phân biệt dấu, fuzzy khi gõ sai)"),
+    limit: int = Query(100, ge=1, le=500, description="Page size"),
+    cursor: Optional[str] = Query(None, description="NextCursor từ page trước"),
+    sort_by: Literal["EmployeeID", "FullName", "HireDate"] = Query("EmployeeID", description="Sort key"),
+    sort_order: Literal["asc", "desc"] = Query("asc", description="Sort order")
 ):
     """
-    List all employees với sync status
+    List employees với sync status (keyset pagination)
     Supports filtering by department và search by name
     """
     # Fallback to mock data if databases unavailable
     if not db_manager.sql_server_available or not db_manager.mysql_available:
         print("⚠️  Using mock data for employees (databases unavailable)")
-        return mock_service.get_mock_employees()
+        record_mock_fallback("list_employees", "unavailable")
+        return mock_service.get_mock_employee_page(limit, sort_by, sort_order)
     
     try:
         with db_manager.get_hr_db() as hr_db, db_manager.get_payroll_db() as payroll_db:
-            employees = HRService.list_employees_with_sync_status(
+            headers, not_modified = _etag(request, DataVersions.hr(hr_db), DataVersions.payroll(payroll_db))
+            if not_modified:
+                return not_modified
+            
+            page = HRService.list_employees_page(
+                hr_db, payroll_db,
+                department_id=department_id,
+                search_name=search,
+                limit=limit,
+                cursor=cursor,
+                sort_by=sort_by,
+                sort_order=sort_order
+            )
+            return _tagged(page, response, headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"⚠️  Database error, falling back to mock data: {e}")
+        record_mock_fallback("list_employees", "error")
+        return mock_service.get_mock_employee_page(limit, sort_by, sort_order)
+
+
+@router.get("/employees/stream")
+def stream_employees(
+    department_id: Optional[int] = Query(None, description="Filter by DepartmentID"),
+    search: Optional[str] = Query(None, description="Search by employee name (không phân biệt dấu, fuzzy khi gõ sai)")
+):
+    """
+    Stream toàn bộ employees với sync status dưới dạng NDJSON
+    Mỗi dòng là một EmployeeListItem, memory không phụ thuộc số rows
+    """
+    if not db_manager.sql_server_available or not db_manager.mysql_available:
+        print("⚠️  Using mock data for employee stream (databases unavailable)")
+        record_mock_fallback("stream_employees", "unavailable")
+        return _ndjson_response(mock_service.get_mock_employees())
+    
+    truncated = False
+    
+    def generate():
+        nonlocal truncated
+        with db_manager.get_hr_db() as hr_db, db_manager.get_payroll_db() as payroll_db:
+            if search:
+                truncated = HRService.search_truncated(hr_db, search, department_id)
+            yield from HRService.iter_employees_with_sync_status(
                 hr_db, payroll_db,
                 department_id=department_id,
                 search_name=search
             )
-            return employees
+    
+    # _ndjson_response chạy generate() tới phần tử đầu tiên nên truncated đã có trước khi gửi headers
+    response = _ndjson_response(generate())
+    if truncated:
+        response.headers["X-Search-Truncated"] = "true"
+    return response
+
+
+@router.get("/employees/suggest", response_model=List[EmployeeSuggestion])
+def suggest_employees(
+    q: str = Query(..., min_length=1, description="Prefix của tên (không phân biệt dấu) hoặc EmployeeID"),
+    limit: int = Query(10, ge=1, le=50, description="Số gợi ý tối đa")
+):
+    """
+    Type-ahead cho ô tìm kiếm: prefix match trên tên đã bỏ dấu, đầu từng từ và EmployeeID
+    Đăng ký trước /employees/{employee_id} để "suggest" không bị parse thành ID
+    """
+    if not db_manager.sql_server_available:
+        print("⚠️  Using mock data for employee suggestions (database unavailable)")
+        record_mock_fallback("suggest_employees", "unavailable")
+        return mock_service.get_mock_suggestions(q, limit)
+    
+    try:
+        with db_manager.get_hr_db() as hr_db:
+            return fast_json(HRService.suggest_employees(hr_db, q, limit))
     except Exception as e:
         print(f"⚠️  Database error, falling back to mock data: {e}")
-        return mock_service.get_mock_employees()
+        record_mock_fallback("suggest_employees", "error")
+        return mock_service.get_mock_suggestions(q, limit)
+
+
+@router.post("/employees/batch", response_model=EmployeeBatchResponse)
+async def get_employee_details_batch(request: EmployeeBatchRequest):
+    """
+    Unified profiles của nhiều employees trong một request (comparison views)
+    Một HR query chia chunk theo giới hạn 2100 parameters của SQL Server và một payroll IN query
+    """
+    return fast_json(await AsyncHRService.get_unified_employee_profiles(request.EmployeeIDs))
 
 
 @router.get("/employees/{employee_id}", response_model=EmployeeDetail)
-def get_employee_detail(employee_id: int):
+async def get_employee_detail(employee_id: int):
     """Get detailed employee profile với unified data từ HR và Payroll"""
-    with db_manager.get_hr_db() as hr_db, db_manager.get_payroll_db() as payroll_db:
-        employee = HRService.get_unified_employee_profile(
-            hr_db, payroll_db, employee_id
+    employee = await AsyncHRService.get_unified_employee_profile(employee_id)
+    
+    if not employee:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Employee with ID {employee_id} not found"
         )
-        
-        if not employee:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Employee with ID {employee_id} not found"
-            )
-        
-        return employee
+    
+    return employee
 
 
 # ============================================================================
@@ -71,27 +220,59 @@ def get_employee_detail(employee_id: int):
 # ============================================================================
 
 @router.get("/org-structure", response_model=OrgStructureResponse)
-def get_organization_structure():
+async def get_organization_structure(request: Request, response: Response):
     """Get organization structure với employees grouped by department"""
-    with db_manager.get_hr_db() as hr_db, db_manager.get_payroll_db() as payroll_db:
-        org_structure = HRService.get_organization_structure(hr_db, payroll_db)
-        return org_structure
+    hr_version, payroll_version = await asyncio.gather(
+        db_manager.run_hr(DataVersions.hr),
+        db_manager.run_payroll(DataVersions.payroll)
+    )
+    headers, not_modified = _etag(request, hr_version, payroll_version)
+    if not_modified:
+        return not_modified
+    
+    org_structure = await AsyncHRService.get_organization_structure()
+    return _tagged(org_structure, response, headers)
 
 
 @router.get("/departments", response_model=List[DepartmentSchema])
-def list_departments():
+def list_departments(
+    request: Request,
+    response: Response,
+    include_status_counts: bool = Query(False, description="Thêm số employees theo Status"),
+    include_sync_counts: bool = Query(False, description="Thêm số employees theo SyncStatus")
+):
     """Get all departments với employee count"""
     # Fallback to mock data if database unavailable
     if not db_manager.sql_server_available:
         print("⚠️  Using mock data for departments (SQL Server unavailable)")
+        record_mock_fallback("list_departments", "unavailable")
         return mock_service.get_mock_departments()
     
     try:
         with db_manager.get_hr_db() as hr_db:
-            departments = HRService.get_departments(hr_db)
-            return departments
+            if include_sync_counts and db_manager.mysql_available:
+                with db_manager.get_payroll_db() as payroll_db:
+                    headers, not_modified = _etag(
+                        request, DataVersions.hr(hr_db), DataVersions.payroll(payroll_db)
+                    )
+                    if not_modified:
+                        return not_modified
+                    departments = HRService.get_departments(
+                        hr_db, payroll_db,
+                        include_status_counts=include_status_counts,
+                        include_sync_counts=True
+                    )
+                    return _tagged(departments, response, headers)
+            headers, not_modified = _etag(request, DataVersions.hr(hr_db))
+            if not_modified:
+                return not_modified
+            departments = HRService.get_departments(
+                hr_db, include_status_counts=include_status_counts
+            )
+            return _tagged(departments, response, headers)
     except Exception as e:
         print(f"⚠️  Database error, falling back to mock data: {e}")
+        record_mock_fallback("list_departments", "error")
         return mock_service.get_mock_departments()
 
 
@@ -100,7 +281,15 @@ def list_departments():
 # ============================================================================
 
 @router.post("/sync/check", response_model=SyncCheckResponse)
-def check_sync_status():
+async def check_sync_status(
+    mode: Literal["full", "incremental", "merkle"] = Query(
+        "full",
+        description=(
+            "full: so sánh toàn bộ; incremental: chỉ rows đổi từ lần check trước; "
+            "merkle: so sánh hash theo bucket EmployeeID, chỉ đọc rows của bucket lệch"
+        )
+    )
+):
     """
     Check sync status giữa HR và Payroll databases
     Trả về danh sách employees cần sync
@@ -108,19 +297,62 @@ def check_sync_status():
     # Fallback to mock data if databases unavailable
     if not db_manager.sql_server_available or not db_manager.mysql_available:
         print("⚠️  Using mock data for sync check (databases unavailable)")
+        record_mock_fallback("check_sync_status", "unavailable")
         return mock_service.get_mock_sync_status()
     
     try:
-        with db_manager.get_hr_db() as hr_db, db_manager.get_payroll_db() as payroll_db:
-            sync_check = SyncService.check_sync_needs(hr_db, payroll_db)
-            return sync_check
+        sync_check = await AsyncHRService.check_sync_needs(mode=mode)
+        return fast_json(sync_check)
     except Exception as e:
         print(f"⚠️  Database error, falling back to mock data: {e}")
+        record_mock_fallback("check_sync_status", "error")
         return mock_service.get_mock_sync_status()
 
 
+@router.post("/sync/check/stream")
+def stream_sync_status():
+    """
+    Stream full sync check dưới dạng NDJSON
+    Mỗi dòng là một SyncNeed, dòng cuối là SyncCheckSummary
+    """
+    if not db_manager.sql_server_available or not db_manager.mysql_available:
+        print("⚠️  Using mock data for sync check stream (databases unavailable)")
+        record_mock_fallback("stream_sync_status", "unavailable")
+        mock_status = mock_service.get_mock_sync_status()
+        return _ndjson_response(mock_status.SyncNeeds + [SyncCheckSummary(
+            TotalEmployees=mock_status.TotalEmployees,
+            NeedSync=mock_status.NeedSync,
+            AlreadySynced=mock_status.AlreadySynced,
+            CheckedAt=mock_status.CheckedAt
+        )])
+    
+    def generate():
+        with db_manager.get_hr_db() as hr_db, db_manager.get_payroll_db() as payroll_db:
+            yield from SyncService.iter_sync_needs(hr_db, payroll_db)
+    
+    return _ndjson_response(generate())
+
+
+@router.get("/sync/events")
+async def stream_sync_events():
+    """
+    Server-Sent Events: "drift" summary và "employee" status changes
+    Mọi connections dùng chung một broadcaster và một background incremental check
+    """
+    return StreamingResponse(
+        sync_event_broadcaster.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/sync/execute", response_model=SyncExecuteResponse)
-def execute_sync(request: SyncExecuteRequest):
+def execute_sync(
+    request: SyncExecuteRequest,
+    mode: Literal["per_employee", "bulk"] = Query(
+        "per_employee", description="bulk: đọc/ghi theo batch thay vì từng employee"
+    )
+):
     """
     Execute sync for selected employees
     BR-03: Auto-create employee trong MySQL nếu chưa tồn tại (salary = 0)
@@ -133,21 +365,128 @@ def execute_sync(request: SyncExecuteRequest):
         )
     
     with db_manager.get_hr_db() as hr_db, db_manager.get_payroll_db() as payroll_db:
-        sync_result = SyncService.execute_sync(
-            hr_db, payroll_db, request.EmployeeIDs
-        )
+        if mode == "bulk":
+            sync_result = SyncService.execute_sync_bulk(
+                hr_db, payroll_db, request.EmployeeIDs
+            )
+        else:
+            sync_result = SyncService.execute_sync(
+                hr_db, payroll_db, request.EmployeeIDs
+            )
         return sync_result
 
 
+@router.post("/sync/jobs", response_model=SyncJobStatus, status_code=202)
+def create_sync_job(
+    request: SyncExecuteRequest,
+    mode: Literal["per_employee", "bulk"] = Query(
+        "bulk", description="bulk: đọc/ghi theo batch thay vì từng employee"
+    )
+):
+    """
+    Enqueue sync cho selected employees, trả về 202 với JobID
+    Worker pool xử lý theo chunks; poll GET /sync/jobs/{job_id} để xem progress
+    """
+    if not request.EmployeeIDs:
+        raise HTTPException(
+            status_code=400,
+            detail="EmployeeIDs list cannot be empty"
+        )
+    
+    try:
+        return sync_job_manager.submit(request.EmployeeIDs, mode=mode)
+    except SyncJobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+@router.get("/sync/jobs", response_model=List[SyncJobStatus])
+def list_sync_jobs():
+    """Các sync jobs gần đây (không kèm Details)"""
+    return sync_job_manager.list_jobs()
+
+
+@router.get("/sync/jobs/{job_id}", response_model=SyncJobStatus)
+def get_sync_job(
+    job_id: str,
+    include_details: bool = Query(True, description="Kèm kết quả từng employee")
+):
+    """Progress, throughput và kết quả từng employee của một sync job"""
+    job = sync_job_manager.get(job_id, include_details=include_details)
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Sync job {job_id} not found"
+        )
+    return job
+
+
+# ============================================================================
+# Cache Endpoints
+# ============================================================================
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters của các in-process caches"""
+    return {
+        "PayrollSnapshot": payroll_snapshot_cache.stats(),
+        "ReferenceData": reference_cache.stats(),
+        "SearchIndex": employee_name_index.stats()
+    }
+
+
 # ============================================================================
 # Dividends Endpoints
 # ============================================================================
 
-@router.get("/dividends", response_model=List[DividendSchema])
+@router.get("/dividends", response_model=DividendPage)
 def list_dividends(
-    employee_id: Optional[int] = Query(None, description="Filter by EmployeeID")
+    request: Request,
+    response: Response,
+    employee_id: Optional[int] = Query(None, description="Filter by EmployeeID"),
+    from_date: Optional[date] = Query(None, description="DividendDate từ ngày (inclusive)"),
+    to_date: Optional[date] = Query(None, description="DividendDate đến ngày (inclusive)"),
+    limit: int = Query(100, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(None, description="NextCursor từ page trước")
 ):
-    """Get dividends từ HR database, optionally filter by employee"""
+    """Get dividends từ HR database (keyset pagination theo DividendDate), optionally filter by employee/khoảng ngày"""
+    try:
+        with db_manager.get_hr_db() as hr_db:
+            headers, not_modified = _etag(request, DataVersions.hr(hr_db, include_dividends=True))
+            if not_modified:
+                return not_modified
+            page = HRService.list_dividends_page(hr_db, employee_id, from_date, to_date, limit, cursor)
+            return _tagged(page, response, headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/dividends/rollup", response_model=DividendRollup)
+def dividend_rollup(
+    request: Request,
+    response: Response,
+    employee_id: Optional[int] = Query(None, description="Filter by EmployeeID"),
+    from_date: Optional[date] = Query(None, description="DividendDate từ ngày (inclusive)"),
+    to_date: Optional[date] = Query(None, description="DividendDate đến ngày (inclusive)"),
+    period: Literal["month", "quarter", "year"] = Query("quarter", description="Kỳ tổng hợp")
+):
+    """Tổng dividends theo employee × kỳ, kèm tổng theo employee và theo kỳ"""
     with db_manager.get_hr_db() as hr_db:
-        dividends = HRService.get_employee_dividends(hr_db, employee_id)
-        return dividends
+        headers, not_modified = _etag(request, DataVersions.hr(hr_db, include_dividends=True))
+        if not_modified:
+            return not_modified
+        rollup = HRService.get_dividend_rollup(hr_db, employee_id, from_date, to_date, period)
+        return _tagged(rollup, response, headers)
+
+
+@router.get("/dividends/stream")
+def stream_dividends(
+    employee_id: Optional[int] = Query(None, description="Filter by EmployeeID"),
+    from_date: Optional[date] = Query(None, description="DividendDate từ ngày (inclusive)"),
+    to_date: Optional[date] = Query(None, description="DividendDate đến ngày (inclusive)")
+):
+    """Stream dividends dưới dạng NDJSON theo DividendDate, mỗi dòng là một DividendSchema"""
+    def generate():
+        with db_manager.get_hr_db() as hr_db:
+            yield from HRService.iter_employee_dividends(hr_db, employee_id, from_date, to_date)
+    
+    return _ndjson_response(generate())
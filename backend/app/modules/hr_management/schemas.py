@@ -4,7 +4,7 @@ Data validation và serialization cho API responses
 """
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime, date
-from typing import Optional, Literal, List
+from typing import Optional, Literal, List, Dict
 from decimal import Decimal
 
 
@@ -38,6 +38,23 @@ class EmployeeDetail(EmployeeBase):
         from_attributes = True
 
 
+# Số IDs tối đa mỗi batch request (HR query được chia chunk theo giới hạn parameters của SQL Server)
+EMPLOYEE_BATCH_MAX_IDS = 1000
+
+
+class EmployeeBatchRequest(BaseModel):
+    """Request lấy unified profiles của nhiều employees"""
+    EmployeeIDs: List[int] = Field(
+        ..., min_length=1, max_length=EMPLOYEE_BATCH_MAX_IDS, description="Danh sách EmployeeID"
+    )
+
+
+class EmployeeBatchResponse(BaseModel):
+    """Unified profiles theo thứ tự EmployeeIDs của request (bỏ IDs trùng)"""
+    Items: List[EmployeeDetail]
+    NotFound: List[int] = Field(default_factory=list)
+
+
 class EmployeeListItem(BaseModel):
     """Simplified schema cho employee list view"""
     EmployeeID: int
@@ -49,6 +66,25 @@ class EmployeeListItem(BaseModel):
     HireDate: Optional[date] = None
 
 
+class EmployeeSuggestion(BaseModel):
+    """Một gợi ý type-ahead cho ô tìm kiếm nhân viên"""
+    EmployeeID: int
+    FullName: str
+
+
+class EmployeePage(BaseModel):
+    """Một page của employee list (keyset pagination)"""
+    Items: List[EmployeeListItem]
+    NextCursor: Optional[str] = Field(None, description="Truyền vào ?cursor= để lấy page tiếp theo")
+    HasMore: bool = False
+    SearchTruncated: bool = Field(
+        False, description="Search gần đúng khớp quá nhiều employees, chỉ các kết quả gần nhất được trả về"
+    )
+    Limit: int
+    SortBy: Literal["EmployeeID", "FullName", "HireDate"] = "EmployeeID"
+    SortOrder: Literal["asc", "desc"] = "asc"
+
+
 # ============================================================================
 # Department & Position Schemas
 # ============================================================================
@@ -58,6 +94,8 @@ class DepartmentSchema(BaseModel):
     DepartmentID: int
     DepartmentName: str
     EmployeeCount: Optional[int] = 0
+    StatusCounts: Optional[Dict[str, int]] = None
+    SyncStatusCounts: Optional[Dict[str, int]] = None
     
     class Config:
         from_attributes = True
@@ -89,6 +127,53 @@ class DividendSchema(BaseModel):
         from_attributes = True
 
 
+class DividendPage(BaseModel):
+    """Một page của dividends list (keyset pagination theo DividendDate, DividendID)"""
+    Items: List[DividendSchema]
+    NextCursor: Optional[str] = Field(None, description="Truyền vào ?cursor= để lấy page tiếp theo")
+    HasMore: bool = False
+    Limit: int
+
+
+class DividendRollupItem(BaseModel):
+    """Tổng dividends của một employee trong một kỳ"""
+    EmployeeID: Optional[int] = None
+    EmployeeName: Optional[str] = None
+    Period: str
+    PeriodStart: date
+    DividendCount: int
+    TotalAmount: Decimal
+
+
+class DividendEmployeeTotal(BaseModel):
+    """Tổng dividends của một employee trong cả khoảng thời gian"""
+    EmployeeID: Optional[int] = None
+    EmployeeName: Optional[str] = None
+    DividendCount: int
+    TotalAmount: Decimal
+
+
+class DividendPeriodTotal(BaseModel):
+    """Tổng dividends của tất cả employees trong một kỳ"""
+    Period: str
+    PeriodStart: date
+    EmployeeCount: int
+    DividendCount: int
+    TotalAmount: Decimal
+
+
+class DividendRollup(BaseModel):
+    """Rollup dividends theo employee × kỳ, kèm tổng theo employee và theo kỳ"""
+    PeriodType: Literal["month", "quarter", "year"]
+    FromDate: Optional[date] = None
+    ToDate: Optional[date] = None
+    Items: List[DividendRollupItem]
+    Employees: List[DividendEmployeeTotal]
+    Periods: List[DividendPeriodTotal]
+    DividendCount: int
+    TotalAmount: Decimal
+
+
 # ============================================================================
 # Sync Schemas
 # ============================================================================
@@ -112,6 +197,14 @@ class SyncCheckResponse(BaseModel):
     CheckedAt: datetime = Field(default_factory=datetime.utcnow)
 
 
+class SyncCheckSummary(BaseModel):
+    """Dòng cuối của NDJSON stream từ /sync/check/stream"""
+    TotalEmployees: int
+    NeedSync: int
+    AlreadySynced: int
+    CheckedAt: datetime = Field(default_factory=datetime.utcnow)
+
+
 class SyncExecuteRequest(BaseModel):
     """Request để execute sync"""
     EmployeeIDs: List[int] = Field(..., description="Danh sách EmployeeID cần sync")
@@ -127,6 +220,25 @@ class SyncExecuteResponse(BaseModel):
     SyncedAt: datetime = Field(default_factory=datetime.utcnow)
 
 
+class SyncJobStatus(BaseModel):
+    """Trạng thái của một background sync job (/sync/jobs)"""
+    JobID: str
+    Status: Literal["queued", "running", "completed", "failed"]
+    Mode: Literal["per_employee", "bulk"]
+    Total: int
+    Processed: int = 0
+    SyncedCount: int = 0
+    FailedCount: int = 0
+    Progress: float = 0.0
+    ThroughputPerSecond: Optional[float] = None
+    Success: Optional[bool] = None
+    Message: Optional[str] = None
+    Details: List[dict] = Field(default_factory=list)
+    CreatedAt: datetime = Field(default_factory=datetime.utcnow)
+    StartedAt: Optional[datetime] = None
+    FinishedAt: Optional[datetime] = None
+
+
 # ============================================================================
 # Organization Structure Schema
 # ============================================================================
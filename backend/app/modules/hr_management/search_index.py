@@ -0,0 +1,417 @@
+"""
+Employee Name Search Index - Index trong memory trên tên đã bỏ dấu
+"Nguyen" khớp "Nguyễn", "tran quoc" khớp "Trần Quốc Cường"
+- Substring matches (giống LIKE '%x%' nhưng accent-insensitive), tên ngắn hơn xếp trước
+- Không có substring match thì fuzzy theo từng từ (gõ sai): "hoang thi lann" khớp "Hoàng Thị Lan"
+- suggest(): prefix type-ahead trên sorted arrays (tên, đầu từng từ, EmployeeID)
+Build lúc startup, refresh incremental theo Employees.UpdatedAt
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import bisect
+import heapq
+import os
+import threading
+import time
+import unicodedata
+
+from ...database.models_hr import Employee
+from ...database.query_utils import MAX_IN_PARAMS
+
+
+def fold(text: Optional[str]) -> str:
+    """Bỏ dấu tiếng Việt, lowercase, gộp khoảng trắng"""
+    if not text:
+        return ""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.lower().split())
+
+
+def trigrams(folded: str, padded: bool = True) -> FrozenSet[str]:
+    """Trigrams của chuỗi đã fold; padded thêm biên đầu/cuối như pg_trgm"""
+    if padded:
+        folded = f"  {folded} "
+    return frozenset(folded[i:i + 3] for i in range(len(folded) - 2))
+
+
+def similarity(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    """Jaccard similarity của hai tập trigrams"""
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared) if shared else 0.0
+
+
+class EmployeeNameIndex:
+    """
+    Index trên distinct names (tên trùng nhau rất nhiều):
+    - trigram -> names: giao postings cho substring query hiếm
+    - names sort theo độ dài: substring query phổ biến quét theo thứ tự rank, dừng khi đủ limit
+    - word -> names và trigram -> words: fuzzy theo từng từ trên vocabulary nhỏ
+    - sorted (key, EmployeeID) arrays cho suggest(): bisect + quét k phần tử
+    search() đọc dưới lock, refresh() probe (MAX(UpdatedAt), COUNT)
+    tối đa mỗi probe_seconds và chỉ đọc lại rows đổi
+    """
+
+    def __init__(self, probe_seconds: float, similarity_threshold: float, cache_size: int = 256):
+        self.probe_seconds = probe_seconds
+        self.similarity_threshold = similarity_threshold
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._names: Dict[int, str] = {}
+        self._full_names: Dict[int, str] = {}
+        self._departments: Dict[int, Optional[int]] = {}
+        self._ids_by_name: Dict[str, Set[int]] = {}
+        self._name_postings: Dict[str, Set[str]] = {}
+        self._names_by_word: Dict[str, Set[str]] = {}
+        self._word_postings: Dict[str, Set[str]] = {}
+        self._by_length: Optional[List[str]] = None
+        self._rank: Dict[str, int] = {}
+        # Prefix arrays: tên đầy đủ, phần tên bắt đầu từ từ thứ 2 trở đi, EmployeeID dạng string
+        self._name_prefixes: List[Tuple[str, int]] = []
+        self._word_prefixes: List[Tuple[str, int]] = []
+        self._id_prefixes: List[Tuple[str, int]] = []
+        # Kết quả theo (query đã fold, limit, department_id); xoá mỗi khi index đổi. Pagination gọi lại cùng query
+        self._results: "OrderedDict[Tuple[str, int, Optional[int]], List[Tuple[int, float]]]" = OrderedDict()
+        self._version: Optional[Tuple[Optional[datetime], int]] = None
+        self._probed_at = 0.0
+        self.builds = 0
+        self.refreshes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._version is not None
+
+    def build(self, hr_db: Session):
+        """Full build từ Employees (startup hoặc khi phát hiện rows bị xoá)"""
+        version = self._probe(hr_db)
+        rows = hr_db.query(Employee.EmployeeID, Employee.FullName, Employee.DepartmentID).all()
+        with self._lock:
+            self._names = {}
+            self._full_names = {}
+            self._departments = {}
+            self._ids_by_name = {}
+            self._name_postings = {}
+            self._names_by_word = {}
+            self._word_postings = {}
+            for emp_id, full_name, department_id in rows:
+                self._put(emp_id, full_name, department_id, bulk=True)
+            self._sort_by_length()
+            self._sort_prefixes()
+            self._results.clear()
+            self._version = version
+            self._probed_at = time.monotonic()
+            self.builds += 1
+        print(f"🔎 Employee name index built: {len(rows)} employees, {len(self._ids_by_name)} distinct names")
+
+    def refresh(self, hr_db: Session):
+        """Probe version, upsert rows có UpdatedAt >= watermark cũ"""
+        if not self.ready:
+            self.build(hr_db)
+            return
+        with self._lock:
+            if time.monotonic() - self._probed_at < self.probe_seconds:
+                return
+            self._probed_at = time.monotonic()
+            old_version = self._version
+
+        version = self._probe(hr_db)
+        if version == old_version:
+            return
+
+        query = hr_db.query(Employee.EmployeeID, Employee.FullName, Employee.DepartmentID)
+        if old_version[0] is not None:
+            query = query.filter(Employee.UpdatedAt >= old_version[0])
+        rows = query.all()
+        with self._lock:
+            for emp_id, full_name, department_id in rows:
+                self._put(emp_id, full_name, department_id)
+            if self._by_length is None:
+                self._sort_by_length()
+            self._results.clear()
+            self._version = version
+            self.refreshes += 1
+            stale = len(self._names) != version[1]
+        if stale:
+            # COUNT lệch nghĩa là có rows bị xoá, UpdatedAt không phát hiện được
+            self.build(hr_db)
+
+    def expect(self, version: Tuple[Optional[datetime], int]):
+        """Version (MAX UpdatedAt, COUNT) vừa probe cho ETag: khác version của index thì refresh() probe lại ngay"""
+        with self._lock:
+            if version != self._version:
+                self._probed_at = 0.0
+
+    def search(
+        self,
+        query: str,
+        limit: int = MAX_IN_PARAMS,
+        department_id: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Ranked (EmployeeID, score)
+        Substring matches: score = 1.0 + len(query) / len(name)
+        Fuzzy matches: score = trung bình similarity của từng từ trong query (< 1.0)
+        department_id: chỉ employees của department đó, lọc trước khi cắt ở limit
+        """
+        folded_query = fold(query)
+        if not folded_query:
+            return []
+
+        key = (folded_query, limit, department_id)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+
+            # Lọc theo department thì không biết trước bao nhiêu names đủ limit, xét mọi names khớp
+            name_limit = limit if department_id is None else len(self._ids_by_name)
+            top_names = (
+                self._substring_matches(folded_query, name_limit)
+                or self._fuzzy_matches(folded_query, name_limit)
+            )
+            ranked = []
+            for name, score in top_names:
+                score = round(score, 4)
+                ranked.extend(
+                    (emp_id, score) for emp_id in sorted(self._ids_by_name[name])
+                    if department_id is None or self._departments.get(emp_id) == department_id
+                )
+                if len(ranked) >= limit:
+                    break
+            ranked = ranked[:limit]
+
+            self._results[key] = ranked
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return ranked
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[int, str]]:
+        """
+        Top `limit` (EmployeeID, FullName) cho type-ahead
+        Thứ tự: EmployeeID bắt đầu bằng query (nếu query là số), tên bắt đầu bằng query,
+        rồi tên có một từ bắt đầu bằng query ("cuong" -> "Trần Quốc Cường")
+        """
+        folded_query = fold(query)
+        if not folded_query:
+            return []
+
+        suggestions: List[Tuple[int, str]] = []
+        seen: Set[int] = set()
+        with self._lock:
+            arrays = [self._name_prefixes, self._word_prefixes]
+            if folded_query.isdigit():
+                arrays.insert(0, self._id_prefixes)
+            for keys in arrays:
+                position = bisect.bisect_left(keys, (folded_query,))
+                while position < len(keys) and len(suggestions) < limit:
+                    key, emp_id = keys[position]
+                    if not key.startswith(folded_query):
+                        break
+                    if emp_id not in seen:
+                        seen.add(emp_id)
+                        suggestions.append((emp_id, self._full_names[emp_id]))
+                    position += 1
+        return suggestions
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "Size": len(self._names),
+                "DistinctNames": len(self._ids_by_name),
+                "Words": len(self._names_by_word),
+                "PrefixKeys": len(self._name_prefixes) + len(self._word_prefixes) + len(self._id_prefixes),
+                "Watermark": self._version[0].isoformat() if self._version and self._version[0] else None,
+                "Builds": self.builds,
+                "Refreshes": self.refreshes,
+                "CacheHits": self.cache_hits,
+                "CacheMisses": self.cache_misses,
+            }
+
+    def _probe(self, hr_db: Session) -> Tuple[Optional[datetime], int]:
+        max_updated, count = hr_db.query(
+            func.max(Employee.UpdatedAt), func.count(Employee.EmployeeID)
+        ).one()
+        return max_updated, count or 0
+
+    # ------------------------------------------------------------------
+    # Maintenance (gọi khi đang giữ lock)
+    # ------------------------------------------------------------------
+
+    def _put(self, emp_id: int, full_name: Optional[str], department_id: Optional[int], bulk: bool = False):
+        """Thêm/cập nhật một employee; bulk=True thì build() sort prefix arrays một lần ở cuối"""
+        self._full_names[emp_id] = full_name or ""
+        self._departments[emp_id] = department_id
+        folded = fold(full_name)
+        old_name = self._names.get(emp_id)
+        if old_name == folded:
+            return
+        if not bulk:
+            self._update_prefixes(emp_id, old_name, folded)
+        if old_name is not None:
+            ids = self._ids_by_name[old_name]
+            ids.discard(emp_id)
+            if not ids:
+                self._remove_name(old_name)
+
+        self._names[emp_id] = folded
+        ids = self._ids_by_name.get(folded)
+        if ids is None:
+            ids = self._ids_by_name[folded] = set()
+            self._add_name(folded)
+        ids.add(emp_id)
+
+    def _add_name(self, name: str):
+        self._by_length = None
+        for gram in trigrams(name):
+            self._name_postings.setdefault(gram, set()).add(name)
+        for word in set(name.split()):
+            names = self._names_by_word.get(word)
+            if names is None:
+                names = self._names_by_word[word] = set()
+                for gram in trigrams(word):
+                    self._word_postings.setdefault(gram, set()).add(word)
+            names.add(name)
+
+    def _remove_name(self, name: str):
+        del self._ids_by_name[name]
+        self._by_length = None
+        for gram in trigrams(name):
+            self._discard(self._name_postings, gram, name)
+        for word in set(name.split()):
+            self._discard(self._names_by_word, word, name)
+            if word not in self._names_by_word:
+                for gram in trigrams(word):
+                    self._discard(self._word_postings, gram, word)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[str]], key: str, value: str):
+        values = postings[key]
+        values.discard(value)
+        if not values:
+            del postings[key]
+
+    @staticmethod
+    def _word_suffixes(name: str) -> List[str]:
+        """Phần tên bắt đầu từ mỗi từ thứ 2 trở đi: "tran quoc cuong" -> ["quoc cuong", "cuong"]"""
+        return [name[i + 1:] for i, ch in enumerate(name) if ch == " "]
+
+    def _update_prefixes(self, emp_id: int, old_name: Optional[str], name: str):
+        """Incremental: bỏ keys của tên cũ, insort keys của tên mới"""
+        if old_name is None:
+            bisect.insort(self._id_prefixes, (str(emp_id), emp_id))
+        else:
+            self._remove_key(self._name_prefixes, (old_name, emp_id))
+            for suffix in self._word_suffixes(old_name):
+                self._remove_key(self._word_prefixes, (suffix, emp_id))
+        bisect.insort(self._name_prefixes, (name, emp_id))
+        for suffix in self._word_suffixes(name):
+            bisect.insort(self._word_prefixes, (suffix, emp_id))
+
+    @staticmethod
+    def _remove_key(keys: List[Tuple[str, int]], key: Tuple[str, int]):
+        position = bisect.bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+
+    def _sort_prefixes(self):
+        self._name_prefixes = sorted((name, emp_id) for emp_id, name in self._names.items())
+        self._word_prefixes = sorted(
+            (suffix, emp_id)
+            for emp_id, name in self._names.items()
+            for suffix in self._word_suffixes(name)
+        )
+        self._id_prefixes = sorted((str(emp_id), emp_id) for emp_id in self._names)
+
+    def _sort_by_length(self):
+        self._by_length = sorted(self._ids_by_name, key=lambda name: (len(name), name))
+        self._rank = {name: rank for rank, name in enumerate(self._by_length)}
+
+    # ------------------------------------------------------------------
+    # Matching (gọi khi đang giữ lock)
+    # ------------------------------------------------------------------
+
+    def _substring_matches(self, folded_query: str, limit: int) -> List[Tuple[str, float]]:
+        """
+        Top `limit` names chứa query, score giảm theo độ dài tên
+        Query có trigram hiếm: giao postings rồi verify
+        Query ngắn/phổ biến: quét names theo độ dài, dừng khi đủ limit
+        """
+        query_grams = trigrams(folded_query, padded=False)
+        postings = sorted((self._name_postings.get(gram, set()) for gram in query_grams), key=len)
+
+        if postings and len(postings[0]) <= 4 * limit:
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= posting
+            names = sorted(
+                (name for name in candidates if folded_query in name), key=self._rank.__getitem__
+            )[:limit]
+        else:
+            names = []
+            for name in self._by_length:
+                if folded_query in name:
+                    names.append(name)
+                    if len(names) >= limit:
+                        break
+        return [(name, 1.0 + len(folded_query) / len(name)) for name in names]
+
+    def _fuzzy_matches(self, folded_query: str, limit: int) -> List[Tuple[str, float]]:
+        """
+        Mỗi từ trong query khớp các từ trong vocabulary có similarity >= threshold
+        Tên phải chứa một từ khớp cho mỗi từ của query; score = trung bình similarity tốt nhất
+        """
+        word_scores = []
+        for query_word in set(folded_query.split()):
+            query_word_grams = trigrams(query_word)
+            candidates = set()
+            for gram in query_word_grams:
+                candidates |= self._word_postings.get(gram, set())
+            scores = {}
+            for word in candidates:
+                score = similarity(query_word_grams, trigrams(word))
+                if score >= self.similarity_threshold:
+                    scores[word] = score
+            if not scores:
+                return []
+            word_scores.append(scores)
+
+        # Từ có ít tên khớp nhất trước để giao nhanh
+        word_names = sorted(
+            (set().union(*(self._names_by_word[word] for word in scores)) for scores in word_scores),
+            key=len
+        )
+        names = word_names[0]
+        for other in word_names[1:]:
+            names = names & other
+            if not names:
+                return []
+
+        def score_name(name: str) -> float:
+            name_words = name.split()
+            return sum(
+                max(scores.get(word, 0.0) for word in name_words) for scores in word_scores
+            ) / len(word_scores)
+
+        return heapq.nsmallest(
+            limit,
+            ((name, score_name(name)) for name in names),
+            key=lambda match: (-match[1], len(match[0]), match[0])
+        )
+
+
+employee_name_index = EmployeeNameIndex(
+    probe_seconds=float(os.getenv("SEARCH_INDEX_PROBE_SECONDS", "5")),
+    similarity_threshold=float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", "0.3")),
+    cache_size=int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "256"))
+)
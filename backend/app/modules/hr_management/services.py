@@ -2,56 +2,110 @@
 HR Management Business Logic Services
 Core services: Unified Profile, Sync Detection, Sync Execution
 """
+from sqlalchemy import collate, extract, func, or_, and_, select
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Any, Iterator, List, Dict, Optional, Tuple
+from datetime import date
+from decimal import Decimal
+import base64
+import json
+import os
 
-from ...database.models_hr import Employee, Department, Position, Dividend
-from ...database.models_payroll import EmployeePayroll, DepartmentPayroll, PositionPayroll
+from ...database.models_hr import Employee, Dividend
+from ...database.query_utils import MAX_IN_PARAMS, chunked
+from .caches import PayrollSnapshot, payroll_snapshot_cache, reference_cache
+from .search_index import employee_name_index
 from .schemas import (
-    EmployeeDetail, EmployeeListItem, SyncNeed, SyncCheckResponse,
-    SyncExecuteResponse, OrgStructureNode, OrgStructureResponse,
-    DepartmentSchema, DividendSchema
+    EmployeeDetail, EmployeeBatchResponse, EmployeeListItem, EmployeePage, EmployeeSuggestion,
+    OrgStructureNode, OrgStructureResponse,
+    DepartmentSchema, DividendSchema, DividendPage, DividendRollup, DividendRollupItem,
+    DividendEmployeeTotal, DividendPeriodTotal
 )
 
 
+# (DepartmentID -> DepartmentName, PositionID -> PositionName)
+ReferenceNames = Tuple[Dict[int, str], Dict[int, str]]
+
+# Số rows mỗi lần fetch từ server-side cursor khi stream NDJSON
+STREAM_BATCH_SIZE = 1000
+
+# search dùng employee_name_index (accent-insensitive) thay vì LIKE '%x%'
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+
+# Collation accent-insensitive cho LIKE fallback khi search khớp quá MAX_IN_PARAMS employees
+MSSQL_SEARCH_COLLATION = "Latin1_General_100_CI_AI"
+
+# Các cột cho phép sort ở GET /hr/employees (đều NOT NULL nên keyset đơn giản)
+EMPLOYEE_SORT_COLUMNS = {
+    "EmployeeID": Employee.EmployeeID,
+    "FullName": Employee.FullName,
+    "HireDate": Employee.HireDate,
+}
+
+
+# Cursor sort keys có kiểu date (encode dạng ISO string)
+DATE_CURSOR_KEYS = {"HireDate", "DividendDate"}
+
+# Dividend rollup: số tháng mỗi kỳ
+DIVIDEND_PERIOD_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Encode (sort value, ID) của row cuối page thành opaque cursor"""
+    if isinstance(sort_value, date):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, int]:
+    """Decode cursor, raise ValueError nếu cursor hỏng hoặc không khớp sort_by"""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if sort_by in DATE_CURSOR_KEYS:
+            sort_value = date.fromisoformat(sort_value)
+        elif sort_by == "EmployeeID":
+            sort_value = int(sort_value)
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
 class HRService:
     """Service for HR Management operations"""
     
     @staticmethod
-    def get_unified_employee_profile(
-        hr_db: Session,
-        payroll_db: Session,
-        employee_id: int
-    ) -> Optional[EmployeeDetail]:
-        """
-        Get unified employee profile by joining HR and Payroll data
-        BR-01: SQL Server is single source of truth
-        """
-        # Query từ SQL Server
-        employee = hr_db.query(Employee).options(
-            joinedload(Employee.department),
-            joinedload(Employee.position)
-        ).filter(Employee.EmployeeID == employee_id).first()
-        
-        if not employee:
-            return None
-        
-        # Check sync status với MySQL
-        payroll_employee = payroll_db.query(EmployeePayroll).filter(
-            EmployeePayroll.EmployeeID == employee_id
-        ).first()
-        
-        # Determine sync status
-        sync_status = "synced"
-        if not payroll_employee:
-            sync_status = "needs_sync"
-        elif (payroll_employee.DepartmentID != employee.DepartmentID or
-              payroll_employee.PositionID != employee.PositionID or
-              payroll_employee.Status != employee.Status):
-            sync_status = "needs_sync"
-        
-        # Build unified profile
+    def _load_employees(hr_db: Session, employee_ids: List[int]) -> Dict[int, Employee]:
+        """Load nhiều employees kèm department/position, IN (...) theo chunk"""
+        employees = {}
+        for id_chunk in chunked(employee_ids):
+            employees.update(
+                (employee.EmployeeID, employee)
+                for employee in hr_db.query(Employee).options(
+                    joinedload(Employee.department),
+                    joinedload(Employee.position)
+                ).filter(Employee.EmployeeID.in_(id_chunk))
+            )
+        return employees
+    
+    @staticmethod
+    def _to_batch_response(
+        employee_ids: List[int],
+        employees: Dict[int, Employee],
+        payroll_employees: Dict[int, PayrollSnapshot]
+    ) -> EmployeeBatchResponse:
+        """Giữ thứ tự của request, IDs không có trong HR vào NotFound"""
+        return EmployeeBatchResponse(
+            Items=[
+                HRService._to_detail(employees[emp_id], payroll_employees.get(emp_id))
+                for emp_id in employee_ids if emp_id in employees
+            ],
+            NotFound=[emp_id for emp_id in employee_ids if emp_id not in employees]
+        )
+    
+    @staticmethod
+    def _to_detail(employee: Employee, payroll_employee) -> EmployeeDetail:
+        """Build unified profile từ HR employee và payroll row (có thể None)"""
         return EmployeeDetail(
             EmployeeID=employee.EmployeeID,
             FullName=employee.FullName,
@@ -65,7 +119,7 @@ class HRService:
             DepartmentName=employee.department.DepartmentName if employee.department else None,
             PositionName=employee.position.PositionName if employee.position else None,
             Status=employee.Status,
-            SyncStatus=sync_status,
+            SyncStatus=HRService._sync_status(employee, payroll_employee),
             CreatedAt=employee.CreatedAt,
             UpdatedAt=employee.UpdatedAt
         )
@@ -75,127 +129,555 @@ class HRService:
         hr_db: Session,
         payroll_db: Session,
         department_id: Optional[int] = None,
-        search_name: Optional[str] = None
+        search_name: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, int]] = None,
+        sort_by: str = "EmployeeID",
+        sort_order: str = "asc"
     ) -> List[EmployeeListItem]:
         """
-        List all employees với sync status
+        List employees với sync status
         Support filter by department và search by name
+        limit/after: keyset pagination theo (sort_by, EmployeeID)
         """
-        # Query từ SQL Server
-        query = hr_db.query(Employee).options(
-            joinedload(Employee.department),
-            joinedload(Employee.position)
-        )
+        sort_column = EMPLOYEE_SORT_COLUMNS[sort_by]
+        descending = sort_order == "desc"
+        
+        # Query từ SQL Server, department/position names resolve từ reference_cache
+        query = hr_db.query(Employee)
         
         if department_id:
             query = query.filter(Employee.DepartmentID == department_id)
         
         if search_name:
-            query = query.filter(Employee.FullName.like(f'%{search_name}%'))
+            query = query.filter(HRService._search_filter(hr_db, search_name, department_id))
+        
+        if after is not None:
+            last_value, last_id = after
+            if sort_column is Employee.EmployeeID:
+                query = query.filter(
+                    Employee.EmployeeID < last_id if descending else Employee.EmployeeID > last_id
+                )
+            elif descending:
+                query = query.filter(or_(
+                    sort_column < last_value,
+                    and_(sort_column == last_value, Employee.EmployeeID < last_id)
+                ))
+            else:
+                query = query.filter(or_(
+                    sort_column > last_value,
+                    and_(sort_column == last_value, Employee.EmployeeID > last_id)
+                ))
+        
+        order_columns = [sort_column] if sort_column is Employee.EmployeeID else [sort_column, Employee.EmployeeID]
+        query = query.order_by(*[col.desc() if descending else col.asc() for col in order_columns])
+        
+        if limit is not None:
+            query = query.limit(limit)
         
         employees = query.all()
+        names = HRService._reference_names(hr_db)
         
-        # Get all payroll employees để compare
-        payroll_employees = {
-            emp.EmployeeID: emp
-            for emp in payroll_db.query(EmployeePayroll).all()
-        }
+        # Paged: chỉ so sánh với payroll rows của IDs trong page
+        payroll_employees = HRService._load_payroll_snapshot(
+            payroll_db,
+            [employee.EmployeeID for employee in employees] if limit is not None else None
+        )
         
-        result = []
-        for employee in employees:
-            payroll_emp = payroll_employees.get(employee.EmployeeID)
-            
-            # Determine sync status
-            if not payroll_emp:
-                sync_status = "needs_sync"
-            elif (payroll_emp.DepartmentID != employee.DepartmentID or
-                  payroll_emp.PositionID != employee.PositionID or
-                  payroll_emp.Status != employee.Status):
-                sync_status = "needs_sync"
-            else:
-                sync_status = "synced"
-            
-            result.append(EmployeeListItem(
-                EmployeeID=employee.EmployeeID,
-                FullName=employee.FullName,
-                DepartmentName=employee.department.DepartmentName if employee.department else "Chưa phân công",
-                PositionName=employee.position.PositionName if employee.position else "Chưa xác định",
-                Status=employee.Status or "Đang làm việc",
-                SyncStatus=sync_status,
-                HireDate=employee.HireDate
-            ))
+        return [
+            HRService._to_list_item(
+                employee,
+                HRService._sync_status(employee, payroll_employees.get(employee.EmployeeID)),
+                names
+            )
+            for employee in employees
+        ]
+    
+    @staticmethod
+    def list_employees_page(
+        hr_db: Session,
+        payroll_db: Session,
+        department_id: Optional[int] = None,
+        search_name: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort_by: str = "EmployeeID",
+        sort_order: str = "asc"
+    ) -> EmployeePage:
+        """
+        Keyset-paginated employee list
+        Lấy limit + 1 rows để biết còn page tiếp theo hay không
+        Raises ValueError nếu cursor không hợp lệ
+        """
+        after = decode_cursor(cursor, sort_by) if cursor else None
+        
+        items = HRService.list_employees_with_sync_status(
+            hr_db, payroll_db,
+            department_id=department_id,
+            search_name=search_name,
+            limit=limit + 1,
+            after=after,
+            sort_by=sort_by,
+            sort_order=sort_order
+        )
+        
+        has_more = len(items) > limit
+        items = items[:limit]
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = encode_cursor(getattr(last, sort_by), last.EmployeeID)
+        
+        return EmployeePage(
+            Items=items,
+            NextCursor=next_cursor,
+            HasMore=has_more,
+            SearchTruncated=bool(search_name) and HRService.search_truncated(hr_db, search_name, department_id),
+            Limit=limit,
+            SortBy=sort_by,
+            SortOrder=sort_order
+        )
+    
+    @staticmethod
+    def suggest_employees(hr_db: Session, query: str, limit: int = 10) -> List[EmployeeSuggestion]:
+        """
+        Type-ahead từ prefix arrays của employee_name_index
+        Không đọc payroll, HR chỉ bị probe tối đa mỗi SEARCH_INDEX_PROBE_SECONDS
+        """
+        employee_name_index.refresh(hr_db)
+        return [
+            EmployeeSuggestion(EmployeeID=emp_id, FullName=full_name)
+            for emp_id, full_name in employee_name_index.suggest(query, limit)
+        ]
+    
+    @staticmethod
+    def iter_employees_with_sync_status(
+        hr_db: Session,
+        payroll_db: Session,
+        department_id: Optional[int] = None,
+        search_name: Optional[str] = None,
+        batch_size: int = STREAM_BATCH_SIZE
+    ) -> Iterator[EmployeeListItem]:
+        """
+        Stream toàn bộ employees với sync status
+        Đọc HR qua server-side cursor (yield_per), so sánh payroll theo từng batch IDs
+        """
+        names = HRService._reference_names(hr_db)
+        stmt = select(Employee).order_by(Employee.EmployeeID)
+        
+        if department_id:
+            stmt = stmt.where(Employee.DepartmentID == department_id)
+        
+        if search_name:
+            stmt = stmt.where(HRService._search_filter(hr_db, search_name, department_id))
         
-        return result
+        result = hr_db.execute(stmt.execution_options(yield_per=batch_size)).scalars()
+        for employees in result.partitions():
+            payroll_employees = HRService._load_payroll_snapshot(
+                payroll_db, [employee.EmployeeID for employee in employees]
+            )
+            for employee in employees:
+                yield HRService._to_list_item(
+                    employee,
+                    HRService._sync_status(employee, payroll_employees.get(employee.EmployeeID)),
+                    names
+                )
     
     @staticmethod
     def get_organization_structure(
         hr_db: Session,
         payroll_db: Session
     ) -> OrgStructureResponse:
-        """Get organization structure với employees grouped by department"""
-        departments = hr_db.query(Department).all()
+        """
+        Get organization structure với employees grouped by department
+        Một query employees, departments/positions từ reference_cache, payroll snapshot từ cache
+        """
+        names, employees = HRService._load_org_employees(hr_db)
+        payroll_employees = HRService._load_payroll_snapshot(payroll_db)
+        return HRService._build_org_structure(names, employees, payroll_employees)
+    
+    @staticmethod
+    def _load_org_employees(hr_db: Session) -> Tuple[ReferenceNames, List[Employee]]:
+        """Load reference names và employees có department cho org structure"""
+        names = HRService._reference_names(hr_db)
         
-        org_nodes = []
-        total_employees = 0
+        employees = hr_db.query(Employee).filter(
+            Employee.DepartmentID.isnot(None)
+        ).order_by(Employee.EmployeeID).all()
         
-        for dept in departments:
-            # Get employees trong department này
-            employees = HRService.list_employees_with_sync_status(
-                hr_db, payroll_db, department_id=dept.DepartmentID
-            )
-            
-            total_employees += len(employees)
-            
-            org_nodes.append(OrgStructureNode(
-                DepartmentID=dept.DepartmentID,
-                DepartmentName=dept.DepartmentName,
-                Employees=employees,
-                EmployeeCount=len(employees)
+        return names, employees
+    
+    @staticmethod
+    def _build_org_structure(
+        names: ReferenceNames,
+        employees: List[Employee],
+        payroll_employees: Dict[int, Any]
+    ) -> OrgStructureResponse:
+        """Group employees theo department trong một lần duyệt"""
+        department_names = names[0]
+        employees_by_dept: Dict[int, List[EmployeeListItem]] = {
+            dept_id: [] for dept_id in sorted(department_names)
+        }
+        for employee in employees:
+            dept_employees = employees_by_dept.get(employee.DepartmentID)
+            if dept_employees is None:
+                continue
+            dept_employees.append(HRService._to_list_item(
+                employee,
+                HRService._sync_status(employee, payroll_employees.get(employee.EmployeeID)),
+                names
             ))
         
+        org_nodes = [
+            OrgStructureNode(
+                DepartmentID=dept_id,
+                DepartmentName=department_names[dept_id],
+                Employees=dept_employees,
+                EmployeeCount=len(dept_employees)
+            )
+            for dept_id, dept_employees in employees_by_dept.items()
+        ]
+        
         return OrgStructureResponse(
             Departments=org_nodes,
-            TotalDepartments=len(departments),
-            TotalEmployees=total_employees
+            TotalDepartments=len(org_nodes),
+            TotalEmployees=sum(node.EmployeeCount for node in org_nodes)
         )
     
     @staticmethod
-    def get_departments(hr_db: Session) -> List[DepartmentSchema]:
-        """Get all departments"""
-        departments = hr_db.query(Department).all()
+    def _load_payroll_snapshot(
+        payroll_db: Session,
+        employee_ids: Optional[List[int]] = None
+    ) -> Dict[int, PayrollSnapshot]:
+        """
+        Các cột cần cho so sánh sync từ employees_payroll (qua payroll_snapshot_cache)
+        employee_ids=None: toàn bộ bảng, ngược lại chỉ các IDs đó
+        """
+        return payroll_snapshot_cache.get(payroll_db, employee_ids)
+    
+    @staticmethod
+    def _sync_status(employee: Employee, payroll_emp) -> str:
+        """Determine sync status của 1 employee so với payroll row"""
+        if not payroll_emp:
+            return "needs_sync"
+        if (payroll_emp.DepartmentID != employee.DepartmentID or
+                payroll_emp.PositionID != employee.PositionID or
+                payroll_emp.Status != employee.Status):
+            return "needs_sync"
+        return "synced"
+    
+    @staticmethod
+    def search_truncated(hr_db: Session, search_name: str, department_id: Optional[int] = None) -> bool:
+        """True nếu search gần đúng khớp nhiều hơn MAX_IN_PARAMS employees (chỉ top theo score được lọc)"""
+        return HRService._search_matches(hr_db, search_name, department_id)[1]
+    
+    @staticmethod
+    def _search_filter(hr_db: Session, search_name: str, department_id: Optional[int] = None):
+        """
+        Filter cho search by name: EmployeeID IN (matches của employee_name_index)
+        Substring matches nhiều hơn MAX_IN_PARAMS thì dùng LIKE để department filter,
+        keyset và ORDER BY chạy trên toàn bộ matches thay vì bị cắt ở MAX_IN_PARAMS
+        """
+        employee_ids, _ = HRService._search_matches(hr_db, search_name, department_id)
+        if employee_ids is None:
+            return HRService._like_filter(hr_db, search_name)
+        return Employee.EmployeeID.in_(employee_ids)
+    
+    @staticmethod
+    def _search_matches(
+        hr_db: Session,
+        search_name: str,
+        department_id: Optional[int] = None
+    ) -> Tuple[Optional[List[int]], bool]:
+        """
+        (EmployeeIDs khớp hoặc None nếu dùng LIKE, truncated)
+        Fuzzy matches (score < 1) không viết được bằng LIKE: quá MAX_IN_PARAMS thì lọc
+        department ngay trong index, vẫn quá thì giữ top MAX_IN_PARAMS và báo truncated
+        Kết quả search được cache trong index nên gọi lại cho cùng query không tốn thêm
+        """
+        if not SEARCH_INDEX_ENABLED:
+            return None, False
+        employee_name_index.refresh(hr_db)
+        matches = employee_name_index.search(search_name, MAX_IN_PARAMS + 1)
+        if len(matches) > MAX_IN_PARAMS:
+            if matches[0][1] >= 1.0:
+                return None, False
+            if department_id:
+                matches = employee_name_index.search(search_name, MAX_IN_PARAMS + 1, department_id)
+        return [emp_id for emp_id, _ in matches[:MAX_IN_PARAMS]], len(matches) > MAX_IN_PARAMS
+    
+    @staticmethod
+    def _like_filter(hr_db: Session, search_name: str):
+        """FullName LIKE '%x%', accent-insensitive trên SQL Server qua collation CI_AI"""
+        pattern = f'%{search_name}%'
+        if hr_db.get_bind().dialect.name == "mssql":
+            return collate(Employee.FullName, MSSQL_SEARCH_COLLATION).like(pattern)
+        return Employee.FullName.like(pattern)
+    
+    @staticmethod
+    def _reference_names(hr_db: Session) -> ReferenceNames:
+        """(DepartmentID -> Name, PositionID -> Name) từ reference_cache"""
+        return (
+            reference_cache.departments.names(hr_db),
+            reference_cache.positions.names(hr_db)
+        )
+    
+    @staticmethod
+    def _to_list_item(employee: Employee, sync_status: str, names: ReferenceNames) -> EmployeeListItem:
+        """Build EmployeeListItem, department/position names lấy từ reference names"""
+        department_names, position_names = names
+        return EmployeeListItem(
+            EmployeeID=employee.EmployeeID,
+            FullName=employee.FullName,
+            DepartmentName=department_names.get(employee.DepartmentID) or "Chưa phân công",
+            PositionName=position_names.get(employee.PositionID) or "Chưa xác định",
+            Status=employee.Status or "Đang làm việc",
+            SyncStatus=sync_status,
+            HireDate=employee.HireDate
+        )
+    
+    @staticmethod
+    def get_departments(
+        hr_db: Session,
+        payroll_db: Optional[Session] = None,
+        include_status_counts: bool = False,
+        include_sync_counts: bool = False
+    ) -> List[DepartmentSchema]:
+        """
+        Get all departments với employee count
+        Count bằng GROUP BY DepartmentID thay vì load relationship employees
+        include_status_counts: thêm số employees theo Status
+        include_sync_counts: thêm số employees theo SyncStatus (cần payroll_db)
+        """
+        department_names = reference_cache.departments.names(hr_db)
+        
+        employee_counts: Dict[int, int] = {}
+        status_counts: Dict[int, Dict[str, int]] = {}
+        
+        if include_status_counts:
+            # Một query GROUP BY (DepartmentID, Status) cho cả total và breakdown
+            rows = hr_db.query(
+                Employee.DepartmentID, Employee.Status, func.count(Employee.EmployeeID)
+            ).group_by(Employee.DepartmentID, Employee.Status)
+            for dept_id, status, count in rows:
+                employee_counts[dept_id] = employee_counts.get(dept_id, 0) + count
+                dept_statuses = status_counts.setdefault(dept_id, {})
+                status_key = status or "Đang làm việc"
+                dept_statuses[status_key] = dept_statuses.get(status_key, 0) + count
+        else:
+            employee_counts = dict(
+                hr_db.query(
+                    Employee.DepartmentID, func.count(Employee.EmployeeID)
+                ).group_by(Employee.DepartmentID).all()
+            )
+        
+        sync_counts: Dict[int, Dict[str, int]] = {}
+        if include_sync_counts and payroll_db is not None:
+            hr_rows = hr_db.query(
+                Employee.EmployeeID, Employee.DepartmentID,
+                Employee.PositionID, Employee.Status
+            ).filter(Employee.DepartmentID.isnot(None)).all()
+            payroll_employees = HRService._load_payroll_snapshot(payroll_db)
+            for row in hr_rows:
+                sync_status = HRService._sync_status(row, payroll_employees.get(row.EmployeeID))
+                dept_sync = sync_counts.setdefault(row.DepartmentID, {"synced": 0, "needs_sync": 0})
+                dept_sync[sync_status] += 1
+        
         return [
             DepartmentSchema(
-                DepartmentID=dept.DepartmentID,
-                DepartmentName=dept.DepartmentName,
-                EmployeeCount=len(dept.employees)
+                DepartmentID=dept_id,
+                DepartmentName=department_names[dept_id],
+                EmployeeCount=employee_counts.get(dept_id, 0),
+                StatusCounts=status_counts.get(dept_id, {}) if include_status_counts else None,
+                SyncStatusCounts=(
+                    sync_counts.get(dept_id, {"synced": 0, "needs_sync": 0})
+                    if include_sync_counts and payroll_db is not None else None
+                )
             )
-            for dept in departments
+            for dept_id in sorted(department_names)
         ]
     
     @staticmethod
-    def get_employee_dividends(
+    def list_dividends_page(
         hr_db: Session,
-        employee_id: Optional[int] = None
-    ) -> List[DividendSchema]:
+        employee_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> DividendPage:
         """
-        Get dividends from SQL Server
-        Filter by employee_id nếu provided
+        Keyset-paginated dividends theo (DividendDate, DividendID)
+        Filter employee/khoảng ngày dùng index (EmployeeID, DividendDate) hoặc (DividendDate)
+        nên cost mỗi page không tăng theo lịch sử dividends
+        Raises ValueError nếu cursor không hợp lệ
         """
-        query = hr_db.query(Dividend).options(joinedload(Dividend.employee))
+        stmt = HRService._dividend_rows(employee_id, from_date, to_date)
+        if cursor:
+            last_date, last_id = decode_cursor(cursor, "DividendDate")
+            stmt = stmt.where(or_(
+                Dividend.DividendDate > last_date,
+                and_(Dividend.DividendDate == last_date, Dividend.DividendID > last_id)
+            ))
+        rows = hr_db.execute(stmt.limit(limit + 1)).all()
+        
+        has_more = len(rows) > limit
+        items = [HRService._to_dividend_schema(row) for row in rows[:limit]]
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = encode_cursor(last.DividendDate, last.DividendID)
         
-        if employee_id:
-            query = query.filter(Dividend.EmployeeID == employee_id)
+        return DividendPage(Items=items, NextCursor=next_cursor, HasMore=has_more, Limit=limit)
+    
+    @staticmethod
+    def iter_employee_dividends(
+        hr_db: Session,
+        employee_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        batch_size: int = STREAM_BATCH_SIZE
+    ) -> Iterator[DividendSchema]:
+        """Stream dividends qua server-side cursor (yield_per) thay vì load hết vào memory"""
+        stmt = HRService._dividend_rows(employee_id, from_date, to_date)
+        for row in hr_db.execute(stmt.execution_options(yield_per=batch_size)):
+            yield HRService._to_dividend_schema(row)
+    
+    @staticmethod
+    def get_dividend_rollup(
+        hr_db: Session,
+        employee_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        period: str = "quarter"
+    ) -> DividendRollup:
+        """
+        Tổng dividends theo employee × kỳ (month/quarter/year) bằng một GROUP BY query,
+        tổng theo employee và theo kỳ cộng từ các groups (không đọc lại bảng)
+        """
+        months_per_period = DIVIDEND_PERIOD_MONTHS[period]
+        month_index = extract("month", Dividend.DividendDate) - 1
+        # Group trên subquery đã tính year/kỳ: SQL Server không nhận GROUP BY
+        # trên expressions có bound parameters
+        periods = select(
+            Dividend.EmployeeID,
+            extract("year", Dividend.DividendDate).label("Year"),
+            (month_index // months_per_period).label("PeriodIndex"),
+            Dividend.DividendID,
+            Dividend.DividendAmount,
+        ).where(*HRService._dividend_filters(employee_id, from_date, to_date)).subquery()
+        grouped = select(
+            periods.c.EmployeeID,
+            periods.c.Year,
+            periods.c.PeriodIndex,
+            func.count(periods.c.DividendID).label("DividendCount"),
+            func.sum(periods.c.DividendAmount).label("TotalAmount"),
+        ).group_by(periods.c.EmployeeID, periods.c.Year, periods.c.PeriodIndex).subquery()
+        rows = hr_db.execute(
+            select(grouped, Employee.FullName)
+            .outerjoin(Employee, Employee.EmployeeID == grouped.c.EmployeeID)
+            .order_by(grouped.c.EmployeeID, grouped.c.Year, grouped.c.PeriodIndex)
+        ).all()
         
-        dividends = query.all()
+        items = []
+        employees: Dict[Optional[int], DividendEmployeeTotal] = {}
+        period_totals: Dict[date, DividendPeriodTotal] = {}
+        for row in rows:
+            period_start = date(int(row.Year), int(row.PeriodIndex) * months_per_period + 1, 1)
+            label = HRService._dividend_period_label(period_start, period)
+            total_amount = Decimal(row.TotalAmount or 0)
+            items.append(DividendRollupItem(
+                EmployeeID=row.EmployeeID,
+                EmployeeName=row.FullName,
+                Period=label,
+                PeriodStart=period_start,
+                DividendCount=row.DividendCount,
+                TotalAmount=total_amount
+            ))
+            
+            employee_total = employees.get(row.EmployeeID)
+            if employee_total is None:
+                employee_total = employees[row.EmployeeID] = DividendEmployeeTotal(
+                    EmployeeID=row.EmployeeID, EmployeeName=row.FullName,
+                    DividendCount=0, TotalAmount=Decimal(0)
+                )
+            employee_total.DividendCount += row.DividendCount
+            employee_total.TotalAmount += total_amount
+            
+            period_total = period_totals.get(period_start)
+            if period_total is None:
+                period_total = period_totals[period_start] = DividendPeriodTotal(
+                    Period=label, PeriodStart=period_start,
+                    EmployeeCount=0, DividendCount=0, TotalAmount=Decimal(0)
+                )
+            period_total.EmployeeCount += 1
+            period_total.DividendCount += row.DividendCount
+            period_total.TotalAmount += total_amount
         
-        return [
-            DividendSchema(
-                DividendID=div.DividendID,
-                EmployeeID=div.EmployeeID,
-                EmployeeName=div.employee.FullName if div.employee else None,
-                DividendAmount=div.DividendAmount,
-                DividendDate=div.DividendDate,
-                CreatedAt=div.CreatedAt
+        return DividendRollup(
+            PeriodType=period,
+            FromDate=from_date,
+            ToDate=to_date,
+            Items=items,
+            Employees=list(employees.values()),
+            Periods=[period_totals[start] for start in sorted(period_totals)],
+            DividendCount=sum(item.DividendCount for item in items),
+            TotalAmount=sum((item.TotalAmount for item in items), Decimal(0))
+        )
+    
+    @staticmethod
+    def _dividend_filters(
+        employee_id: Optional[int],
+        from_date: Optional[date],
+        to_date: Optional[date]
+    ) -> list:
+        """WHERE conditions cho dividends, khớp prefix của index (EmployeeID, DividendDate)"""
+        conditions = []
+        if employee_id is not None:
+            conditions.append(Dividend.EmployeeID == employee_id)
+        if from_date:
+            conditions.append(Dividend.DividendDate >= from_date)
+        if to_date:
+            conditions.append(Dividend.DividendDate <= to_date)
+        return conditions
+    
+    @staticmethod
+    def _dividend_rows(
+        employee_id: Optional[int],
+        from_date: Optional[date],
+        to_date: Optional[date]
+    ):
+        """SELECT các cột của DividendSchema (Core rows, không ORM objects), order theo keyset"""
+        return (
+            select(
+                Dividend.DividendID,
+                Dividend.EmployeeID,
+                Employee.FullName,
+                Dividend.DividendAmount,
+                Dividend.DividendDate,
+                Dividend.CreatedAt
             )
-            for div in dividends
-        ]
+            .outerjoin(Employee, Employee.EmployeeID == Dividend.EmployeeID)
+            .where(*HRService._dividend_filters(employee_id, from_date, to_date))
+            .order_by(Dividend.DividendDate, Dividend.DividendID)
+        )
+    
+    @staticmethod
+    def _dividend_period_label(period_start: date, period: str) -> str:
+        if period == "year":
+            return str(period_start.year)
+        if period == "quarter":
+            return f"{period_start.year}-Q{(period_start.month - 1) // 3 + 1}"
+        return f"{period_start.year}-{period_start.month:02d}"
+    
+    @staticmethod
+    def _to_dividend_schema(row) -> DividendSchema:
+        """Build DividendSchema từ row của _dividend_rows"""
+        return DividendSchema(
+            DividendID=row.DividendID,
+            EmployeeID=row.EmployeeID,
+            EmployeeName=row.FullName,
+            DividendAmount=row.DividendAmount,
+            DividendDate=row.DividendDate,
+            CreatedAt=row.CreatedAt
+        )
@@ -0,0 +1,179 @@
+"""
+Sync Events - Server-Sent Events cho /hr/sync/events
+Một broadcaster dùng chung cho mọi dashboards đang mở:
+- "drift": summary (TotalEmployees, NeedSync, AlreadySynced) sau mỗi sync check / execute_sync
+- "employee": thay đổi SyncStatus của từng employee so với drift set trước đó
+Mỗi event được serialize một lần rồi fan-out tới các subscriber queues;
+khi có subscriber, một refresher duy nhất chạy incremental check theo chu kỳ
+"""
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+from datetime import datetime
+import asyncio
+import contextvars
+import json
+import os
+import threading
+
+from ...database.connections import db_manager
+from .sync_state import SyncDriftState
+
+
+class SyncEventBroadcaster:
+    """Fan-out SSE messages tới các asyncio queues, publish được từ bất kỳ thread nào"""
+
+    def __init__(self, queue_size: int, refresh_seconds: float, keepalive_seconds: float):
+        self.queue_size = queue_size
+        self.refresh_seconds = refresh_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self._lock = threading.Lock()
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._summary_message: Optional[str] = None
+        self._summary: Optional[dict] = None
+        self._drift: Optional[Dict[int, str]] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Publishers (gọi từ SyncService, có thể chạy trong worker thread)
+    # ------------------------------------------------------------------
+
+    def publish_drift(self, state: SyncDriftState):
+        """Sau sync check: summary mới + employees vào/ra khỏi drift set"""
+        drift = {emp_id: need.Action for emp_id, need in state.Drift.items()}
+        with self._lock:
+            previous, self._drift = self._drift, drift
+        summary = {
+            "TotalEmployees": state.TotalEmployees,
+            "NeedSync": len(drift),
+            "AlreadySynced": max(state.TotalEmployees - len(drift), 0),
+            "CheckedAt": state.CheckedAt.isoformat(),
+        }
+
+        # Lần đầu chưa có drift set để so sánh, chỉ gửi summary
+        # needs_sync mang đủ field của SyncNeed (trừ HRData/PayrollData) để client thêm/cập nhật row
+        if previous is not None:
+            for emp_id in sorted(emp_id for emp_id, action in drift.items() if previous.get(emp_id) != action):
+                need = state.Drift[emp_id]
+                self._publish("employee", {
+                    "EmployeeID": emp_id, "SyncStatus": "needs_sync", "Action": need.Action,
+                    "FullName": need.FullName, "Reason": need.Reason
+                })
+            for emp_id in sorted(previous.keys() - drift.keys()):
+                self._publish("employee", {"EmployeeID": emp_id, "SyncStatus": "synced"})
+        self._publish_summary(summary)
+
+    def publish_synced(self, employee_ids: Iterable[int]):
+        """Sau execute_sync commit: các employees này đã khớp với HR"""
+        synced_ids = set(employee_ids)
+        if not synced_ids:
+            return
+        for emp_id in sorted(synced_ids):
+            self._publish("employee", {"EmployeeID": emp_id, "SyncStatus": "synced"})
+
+        with self._lock:
+            if self._drift is None or self._summary is None:
+                return
+            drift = {emp_id: action for emp_id, action in self._drift.items() if emp_id not in synced_ids}
+            self._drift = drift
+            summary = dict(
+                self._summary,
+                NeedSync=len(drift),
+                AlreadySynced=max(self._summary["TotalEmployees"] - len(drift), 0),
+                CheckedAt=datetime.utcnow().isoformat()
+            )
+        self._publish_summary(summary)
+
+    def _publish_summary(self, summary: dict):
+        """Chỉ broadcast khi counts thay đổi, refresh không đổi gì thì không gửi lại"""
+        message = self._format("drift", summary)
+        with self._lock:
+            previous = self._summary
+            self._summary = summary
+            self._summary_message = message
+        unchanged = previous is not None and all(
+            previous[key] == summary[key] for key in ("TotalEmployees", "NeedSync", "AlreadySynced")
+        )
+        if not unchanged:
+            self._broadcast(message)
+
+    def _publish(self, event: str, data: dict):
+        self._broadcast(self._format(event, data))
+
+    @staticmethod
+    def _format(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def _broadcast(self, message: str):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, message)
+            except RuntimeError:
+                # Event loop của subscriber đã đóng
+                with self._lock:
+                    self._subscribers.discard((loop, queue))
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, message: str):
+        """Client chậm: bỏ message cũ nhất thay vì block publisher"""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    # ------------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------------
+
+    async def stream(self) -> AsyncIterator[str]:
+        """SSE messages cho một connection, bắt đầu bằng drift summary gần nhất"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        subscriber = (loop, queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            summary_message = self._summary_message
+        self._ensure_refresher()
+
+        try:
+            yield f"retry: {int(self.refresh_seconds * 1000)}\n\n"
+            if summary_message:
+                yield summary_message
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def _ensure_refresher(self):
+        loop = asyncio.get_running_loop()
+        if self._refresher is None or self._refresher.done() or self._refresher.get_loop() is not loop:
+            # Context rỗng: task không kế thừa RequestQueries / DataLoaders của request SSE đầu tiên
+            self._refresher = contextvars.Context().run(loop.create_task, self._refresh_loop())
+
+    async def _refresh_loop(self):
+        """Một incremental check dùng chung cho mọi subscribers, dừng khi không còn ai"""
+        # Import trong hàm để tránh circular import (SyncService publish qua module này)
+        from .sync_service import SyncService
+
+        while self.subscriber_count():
+            if db_manager.sql_server_available and db_manager.mysql_available:
+                try:
+                    # check_sync_needs tự gọi publish_drift
+                    await db_manager.run_hr_payroll(SyncService.check_sync_needs, mode="incremental")
+                except Exception as e:
+                    print(f"⚠️  Sync events refresh failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+
+sync_event_broadcaster = SyncEventBroadcaster(
+    queue_size=int(os.getenv("SYNC_EVENTS_QUEUE_SIZE", "1000")),
+    refresh_seconds=float(os.getenv("SYNC_EVENTS_REFRESH_SECONDS", "30")),
+    keepalive_seconds=float(os.getenv("SYNC_EVENTS_KEEPALIVE_SECONDS", "15"))
+)
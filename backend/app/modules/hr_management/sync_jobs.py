@@ -0,0 +1,136 @@
+"""
+Sync Jobs - Background execution cho /hr/sync/jobs
+Job được chia thành chunks, mỗi chunk chạy SyncService.execute_sync(_bulk)
+với sessions riêng trong một worker pool giới hạn; request thread trả về 202 ngay
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from datetime import datetime
+import os
+import threading
+import time
+import uuid
+
+from ...database.connections import db_manager
+from .sync_service import SyncService
+from .schemas import SyncJobStatus
+
+
+class SyncJobQueueFull(RuntimeError):
+    """Số jobs đang chờ/chạy đã đạt max_pending"""
+
+
+class SyncJobManager:
+    """
+    Bounded worker pool + registry trạng thái jobs trong memory
+    Chỉ giữ history_size jobs đã kết thúc gần nhất
+    """
+
+    def __init__(self, max_workers: int, chunk_size: int, max_pending: int, history_size: int):
+        self.max_workers = max(max_workers, 1)
+        self.chunk_size = max(chunk_size, 1)
+        self.max_pending = max(max_pending, 1)
+        self.history_size = max(history_size, 1)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, SyncJobStatus] = {}
+
+    def submit(self, employee_ids: List[int], mode: str = "bulk") -> SyncJobStatus:
+        """Tạo job ở trạng thái queued và đưa vào worker pool"""
+        employee_ids = list(dict.fromkeys(employee_ids))
+        job = SyncJobStatus(
+            JobID=uuid.uuid4().hex,
+            Status="queued",
+            Mode=mode,
+            Total=len(employee_ids)
+        )
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.Status in ("queued", "running"))
+            if pending >= self.max_pending:
+                raise SyncJobQueueFull(f"Đã có {pending} sync jobs đang chờ hoặc đang chạy")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="sync-job"
+                )
+            self._jobs[job.JobID] = job
+            self._evict_finished()
+            self._executor.submit(self._run, job.JobID, employee_ids)
+        return self._snapshot(job)
+
+    def get(self, job_id: str, include_details: bool = True) -> Optional[SyncJobStatus]:
+        """Snapshot trạng thái job, None nếu không tồn tại (hoặc đã bị evict)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job, include_details) if job else None
+
+    def list_jobs(self) -> List[SyncJobStatus]:
+        """Các jobs còn trong registry, mới nhất trước (không kèm Details)"""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.CreatedAt, reverse=True)
+            return [self._snapshot(job, include_details=False) for job in jobs]
+
+    def shutdown(self):
+        """Dừng nhận jobs mới, các chunk đang chạy được chạy nốt"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: str, employee_ids: List[int]):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.Status = "running"
+            job.StartedAt = datetime.utcnow()
+        started = time.perf_counter()
+        sync_fn = SyncService.execute_sync_bulk if job.Mode == "bulk" else SyncService.execute_sync
+
+        try:
+            for start in range(0, len(employee_ids), self.chunk_size):
+                chunk = employee_ids[start:start + self.chunk_size]
+                with db_manager.get_hr_db() as hr_db, db_manager.get_payroll_db() as payroll_db:
+                    result = sync_fn(hr_db, payroll_db, chunk)
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    job.Processed += len(chunk)
+                    job.SyncedCount += result.SyncedCount
+                    job.FailedCount += result.FailedCount
+                    job.Details.extend(result.Details)
+                    job.Progress = round(job.Processed / job.Total, 4) if job.Total else 1.0
+                    job.ThroughputPerSecond = round(job.Processed / elapsed, 2) if elapsed else None
+        except Exception as e:
+            print(f"❌ Sync job {job_id} failed: {e}")
+            with self._lock:
+                job.Status = "failed"
+                job.Success = False
+                job.Message = f"Sync job failed: {str(e)}"
+                job.FinishedAt = datetime.utcnow()
+            return
+
+        with self._lock:
+            job.Status = "completed"
+            job.Progress = 1.0
+            job.Success = job.FailedCount == 0
+            job.Message = f"Đã sync {job.SyncedCount}/{job.Total} employees"
+            job.FinishedAt = datetime.utcnow()
+
+    def _evict_finished(self):
+        """Giữ tối đa history_size jobs đã kết thúc (gọi khi đang giữ lock)"""
+        finished = sorted(
+            (j for j in self._jobs.values() if j.Status in ("completed", "failed")),
+            key=lambda j: j.CreatedAt
+        )
+        for job in finished[:max(len(finished) - self.history_size, 0)]:
+            del self._jobs[job.JobID]
+
+    @staticmethod
+    def _snapshot(job: SyncJobStatus, include_details: bool = True) -> SyncJobStatus:
+        """Copy để serialize ngoài lock trong khi worker tiếp tục cập nhật job"""
+        return job.model_copy(update={"Details": list(job.Details) if include_details else []})
+
+
+sync_job_manager = SyncJobManager(
+    max_workers=int(os.getenv("SYNC_JOB_WORKERS", "2")),
+    chunk_size=int(os.getenv("SYNC_JOB_CHUNK_SIZE", "500")),
+    max_pending=int(os.getenv("SYNC_JOB_MAX_PENDING", "20")),
+    history_size=int(os.getenv("SYNC_JOB_HISTORY", "100"))
+)
@@ -5,15 +5,22 @@ BR-03: Auto-create employee in MySQL if not exists (salary = 0)
 BR-04: Update department/position if changed
 BR-05: Soft delete only (Status = 'Inactive')
 """
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 from datetime import datetime
 
-from ...database.models_hr import Employee, Department, Position
+from ...database.models_hr import Employee
 from ...database.models_payroll import (
     EmployeePayroll, DepartmentPayroll, PositionPayroll
 )
-from .schemas import SyncNeed, SyncCheckResponse, SyncExecuteResponse
+from ...database.query_utils import chunked, bulk_upsert
+from .schemas import SyncNeed, SyncCheckResponse, SyncCheckSummary, SyncExecuteResponse
+from .sync_state import SyncDriftState, sync_state_store
+from .caches import PayrollSnapshot, payroll_snapshot_cache, reference_cache
+from .reconciliation import merkle_reconciler
+from .sync_events import sync_event_broadcaster
+from ..payroll_analytics.summary import payroll_summary
 
 
 class SyncService:
@@ -22,89 +29,279 @@ class SyncService:
     @staticmethod
     def check_sync_needs(
         hr_db: Session,
-        payroll_db: Session
+        payroll_db: Session,
+        mode: str = "full"
     ) -> SyncCheckResponse:
         """
         Detect employees needing sync by comparing HR and Payroll databases
         Returns detailed list của employees cần INSERT hoặc UPDATE
+
+        mode="full": so sánh toàn bộ 2 bảng
+        mode="incremental": chỉ so sánh rows có UpdatedAt/SyncedAt mới hơn watermark
+        mode="merkle": so sánh fingerprint theo bucket EmployeeID, chỉ đọc rows của bucket lệch
+        (dialect không tính được row hash thì dùng full, kết quả giống nhau)
+        """
+        if mode == "incremental":
+            return SyncService._check_incremental(hr_db, payroll_db)
+        if mode == "merkle":
+            if merkle_reconciler.supports(hr_db, payroll_db):
+                return SyncService._check_merkle(hr_db, payroll_db)
+            print("⚠️  Merkle reconciliation not supported for database dialect, using full check")
+        return SyncService._check_full(hr_db, payroll_db)
+    
+    @staticmethod
+    def _check_full(hr_db: Session, payroll_db: Session) -> SyncCheckResponse:
+        """Full scan cả 2 databases, đồng thời lưu baseline cho incremental mode"""
+        return SyncService._finish_full_check(
+            SyncService._load_hr_side(hr_db),
+            SyncService._load_payroll_side(payroll_db)
+        )
+    
+    @staticmethod
+    def _load_hr_side(hr_db: Session) -> Tuple[Optional[datetime], List[Employee]]:
+        """Watermark + toàn bộ employees từ SQL Server (source of truth)"""
+        # Lấy watermark trước khi scan để rows đổi trong lúc scan được xem lại lần sau
+        hr_watermark = hr_db.query(func.max(Employee.UpdatedAt)).scalar()
+        return hr_watermark, hr_db.query(Employee).all()
+    
+    @staticmethod
+    def _load_payroll_side(payroll_db: Session) -> Tuple[Optional[datetime], Dict[int, PayrollSnapshot]]:
         """
-        # Get all employees từ SQL Server (source of truth)
-        hr_employees = hr_db.query(Employee).all()
+        Watermark + toàn bộ employees từ MySQL payroll
+        Luôn đọc lại từ database (full check là baseline cho incremental, không dùng snapshot
+        có thể cũ tới TTL), đồng thời làm mới payroll_snapshot_cache cho các reads khác
+        """
+        payroll_employees = payroll_snapshot_cache.reload(payroll_db)
+        payroll_watermark = max(
+            (emp.SyncedAt for emp in payroll_employees.values() if emp.SyncedAt),
+            default=None
+        )
+        return payroll_watermark, payroll_employees
+    
+    @staticmethod
+    def _finish_full_check(hr_side, payroll_side) -> SyncCheckResponse:
+        """So sánh 2 phía đã load và lưu drift set làm baseline"""
+        hr_watermark, hr_employees = hr_side
+        payroll_watermark, payroll_employees = payroll_side
         
-        # Get all employees từ MySQL payroll
-        payroll_employees = {
-            emp.EmployeeID: emp
-            for emp in payroll_db.query(EmployeePayroll).all()
+        drift = {}
+        for hr_emp in hr_employees:
+            need = SyncService._build_sync_need(
+                hr_emp, payroll_employees.get(hr_emp.EmployeeID)
+            )
+            if need:
+                drift[hr_emp.EmployeeID] = need
+        
+        state = SyncDriftState(
+            HRWatermark=hr_watermark,
+            PayrollWatermark=payroll_watermark,
+            TotalEmployees=len(hr_employees),
+            Drift=drift
+        )
+        sync_state_store.save(state)
+        sync_event_broadcaster.publish_drift(state)
+        
+        return SyncService._state_to_response(state)
+    
+    @staticmethod
+    def _check_incremental(hr_db: Session, payroll_db: Session) -> SyncCheckResponse:
+        """
+        Chỉ re-examine employees thay đổi kể từ watermark lần trước
+        và merge kết quả vào drift set đã persist
+        """
+        state = sync_state_store.load()
+        if state is None or state.HRWatermark is None:
+            return SyncService._check_full(hr_db, payroll_db)
+        
+        hr_watermark, payroll_watermark = SyncService._current_watermarks(hr_db, payroll_db)
+        
+        # Dùng >= để không bỏ sót rows có cùng timestamp với watermark
+        changed_ids = {
+            row.EmployeeID
+            for row in hr_db.query(Employee.EmployeeID).filter(
+                Employee.UpdatedAt >= state.HRWatermark
+            )
         }
+        payroll_filter = (
+            EmployeePayroll.SyncedAt >= state.PayrollWatermark
+            if state.PayrollWatermark is not None
+            else EmployeePayroll.SyncedAt.isnot(None)
+        )
+        changed_ids.update(
+            row.EmployeeID
+            for row in payroll_db.query(EmployeePayroll.EmployeeID).filter(payroll_filter)
+        )
+        
+        for id_chunk in chunked(sorted(changed_ids)):
+            hr_employees = {
+                emp.EmployeeID: emp
+                for emp in hr_db.query(Employee).filter(Employee.EmployeeID.in_(id_chunk))
+            }
+            payroll_employees = {
+                emp.EmployeeID: emp
+                for emp in payroll_db.query(EmployeePayroll).filter(
+                    EmployeePayroll.EmployeeID.in_(id_chunk)
+                )
+            }
+            for emp_id in id_chunk:
+                hr_emp = hr_employees.get(emp_id)
+                need = (
+                    SyncService._build_sync_need(hr_emp, payroll_employees.get(emp_id))
+                    if hr_emp else None
+                )
+                if need:
+                    state.Drift[emp_id] = need
+                else:
+                    state.Drift.pop(emp_id, None)
+        
+        state.HRWatermark = hr_watermark or state.HRWatermark
+        state.PayrollWatermark = payroll_watermark or state.PayrollWatermark
+        state.TotalEmployees = hr_db.query(func.count(Employee.EmployeeID)).scalar() or 0
+        state.CheckedAt = datetime.utcnow()
+        sync_state_store.save(state)
+        sync_event_broadcaster.publish_drift(state)
+        
+        return SyncService._state_to_response(state)
+    
+    @staticmethod
+    def _check_merkle(hr_db: Session, payroll_db: Session) -> SyncCheckResponse:
+        """
+        Full check qua merkle_reconciler: kết quả giống mode="full"
+        nhưng chỉ transfer fingerprints và rows của các leaf buckets lệch
+        """
+        # Watermarks lấy trước khi so sánh, giống _load_hr_side
+        hr_watermark, payroll_watermark = SyncService._current_watermarks(hr_db, payroll_db)
+        result = merkle_reconciler.diff(hr_db, payroll_db)
+        
+        drift = {}
+        for hr_emp in result.HRRows:
+            need = SyncService._build_sync_need(
+                hr_emp, result.PayrollRows.get(hr_emp.EmployeeID)
+            )
+            if need:
+                drift[hr_emp.EmployeeID] = need
+        
+        state = SyncDriftState(
+            HRWatermark=hr_watermark,
+            PayrollWatermark=payroll_watermark,
+            TotalEmployees=result.TotalEmployees,
+            Drift=drift
+        )
+        sync_state_store.save(state)
+        sync_event_broadcaster.publish_drift(state)
         
-        sync_needs = []
+        return SyncService._state_to_response(state)
+    
+    @staticmethod
+    def iter_sync_needs(
+        hr_db: Session,
+        payroll_db: Session,
+        batch_size: int = 1000
+    ) -> Iterator[Union[SyncNeed, SyncCheckSummary]]:
+        """
+        Stream version của full check: yield từng SyncNeed, cuối cùng là SyncCheckSummary
+        HR đọc qua server-side cursor, payroll lookup theo từng batch IDs
+        """
+        total_employees = 0
         need_sync_count = 0
-        already_synced_count = 0
         
-        for hr_emp in hr_employees:
-            payroll_emp = payroll_employees.get(hr_emp.EmployeeID)
-            
-            if not payroll_emp:
-                # Employee không tồn tại trong payroll -> cần INSERT
-                sync_needs.append(SyncNeed(
-                    EmployeeID=hr_emp.EmployeeID,
-                    FullName=hr_emp.FullName,
-                    Action="INSERT",
-                    Reason=f"Employee chưa tồn tại trong payroll system",
-                    HRData={
-                        "DepartmentID": hr_emp.DepartmentID,
-                        "PositionID": hr_emp.PositionID,
-                        "Status": hr_emp.Status
-                    },
-                    PayrollData=None
-                ))
-                need_sync_count += 1
-                
-            elif (payroll_emp.DepartmentID != hr_emp.DepartmentID or
-                  payroll_emp.PositionID != hr_emp.PositionID or
-                  payroll_emp.Status != hr_emp.Status or
-                  payroll_emp.FullName != hr_emp.FullName):
-                # Data không khớp -> cần UPDATE
-                changes = []
-                if payroll_emp.FullName != hr_emp.FullName:
-                    changes.append(f"FullName: {payroll_emp.FullName} -> {hr_emp.FullName}")
-                if payroll_emp.DepartmentID != hr_emp.DepartmentID:
-                    changes.append(f"DepartmentID: {payroll_emp.DepartmentID} -> {hr_emp.DepartmentID}")
-                if payroll_emp.PositionID != hr_emp.PositionID:
-                    changes.append(f"PositionID: {payroll_emp.PositionID} -> {hr_emp.PositionID}")
-                if payroll_emp.Status != hr_emp.Status:
-                    changes.append(f"Status: {payroll_emp.Status} -> {hr_emp.Status}")
-                
-                sync_needs.append(SyncNeed(
-                    EmployeeID=hr_emp.EmployeeID,
-                    FullName=hr_emp.FullName,
-                    Action="UPDATE",
-                    Reason=f"Thay đổi: {', '.join(changes)}",
-                    HRData={
-                        "DepartmentID": hr_emp.DepartmentID,
-                        "PositionID": hr_emp.PositionID,
-                        "Status": hr_emp.Status,
-                        "FullName": hr_emp.FullName
-                    },
-                    PayrollData={
-                        "DepartmentID": payroll_emp.DepartmentID,
-                        "PositionID": payroll_emp.PositionID,
-                        "Status": payroll_emp.Status,
-                        "FullName": payroll_emp.FullName
-                    }
-                ))
-                need_sync_count += 1
-            else:
-                # Đã sync, không cần action
-                already_synced_count += 1
+        stmt = select(Employee).order_by(Employee.EmployeeID)
+        result = hr_db.execute(stmt.execution_options(yield_per=batch_size)).scalars()
+        for hr_employees in result.partitions():
+            payroll_employees = {
+                emp.EmployeeID: emp
+                for emp in payroll_db.query(EmployeePayroll).filter(
+                    EmployeePayroll.EmployeeID.in_([hr_emp.EmployeeID for hr_emp in hr_employees])
+                )
+            }
+            for hr_emp in hr_employees:
+                total_employees += 1
+                need = SyncService._build_sync_need(
+                    hr_emp, payroll_employees.get(hr_emp.EmployeeID)
+                )
+                if need:
+                    need_sync_count += 1
+                    yield need
         
-        return SyncCheckResponse(
-            TotalEmployees=len(hr_employees),
+        yield SyncCheckSummary(
+            TotalEmployees=total_employees,
             NeedSync=need_sync_count,
-            AlreadySynced=already_synced_count,
+            AlreadySynced=total_employees - need_sync_count
+        )
+    
+    @staticmethod
+    def _current_watermarks(hr_db: Session, payroll_db: Session):
+        """MAX(UpdatedAt) bên HR và MAX(SyncedAt) bên Payroll"""
+        hr_watermark = hr_db.query(func.max(Employee.UpdatedAt)).scalar()
+        payroll_watermark = payroll_db.query(func.max(EmployeePayroll.SyncedAt)).scalar()
+        return hr_watermark, payroll_watermark
+    
+    @staticmethod
+    def _state_to_response(state: SyncDriftState) -> SyncCheckResponse:
+        """Build SyncCheckResponse từ drift set"""
+        sync_needs = [state.Drift[emp_id] for emp_id in sorted(state.Drift)]
+        return SyncCheckResponse(
+            TotalEmployees=state.TotalEmployees,
+            NeedSync=len(sync_needs),
+            AlreadySynced=max(state.TotalEmployees - len(sync_needs), 0),
             SyncNeeds=sync_needs
         )
     
+    @staticmethod
+    def _build_sync_need(hr_emp: Employee, payroll_emp) -> Optional[SyncNeed]:
+        """So sánh 1 employee giữa HR và Payroll, trả về None nếu đã sync"""
+        if not payroll_emp:
+            # Employee không tồn tại trong payroll -> cần INSERT
+            return SyncNeed(
+                EmployeeID=hr_emp.EmployeeID,
+                FullName=hr_emp.FullName,
+                Action="INSERT",
+                Reason=f"Employee chưa tồn tại trong payroll system",
+                HRData={
+                    "DepartmentID": hr_emp.DepartmentID,
+                    "PositionID": hr_emp.PositionID,
+                    "Status": hr_emp.Status
+                },
+                PayrollData=None
+            )
+        
+        if (payroll_emp.DepartmentID != hr_emp.DepartmentID or
+                payroll_emp.PositionID != hr_emp.PositionID or
+                payroll_emp.Status != hr_emp.Status or
+                payroll_emp.FullName != hr_emp.FullName):
+            # Data không khớp -> cần UPDATE
+            changes = []
+            if payroll_emp.FullName != hr_emp.FullName:
+                changes.append(f"FullName: {payroll_emp.FullName} -> {hr_emp.FullName}")
+            if payroll_emp.DepartmentID != hr_emp.DepartmentID:
+                changes.append(f"DepartmentID: {payroll_emp.DepartmentID} -> {hr_emp.DepartmentID}")
+            if payroll_emp.PositionID != hr_emp.PositionID:
+                changes.append(f"PositionID: {payroll_emp.PositionID} -> {hr_emp.PositionID}")
+            if payroll_emp.Status != hr_emp.Status:
+                changes.append(f"Status: {payroll_emp.Status} -> {hr_emp.Status}")
+            
+            return SyncNeed(
+                EmployeeID=hr_emp.EmployeeID,
+                FullName=hr_emp.FullName,
+                Action="UPDATE",
+                Reason=f"Thay đổi: {', '.join(changes)}",
+                HRData={
+                    "DepartmentID": hr_emp.DepartmentID,
+                    "PositionID": hr_emp.PositionID,
+                    "Status": hr_emp.Status,
+                    "FullName": hr_emp.FullName
+                },
+                PayrollData={
+                    "DepartmentID": payroll_emp.DepartmentID,
+                    "PositionID": payroll_emp.PositionID,
+                    "Status": payroll_emp.Status,
+                    "FullName": payroll_emp.FullName
+                }
+            )
+        
+        # Đã sync, không cần action
+        return None
+    
     @staticmethod
     def execute_sync(
         hr_db: Session,
@@ -119,6 +316,9 @@ class SyncService:
         synced_count = 0
         failed_count = 0
         details = []
+        written = []
+        # EmployeeID -> (DepartmentID cũ, DepartmentID mới) cho payroll summary table
+        moves = {}
         
         try:
             for emp_id in employee_ids:
@@ -153,6 +353,8 @@ class SyncService:
                             SyncedAt=datetime.utcnow()
                         )
                         payroll_db.add(new_payroll_emp)
+                        written.append(SyncService._to_snapshot(new_payroll_emp))
+                        moves[emp_id] = (None, hr_emp.DepartmentID)
                         
                         # Sync department nếu chưa tồn tại
                         if hr_emp.DepartmentID:
@@ -172,11 +374,13 @@ class SyncService:
                         
                     else:
                         # UPDATE existing employee (BR-04)
+                        moves[emp_id] = (payroll_emp.DepartmentID, hr_emp.DepartmentID)
                         payroll_emp.FullName = hr_emp.FullName
                         payroll_emp.DepartmentID = hr_emp.DepartmentID
                         payroll_emp.PositionID = hr_emp.PositionID
                         payroll_emp.Status = hr_emp.Status
                         payroll_emp.SyncedAt = datetime.utcnow()
+                        written.append(SyncService._to_snapshot(payroll_emp))
                         
                         # Sync department và position nếu cần
                         if hr_emp.DepartmentID:
@@ -200,8 +404,12 @@ class SyncService:
                     })
                     failed_count += 1
             
+            payroll_summary.apply_department_moves(payroll_db, moves)
+            
             # Commit all changes
             payroll_db.commit()
+            payroll_snapshot_cache.patch(written)
+            sync_event_broadcaster.publish_synced(row.EmployeeID for row in written)
             
             return SyncExecuteResponse(
                 Success=failed_count == 0,
@@ -213,6 +421,8 @@ class SyncService:
             
         except Exception as e:
             payroll_db.rollback()
+            payroll_snapshot_cache.invalidate()
+            reference_cache.invalidate_payroll()
             return SyncExecuteResponse(
                 Success=False,
                 Message=f"Sync failed: {str(e)}",
@@ -225,41 +435,189 @@ class SyncService:
             )
     
     @staticmethod
-    def _sync_department(hr_db: Session, payroll_db: Session, dept_id: int):
-        """Sync department nếu chưa tồn tại trong payroll"""
-        existing = payroll_db.query(DepartmentPayroll).filter(
-            DepartmentPayroll.DepartmentID == dept_id
-        ).first()
+    def execute_sync_bulk(
+        hr_db: Session,
+        payroll_db: Session,
+        employee_ids: List[int]
+    ) -> SyncExecuteResponse:
+        """
+        Set-based version của execute_sync
+        HR và Payroll rows được đọc bằng các câu IN (...) theo chunk,
+        departments/positions resolve một lần, ghi bằng multi-row upsert.
+        Details trả về giống execute_sync.
+        """
+        unique_ids = list(dict.fromkeys(employee_ids))
         
-        if not existing:
-            hr_dept = hr_db.query(Department).filter(
-                Department.DepartmentID == dept_id
-            ).first()
+        try:
+            hr_employees = {}
+            existing_departments = {}
+            for id_chunk in chunked(unique_ids):
+                hr_employees.update(
+                    (row.EmployeeID, row)
+                    for row in hr_db.query(
+                        Employee.EmployeeID, Employee.FullName, Employee.DepartmentID,
+                        Employee.PositionID, Employee.Status
+                    ).filter(Employee.EmployeeID.in_(id_chunk))
+                )
+                existing_departments.update(
+                    payroll_db.query(EmployeePayroll.EmployeeID, EmployeePayroll.DepartmentID).filter(
+                        EmployeePayroll.EmployeeID.in_(id_chunk)
+                    ).all()
+                )
+            
+            # Sync departments/positions một lần cho cả batch
+            SyncService._sync_departments_bulk(
+                hr_db, payroll_db,
+                {emp.DepartmentID for emp in hr_employees.values() if emp.DepartmentID}
+            )
+            SyncService._sync_positions_bulk(
+                hr_db, payroll_db,
+                {emp.PositionID for emp in hr_employees.values() if emp.PositionID}
+            )
+            
+            synced_at = datetime.utcnow()
+            bulk_upsert(
+                payroll_db,
+                EmployeePayroll,
+                [
+                    {
+                        "EmployeeID": emp.EmployeeID,
+                        "FullName": emp.FullName,
+                        "DepartmentID": emp.DepartmentID,
+                        "PositionID": emp.PositionID,
+                        "Status": emp.Status,
+                        "SyncedAt": synced_at
+                    }
+                    for emp in hr_employees.values()
+                ],
+                update_columns=["FullName", "DepartmentID", "PositionID", "Status", "SyncedAt"]
+            )
+            payroll_summary.apply_department_moves(payroll_db, {
+                emp_id: (existing_departments.get(emp_id), emp.DepartmentID)
+                for emp_id, emp in hr_employees.items()
+            })
             
-            if hr_dept:
-                new_dept = DepartmentPayroll(
-                    DepartmentID=hr_dept.DepartmentID,
-                    DepartmentName=hr_dept.DepartmentName,
-                    SyncedAt=datetime.utcnow()
+            # Commit all changes
+            payroll_db.commit()
+            payroll_snapshot_cache.patch(
+                PayrollSnapshot(
+                    EmployeeID=emp.EmployeeID,
+                    FullName=emp.FullName,
+                    DepartmentID=emp.DepartmentID,
+                    PositionID=emp.PositionID,
+                    Status=emp.Status,
+                    SyncedAt=synced_at
                 )
-                payroll_db.add(new_dept)
+                for emp in hr_employees.values()
+            )
+            sync_event_broadcaster.publish_synced(hr_employees.keys())
+            
+        except Exception as e:
+            payroll_db.rollback()
+            payroll_snapshot_cache.invalidate()
+            reference_cache.invalidate_payroll()
+            return SyncExecuteResponse(
+                Success=False,
+                Message=f"Sync failed: {str(e)}",
+                SyncedCount=0,
+                FailedCount=len(employee_ids),
+                Details=[{
+                    "Status": "failed",
+                    "Message": str(e)
+                }]
+            )
+        
+        details = []
+        for emp_id in unique_ids:
+            hr_emp = hr_employees.get(emp_id)
+            if not hr_emp:
+                details.append({
+                    "EmployeeID": emp_id,
+                    "Status": "failed",
+                    "Message": f"Employee {emp_id} không tồn tại trong HR database"
+                })
+            elif emp_id in existing_departments:
+                details.append({
+                    "EmployeeID": emp_id,
+                    "Action": "UPDATE",
+                    "Status": "success",
+                    "Message": f"Đã cập nhật thông tin {hr_emp.FullName}"
+                })
+            else:
+                details.append({
+                    "EmployeeID": emp_id,
+                    "Action": "INSERT",
+                    "Status": "success",
+                    "Message": f"Đã thêm {hr_emp.FullName} vào payroll system"
+                })
+        
+        synced_count = len(hr_employees)
+        failed_count = len(unique_ids) - synced_count
+        
+        return SyncExecuteResponse(
+            Success=failed_count == 0,
+            Message=f"Đã sync {synced_count}/{len(unique_ids)} employees",
+            SyncedCount=synced_count,
+            FailedCount=failed_count,
+            Details=details
+        )
+    
+    @staticmethod
+    def _to_snapshot(payroll_emp: EmployeePayroll) -> PayrollSnapshot:
+        """PayrollSnapshot của row vừa ghi, dùng để patch payroll_snapshot_cache"""
+        return PayrollSnapshot(
+            EmployeeID=payroll_emp.EmployeeID,
+            FullName=payroll_emp.FullName,
+            DepartmentID=payroll_emp.DepartmentID,
+            PositionID=payroll_emp.PositionID,
+            Status=payroll_emp.Status,
+            SyncedAt=payroll_emp.SyncedAt
+        )
+    
+    @staticmethod
+    def _sync_departments_bulk(hr_db: Session, payroll_db: Session, dept_ids: Set[int]):
+        """
+        Ghi các departments chưa có trong payroll bằng một câu upsert
+        reference_cache chỉ là hint để bỏ qua IDs đã có: cache có thể cũ (worker khác vừa insert)
+        nên ghi qua bulk_upsert thay vì INSERT để không lỗi duplicate key làm rollback cả batch
+        """
+        missing = sorted(dept_ids - reference_cache.payroll_departments.names(payroll_db).keys())
+        if not missing:
+            return
+        hr_departments = reference_cache.departments.names(hr_db)
+        synced_at = datetime.utcnow()
+        rows = [
+            {"DepartmentID": dept_id, "DepartmentName": hr_departments[dept_id], "SyncedAt": synced_at}
+            for dept_id in missing if dept_id in hr_departments
+        ]
+        if rows:
+            bulk_upsert(payroll_db, DepartmentPayroll, rows, update_columns=["DepartmentName", "SyncedAt"])
+            for row in rows:
+                reference_cache.payroll_departments.add(row["DepartmentID"], row["DepartmentName"])
+    
+    @staticmethod
+    def _sync_positions_bulk(hr_db: Session, payroll_db: Session, pos_ids: Set[int]):
+        """Ghi các positions chưa có trong payroll bằng một câu upsert (xem _sync_departments_bulk)"""
+        missing = sorted(pos_ids - reference_cache.payroll_positions.names(payroll_db).keys())
+        if not missing:
+            return
+        hr_positions = reference_cache.positions.names(hr_db)
+        synced_at = datetime.utcnow()
+        rows = [
+            {"PositionID": pos_id, "PositionName": hr_positions[pos_id], "SyncedAt": synced_at}
+            for pos_id in missing if pos_id in hr_positions
+        ]
+        if rows:
+            bulk_upsert(payroll_db, PositionPayroll, rows, update_columns=["PositionName", "SyncedAt"])
+            for row in rows:
+                reference_cache.payroll_positions.add(row["PositionID"], row["PositionName"])
+    
+    @staticmethod
+    def _sync_department(hr_db: Session, payroll_db: Session, dept_id: int):
+        """Sync department nếu chưa tồn tại trong payroll (lookup qua reference_cache, ghi bằng upsert)"""
+        SyncService._sync_departments_bulk(hr_db, payroll_db, {dept_id})
     
     @staticmethod
     def _sync_position(hr_db: Session, payroll_db: Session, pos_id: int):
-        """Sync position nếu chưa tồn tại trong payroll"""
-        existing = payroll_db.query(PositionPayroll).filter(
-            PositionPayroll.PositionID == pos_id
-        ).first()
-        
-        if not existing:
-            hr_pos = hr_db.query(Position).filter(
-                Position.PositionID == pos_id
-            ).first()
-            
-            if hr_pos:
-                new_pos = PositionPayroll(
-                    PositionID=hr_pos.PositionID,
-                    PositionName=hr_pos.PositionName,
-                    SyncedAt=datetime.utcnow()
-                )
-                payroll_db.add(new_pos)
+        """Sync position nếu chưa tồn tại trong payroll (lookup qua reference_cache, ghi bằng upsert)"""
+        SyncService._sync_positions_bulk(hr_db, payroll_db, {pos_id})
@@ -0,0 +1,61 @@
+"""
+Sync State Store - Persisted watermarks và drift set cho incremental sync check
+HRWatermark: MAX(Employees.UpdatedAt) đã xem ở lần check trước
+PayrollWatermark: MAX(employees_payroll.SyncedAt) đã xem ở lần check trước
+"""
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+from datetime import datetime
+from pathlib import Path
+import os
+import threading
+
+from .schemas import SyncNeed
+
+
+DEFAULT_STATE_PATH = Path(__file__).resolve().parents[3] / ".cache" / "sync_state.json"
+
+
+class SyncDriftState(BaseModel):
+    """Snapshot của lần sync check gần nhất"""
+    HRWatermark: Optional[datetime] = None
+    PayrollWatermark: Optional[datetime] = None
+    TotalEmployees: int = 0
+    Drift: Dict[int, SyncNeed] = Field(default_factory=dict)
+    CheckedAt: datetime = Field(default_factory=datetime.utcnow)
+
+
+class SyncStateStore:
+    """Persist SyncDriftState ra JSON file (atomic write)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.getenv("SYNC_STATE_PATH") or DEFAULT_STATE_PATH)
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[SyncDriftState]:
+        """Load state, trả về None nếu chưa có hoặc file hỏng"""
+        with self._lock:
+            if not self.path.exists():
+                return None
+            try:
+                return SyncDriftState.model_validate_json(self.path.read_text(encoding="utf-8"))
+            except Exception as e:
+                print(f"⚠️  Sync state unreadable, falling back to full check: {e}")
+                return None
+
+    def save(self, state: SyncDriftState):
+        """Ghi state qua file tạm rồi rename để tránh file dở dang"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(state.model_dump_json(), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+    def reset(self):
+        """Xoá state, lần check sau sẽ chạy full scan"""
+        with self._lock:
+            if self.path.exists():
+                self.path.unlink()
+
+
+sync_state_store = SyncStateStore()
@@ -0,0 +1,78 @@
+"""
+API Routes for Payroll Analytics Module
+Endpoints: /payroll/analytics/salaries, /payroll/analytics/attendance, /payroll/analytics/summary
+"""
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from datetime import date
+
+from ...database.connections import db_manager
+from ...core.fast_json import fast_json
+from .services import PayrollAnalyticsService
+from .summary import PAYROLL_SUMMARY_ENABLED, payroll_summary
+from .schemas import SalaryRollup, AttendanceRollup, PayrollSummary
+
+router = APIRouter(prefix="/payroll/analytics", tags=["Payroll Analytics"])
+
+
+def _require_payroll():
+    if not db_manager.mysql_available:
+        raise HTTPException(status_code=503, detail="Payroll database unavailable")
+
+
+def _require_summary():
+    _require_payroll()
+    if not PAYROLL_SUMMARY_ENABLED:
+        raise HTTPException(status_code=503, detail="Payroll summary disabled")
+
+
+@router.get("/salaries", response_model=List[SalaryRollup])
+def salary_rollup(
+    from_month: Optional[date] = Query(None, description="Tháng bắt đầu (YYYY-MM-DD, lấy theo tháng)"),
+    to_month: Optional[date] = Query(None, description="Tháng kết thúc (inclusive)"),
+    department_id: Optional[int] = Query(None, description="Filter by DepartmentID")
+):
+    """Tổng và trung bình NetSalary, Bonus, Deductions theo department × month"""
+    _require_payroll()
+    with db_manager.get_payroll_db() as payroll_db:
+        rollups = PayrollAnalyticsService.salary_rollup(payroll_db, from_month, to_month, department_id)
+        return fast_json(rollups)
+
+
+@router.get("/attendance", response_model=List[AttendanceRollup])
+def attendance_rollup(
+    from_month: Optional[date] = Query(None, description="Tháng bắt đầu (YYYY-MM-DD, lấy theo tháng)"),
+    to_month: Optional[date] = Query(None, description="Tháng kết thúc (inclusive)"),
+    department_id: Optional[int] = Query(None, description="Filter by DepartmentID")
+):
+    """Ngày công và attendance/absence/leave rates theo department × month"""
+    _require_payroll()
+    with db_manager.get_payroll_db() as payroll_db:
+        rollups = PayrollAnalyticsService.attendance_rollup(payroll_db, from_month, to_month, department_id)
+        return fast_json(rollups)
+
+
+@router.get("/summary", response_model=List[PayrollSummary])
+def payroll_summary_rows(
+    from_month: Optional[date] = Query(None, description="Tháng bắt đầu (YYYY-MM-DD, lấy theo tháng)"),
+    to_month: Optional[date] = Query(None, description="Tháng kết thúc (inclusive)"),
+    department_id: Optional[int] = Query(None, description="Filter by DepartmentID (-1 = chưa phân công)")
+):
+    """
+    Headcount, gross/net salary, deductions và ngày công theo department × month
+    Đọc từ summary table (refresh incremental), không scan salaries/attendance
+    """
+    _require_summary()
+    with db_manager.get_payroll_db() as payroll_db:
+        return fast_json(payroll_summary.read(payroll_db, from_month, to_month, department_id))
+
+
+@router.post("/summary/refresh")
+def refresh_payroll_summary(
+    full: bool = Query(False, description="Tính lại toàn bộ thay vì chỉ các tháng thay đổi")
+):
+    """Refresh summary table ngay (bỏ qua probe interval)"""
+    _require_summary()
+    with db_manager.get_payroll_db() as payroll_db:
+        payroll_summary.refresh(payroll_db, full=full, force=True)
+        return payroll_summary.stats()
@@ -0,0 +1,68 @@
+"""
+Pydantic Schemas for Payroll Analytics Module
+Rollups theo department × month cho salaries và attendance, summary table rows
+"""
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Optional
+from decimal import Decimal
+
+
+# ============================================================================
+# Salary Schemas
+# ============================================================================
+
+class SalaryRollup(BaseModel):
+    """Tổng/trung bình lương của một department trong một tháng"""
+    DepartmentID: Optional[int] = None
+    DepartmentName: str
+    Month: date
+    EmployeeCount: int
+    TotalNetSalary: Decimal
+    MeanNetSalary: Decimal
+    TotalBonus: Decimal
+    MeanBonus: Decimal
+    TotalDeductions: Decimal
+    MeanDeductions: Decimal
+
+
+# ============================================================================
+# Attendance Schemas
+# ============================================================================
+
+class AttendanceRollup(BaseModel):
+    """Chấm công của một department trong một tháng"""
+    DepartmentID: Optional[int] = None
+    DepartmentName: str
+    Month: date
+    EmployeeCount: int
+    WorkDays: int
+    AbsentDays: int
+    LeaveDays: int
+    AttendanceRate: float
+    AbsenceRate: float
+    LeaveRate: float
+
+
+# ============================================================================
+# Summary Schemas
+# ============================================================================
+
+class PayrollSummary(BaseModel):
+    """Một row của payroll_department_month_summary"""
+    DepartmentID: Optional[int] = None
+    DepartmentName: str
+    Month: date
+    Headcount: int
+    GrossSalary: Decimal
+    NetSalary: Decimal
+    Deductions: Decimal
+    Bonus: Decimal
+    AttendanceHeadcount: int
+    WorkDays: int
+    AbsentDays: int
+    LeaveDays: int
+    AttendanceRate: float
+    AbsenceRate: float
+    LeaveRate: float
+    RefreshedAt: Optional[datetime] = None
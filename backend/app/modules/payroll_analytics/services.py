@@ -0,0 +1,283 @@
+"""
+Payroll Analytics Services - Rollups theo department × month
+Mỗi rollup là một SELECT các cột cần thiết (Core rows, không ORM objects),
+group và aggregate bằng NumPy (np.unique + np.bincount) thay vì vòng lặp Python
+Tiền được đọc dưới dạng integer cents nên tổng chính xác tuyệt đối
+"""
+from sqlalchemy import BigInteger, and_, cast, extract, func, or_, select
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+from ...database.models_payroll import EmployeePayroll, DepartmentPayroll, Salary, Attendance
+from .schemas import SalaryRollup, AttendanceRollup
+
+
+# Group key = (DepartmentID + 1) << MONTH_BITS | month index (year * 12 + month - 1)
+MONTH_BITS = 20
+MONTH_MASK = (1 << MONTH_BITS) - 1
+# DepartmentID NULL (employee chưa có trong employees_payroll hoặc chưa phân công)
+NO_DEPARTMENT = -1
+CENT = Decimal("0.01")
+
+
+def _month_index(column):
+    """year * 12 + month - 1, tính trong SQL để không phải parse date objects"""
+    return extract("year", column) * 12 + extract("month", column) - 1
+
+
+def _cents(column):
+    """DECIMAL(12, 2) -> BIGINT cents (ROUND trước CAST để tránh lỗi làm tròn của REAL/FLOAT)"""
+    return cast(func.round(func.coalesce(column, 0) * 100), BigInteger)
+
+
+def _month_date(index: int) -> date:
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _money(cents) -> Decimal:
+    return (Decimal(int(cents)) / 100).quantize(CENT)
+
+
+def _columns(rows, dtype=np.int64) -> List[np.ndarray]:
+    """Rows -> một array cho mỗi cột"""
+    if not rows:
+        return []
+    return [np.array(column, dtype=dtype) for column in zip(*rows)]
+
+
+class RollupSource(NamedTuple):
+    """Bảng nguồn của rollups: salaries hoặc attendance"""
+    model: type
+    id_column: Any
+    employee_column: Any
+    month_column: Any
+
+
+SALARIES = RollupSource(Salary, Salary.SalaryID, Salary.EmployeeID, Salary.SalaryMonth)
+ATTENDANCE = RollupSource(Attendance, Attendance.AttendanceID, Attendance.EmployeeID, Attendance.AttendanceMonth)
+
+
+class Aggregates(NamedTuple):
+    """Kết quả group theo department × month (sau khi bỏ rows trùng)"""
+    keys: List[Tuple[Optional[int], int]]  # (DepartmentID hoặc None, month index)
+    source_rows: np.ndarray  # số rows gốc mỗi group, kể cả rows trùng
+    employees: np.ndarray    # số employees mỗi group
+    totals: List[np.ndarray]  # tổng của từng value column
+
+
+def rates(work_days: np.ndarray, absent_days: np.ndarray, leave_days: np.ndarray):
+    """Attendance/absence/leave rates trên tổng ngày, tháng không có ngày nào thì rates = 0"""
+    scheduled = work_days + absent_days + leave_days
+    denominator = np.where(scheduled > 0, scheduled, 1)
+    return tuple(np.round(days / denominator, 4) for days in (work_days, absent_days, leave_days))
+
+
+def month_ranges(months: Iterable[int]) -> List[Tuple[date, date]]:
+    """Month indexes -> các khoảng [start, end) liên tiếp, để filter theo index của cột tháng"""
+    ranges = []
+    for month in sorted(set(months)):
+        if ranges and ranges[-1][1] == month:
+            ranges[-1][1] = month + 1
+        else:
+            ranges.append([month, month + 1])
+    return [(_month_date(start), _month_date(end)) for start, end in ranges]
+
+
+def in_months(month_column, months: Iterable[int]):
+    """Filter theo khoảng date thay vì month index để dùng được index của cột tháng"""
+    return or_(*[
+        and_(month_column >= start, month_column < end) for start, end in month_ranges(months)
+    ])
+
+
+class PayrollAnalyticsService:
+    """Salary và attendance rollups"""
+
+    @staticmethod
+    def salary_rollup(
+        payroll_db: Session,
+        from_month: Optional[date] = None,
+        to_month: Optional[date] = None,
+        department_id: Optional[int] = None
+    ) -> List[SalaryRollup]:
+        """Tổng và trung bình NetSalary, Bonus, Deductions theo department × month"""
+        aggregates = PayrollAnalyticsService.aggregate(
+            payroll_db, SALARIES,
+            [_cents(Salary.NetSalary), _cents(Salary.Bonus), _cents(Salary.Deductions)],
+            from_month, to_month,
+            department_ids=None if department_id is None else [department_id]
+        )
+        if aggregates is None:
+            return []
+
+        names = PayrollAnalyticsService._department_names(payroll_db)
+        rollups = []
+        for index, (dept_id, month) in enumerate(aggregates.keys):
+            count = int(aggregates.employees[index])
+            net_total, bonus_total, deductions_total = (total[index] for total in aggregates.totals)
+            rollups.append(SalaryRollup(
+                DepartmentID=dept_id,
+                DepartmentName=names.get(dept_id, "Chưa phân công"),
+                Month=_month_date(month),
+                EmployeeCount=count,
+                TotalNetSalary=_money(net_total),
+                MeanNetSalary=_money(round(net_total / count)),
+                TotalBonus=_money(bonus_total),
+                MeanBonus=_money(round(bonus_total / count)),
+                TotalDeductions=_money(deductions_total),
+                MeanDeductions=_money(round(deductions_total / count)),
+            ))
+        return rollups
+
+    @staticmethod
+    def attendance_rollup(
+        payroll_db: Session,
+        from_month: Optional[date] = None,
+        to_month: Optional[date] = None,
+        department_id: Optional[int] = None
+    ) -> List[AttendanceRollup]:
+        """
+        Ngày công theo department × month
+        Rates tính trên tổng ngày (WorkDays + AbsentDays + LeaveDays)
+        """
+        aggregates = PayrollAnalyticsService.aggregate(
+            payroll_db, ATTENDANCE,
+            [
+                Attendance.WorkDays,
+                func.coalesce(Attendance.AbsentDays, 0),
+                func.coalesce(Attendance.LeaveDays, 0),
+            ],
+            from_month, to_month,
+            department_ids=None if department_id is None else [department_id]
+        )
+        if aggregates is None:
+            return []
+
+        work_days, absent_days, leave_days = (total.astype(np.int64) for total in aggregates.totals)
+        attendance_rate, absence_rate, leave_rate = rates(work_days, absent_days, leave_days)
+
+        names = PayrollAnalyticsService._department_names(payroll_db)
+        return [
+            AttendanceRollup(
+                DepartmentID=dept_id,
+                DepartmentName=names.get(dept_id, "Chưa phân công"),
+                Month=_month_date(month),
+                EmployeeCount=int(aggregates.employees[index]),
+                WorkDays=int(work_days[index]),
+                AbsentDays=int(absent_days[index]),
+                LeaveDays=int(leave_days[index]),
+                AttendanceRate=float(attendance_rate[index]),
+                AbsenceRate=float(absence_rate[index]),
+                LeaveRate=float(leave_rate[index]),
+            )
+            for index, (dept_id, month) in enumerate(aggregates.keys)
+        ]
+
+    @staticmethod
+    def aggregate(
+        payroll_db: Session,
+        source: RollupSource,
+        values: List[Any],
+        from_month: Optional[date] = None,
+        to_month: Optional[date] = None,
+        department_ids: Optional[Iterable[int]] = None,
+        months: Optional[Iterable[int]] = None,
+        employee_ids: Optional[List[int]] = None
+    ) -> Optional[Aggregates]:
+        """
+        SELECT các cột cần thiết của source, bỏ rows trùng và group theo department × month
+        values: SQL expressions trả về integer (cents, ngày công), được cộng cho mỗi group
+        department_ids: NO_DEPARTMENT để lấy rows chưa phân công
+        months: chỉ tính các month indexes này (dùng cho refresh incremental)
+        employee_ids: chỉ tính rows của các employees này (tối đa MAX_IN_PARAMS)
+        Returns None nếu không có row nào
+        """
+        if months is not None:
+            months = list(months)
+            if not months:
+                return None
+        stmt = select(
+            source.id_column,
+            func.coalesce(source.employee_column, -source.id_column),
+            _month_index(source.month_column),
+            func.coalesce(EmployeePayroll.DepartmentID, NO_DEPARTMENT),
+            *values
+        ).select_from(source.model)
+        stmt = PayrollAnalyticsService._scoped(
+            stmt, source.employee_column, source.month_column,
+            from_month, to_month, department_ids, months
+        )
+        if employee_ids is not None:
+            stmt = stmt.where(source.employee_column.in_(employee_ids))
+        columns = _columns(payroll_db.execute(stmt).all())
+        if not columns:
+            return None
+
+        row_ids, emp_ids, month_ids, dept_ids = columns[:4]
+        kept = np.zeros(len(row_ids), dtype=bool)
+        kept[PayrollAnalyticsService._latest_per_employee_month(emp_ids, month_ids, row_ids)] = True
+        # Group trên tất cả rows (kể cả rows trùng) để đếm rows gốc trong cùng một pass
+        groups, inverse, source_rows = PayrollAnalyticsService._group(dept_ids, month_ids)
+        # bincount cộng bằng float64: chính xác tới 2^53 cents mỗi group
+        employees = np.bincount(inverse, weights=kept, minlength=len(groups)).astype(np.int64)
+        totals = [
+            np.bincount(inverse, weights=np.where(kept, column, 0), minlength=len(groups))
+            for column in columns[4:]
+        ]
+        return Aggregates(PayrollAnalyticsService._decode(groups), source_rows, employees, totals)
+
+    @staticmethod
+    def _scoped(stmt, employee_column, month_column, from_month, to_month, department_ids, months):
+        """Join employees_payroll lấy DepartmentID, filter tháng/department ngay trong SQL"""
+        stmt = stmt.outerjoin(EmployeePayroll, EmployeePayroll.EmployeeID == employee_column)
+        conditions = []
+        if from_month:
+            conditions.append(month_column >= from_month.replace(day=1))
+        if to_month:
+            conditions.append(month_column <= to_month)
+        if department_ids is not None:
+            conditions.append(
+                func.coalesce(EmployeePayroll.DepartmentID, NO_DEPARTMENT).in_(list(department_ids))
+            )
+        if months is not None:
+            conditions.append(in_months(month_column, months))
+        return stmt.where(and_(*conditions)) if conditions else stmt
+
+    @staticmethod
+    def _latest_per_employee_month(emp_ids: np.ndarray, months: np.ndarray, row_ids: np.ndarray) -> np.ndarray:
+        """
+        Dump payroll có records trùng (import hai lần): mỗi (EmployeeID, month)
+        chỉ giữ row mới nhất (ID lớn nhất). Rows không có EmployeeID đã được gán -ID nên không bị gộp
+        Returns indices của rows được giữ
+        """
+        order = np.lexsort((row_ids, months, emp_ids))
+        emp_sorted = emp_ids[order]
+        month_sorted = months[order]
+        is_last = np.ones(len(order), dtype=bool)
+        is_last[:-1] = (emp_sorted[1:] != emp_sorted[:-1]) | (month_sorted[1:] != month_sorted[:-1])
+        return order[is_last]
+
+    @staticmethod
+    def _group(dept_ids: np.ndarray, months: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(group keys đã sort, group index của mỗi row, số rows mỗi group)"""
+        keys = ((dept_ids + 1) << MONTH_BITS) | months
+        groups, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        return groups, inverse, counts
+
+    @staticmethod
+    def _decode(groups: np.ndarray) -> List[Tuple[Optional[int], int]]:
+        """Group keys -> (DepartmentID hoặc None, month index)"""
+        dept_ids = (groups >> MONTH_BITS) - 1
+        months = groups & MONTH_MASK
+        return [
+            (None if dept_id == NO_DEPARTMENT else int(dept_id), int(month))
+            for dept_id, month in zip(dept_ids.tolist(), months.tolist())
+        ]
+
+    @staticmethod
+    def _department_names(payroll_db: Session) -> Dict[Optional[int], str]:
+        return dict(payroll_db.query(DepartmentPayroll.DepartmentID, DepartmentPayroll.DepartmentName).all())
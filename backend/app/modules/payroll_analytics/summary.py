@@ -0,0 +1,392 @@
+"""
+Payroll Summary Table - Materialized department × month totals trong payroll_2026
+payroll_department_month_summary giữ headcount, gross, net, deductions và ngày công
+của mỗi department × month để KPI reads chỉ đọc O(departments) rows thay vì scan lịch sử lương.
+
+Refresh incremental:
+- salaries/attendance thay đổi: tính lại các tháng có rows UpdatedAt >= watermark;
+  rows bị xóa (hoặc chuyển tháng) để lại tombstones qua triggers, refresh tính lại các tháng đó
+- execute_sync đổi department của employees: chuyển phần đóng góp của họ từ cell cũ sang cell mới,
+  trong cùng transaction với sync
+Refresh và department moves cùng khóa rows của payroll_summary_state (SELECT ... FOR UPDATE)
+nên không ghi đè lên nhau giữa các workers
+Mỗi lần refresh chỉ ghi các rows có giá trị thay đổi
+"""
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import date, datetime
+import os
+import threading
+import time
+
+import numpy as np
+
+from ...database.models_payroll import (
+    DepartmentPayroll, PayrollDepartmentMonthSummary, PayrollSummaryState, PayrollSummaryTombstone,
+    Salary, Attendance
+)
+from ...database.query_utils import bulk_upsert, chunked
+from .schemas import PayrollSummary
+from .services import (
+    ATTENDANCE, NO_DEPARTMENT, SALARIES, PayrollAnalyticsService, RollupSource,
+    _cents, _money, _month_date, _month_index, in_months, rates
+)
+
+
+PAYROLL_SUMMARY_ENABLED = os.getenv("PAYROLL_SUMMARY_ENABLED", "true").lower() == "true"
+
+SOURCES: Dict[str, RollupSource] = {"salaries": SALARIES, "attendance": ATTENDANCE}
+# Cột của summary row, theo thứ tự so sánh khi quyết định có cần ghi lại không
+VALUE_COLUMNS = [
+    "Headcount", "GrossSalary", "NetSalary", "Deductions", "Bonus",
+    "AttendanceHeadcount", "WorkDays", "AbsentDays", "LeaveDays",
+    "SalaryRows", "AttendanceRows",
+]
+
+Cell = Tuple[int, int]  # (DepartmentID, month index)
+
+
+def _empty_cell() -> dict:
+    return {column: 0 for column in VALUE_COLUMNS}
+
+
+class PayrollSummaryTable:
+    """Refresh và đọc payroll_department_month_summary"""
+
+    def __init__(self, probe_seconds: float):
+        self.probe_seconds = probe_seconds
+        self._lock = threading.Lock()
+        self._probed_at = 0.0
+        # Đặt khi cập nhật incremental thất bại: lần refresh sau tính lại toàn bộ
+        self._stale = False
+        self.refreshes = 0
+        self.full_refreshes = 0
+        self.months_recomputed = 0
+        self.rows_written = 0
+        self.rows_deleted = 0
+        self.moves_applied = 0
+        self.move_failures = 0
+
+    def refresh(self, payroll_db: Session, full: bool = False, force: bool = False) -> bool:
+        """
+        Đưa summary table về khớp salaries/attendance (commit)
+        Không full/force thì probe tối đa mỗi probe_seconds
+        Returns True nếu đã chạy refresh
+        """
+        with self._lock:
+            now = time.monotonic()
+            full = full or self._stale
+            if not (full or force) and now - self._probed_at < self.probe_seconds:
+                return False
+
+            # Statement đầu tiên của transaction: chờ sync đang chuyển department commit,
+            # snapshot của các reads sau đó đã thấy DepartmentID mới
+            states = {
+                state.Source: state
+                for state in payroll_db.query(PayrollSummaryState).with_for_update()
+            }
+            # Watermarks lấy trước khi đọc rows để không bỏ sót rows ghi trong lúc refresh
+            watermarks = {
+                name: payroll_db.query(func.max(source.model.UpdatedAt)).scalar()
+                for name, source in SOURCES.items()
+            }
+            tombstones = self._tombstones(payroll_db)
+            full = full or any(name not in states for name in SOURCES)
+
+            if full:
+                self._recompute(payroll_db)
+                self.full_refreshes += 1
+            else:
+                months = set(tombstones.values())
+                for name, source in SOURCES.items():
+                    months |= self._changed_months(payroll_db, source, states[name].Watermark)
+                self._recompute(payroll_db, months=months)
+            self._clear_tombstones(payroll_db, tombstones)
+
+            refreshed_at = datetime.utcnow()
+            bulk_upsert(
+                payroll_db,
+                PayrollSummaryState,
+                [
+                    {"Source": name, "Watermark": watermark, "RefreshedAt": refreshed_at}
+                    for name, watermark in watermarks.items()
+                ],
+                update_columns=["Watermark", "RefreshedAt"]
+            )
+            payroll_db.commit()
+            self._stale = False
+            self._probed_at = now
+            self.refreshes += 1
+            return True
+
+    def apply_department_moves(
+        self,
+        payroll_db: Session,
+        moves: Dict[int, Tuple[Optional[int], Optional[int]]]
+    ):
+        """
+        Gọi trong execute_sync trước commit, sau khi đã gán DepartmentID mới
+        moves: EmployeeID -> (DepartmentID cũ, DepartmentID mới), None = chưa phân công
+        Rows trùng được bỏ theo (EmployeeID, month) nên phần đóng góp của mỗi employee độc lập:
+        chỉ đọc rows của employees bị chuyển, trừ khỏi cell cũ và cộng vào cell mới.
+        Khóa state rows tới khi sync commit nên refresh không chạy xen giữa; cells đọc bằng
+        locking read (bản commit mới nhất) trước khi cộng delta.
+        Chạy trong savepoint; lỗi thì không làm fail sync mà đánh dấu stale để lần refresh sau tính lại toàn bộ
+        """
+        groups: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for emp_id, (old_dept, new_dept) in moves.items():
+            if old_dept != new_dept:
+                groups[(self._department(old_dept), self._department(new_dept))].append(emp_id)
+        if not PAYROLL_SUMMARY_ENABLED or not groups:
+            return
+
+        try:
+            with payroll_db.begin_nested():
+                # Summary chưa được build: lần refresh đầu tiên sẽ tính toàn bộ
+                if not payroll_db.query(PayrollSummaryState.Source).with_for_update().all():
+                    return
+                deltas: Dict[Cell, dict] = defaultdict(_empty_cell)
+                for (old_dept, new_dept), emp_ids in groups.items():
+                    for id_chunk in chunked(emp_ids):
+                        for (_, month), values in self._compute_cells(payroll_db, employee_ids=id_chunk).items():
+                            for column, value in values.items():
+                                deltas[(old_dept, month)][column] -= value
+                                deltas[(new_dept, month)][column] += value
+
+                stored = self._stored_cells(
+                    payroll_db, {month for _, month in deltas}, {dept_id for dept_id, _ in deltas},
+                    for_update=True
+                )
+                cells = {}
+                for cell, delta in deltas.items():
+                    values = stored.get(cell) or _empty_cell()
+                    cells[cell] = {column: values[column] + delta[column] for column in VALUE_COLUMNS}
+                self._write(payroll_db, cells, {cell: stored[cell] for cell in cells if cell in stored})
+            self.moves_applied += sum(len(emp_ids) for emp_ids in groups.values())
+        except Exception as e:
+            self.move_failures += 1
+            self._stale = True
+            print(f"⚠️ Payroll summary update failed, full refresh scheduled: {e}")
+
+    def read(
+        self,
+        payroll_db: Session,
+        from_month: Optional[date] = None,
+        to_month: Optional[date] = None,
+        department_id: Optional[int] = None
+    ) -> List[PayrollSummary]:
+        """Refresh (throttled) rồi đọc summary rows, department_id = -1 cho employees chưa phân công"""
+        self.refresh(payroll_db)
+
+        query = payroll_db.query(PayrollDepartmentMonthSummary)
+        if from_month:
+            query = query.filter(PayrollDepartmentMonthSummary.SummaryMonth >= from_month.replace(day=1))
+        if to_month:
+            query = query.filter(PayrollDepartmentMonthSummary.SummaryMonth <= to_month)
+        if department_id is not None:
+            query = query.filter(PayrollDepartmentMonthSummary.DepartmentID == department_id)
+        rows = query.order_by(
+            PayrollDepartmentMonthSummary.DepartmentID, PayrollDepartmentMonthSummary.SummaryMonth
+        ).all()
+        if not rows:
+            return []
+
+        names = dict(payroll_db.query(DepartmentPayroll.DepartmentID, DepartmentPayroll.DepartmentName).all())
+        attendance_rate, absence_rate, leave_rate = rates(*(
+            np.array([getattr(row, column) for row in rows], dtype=np.int64)
+            for column in ("WorkDays", "AbsentDays", "LeaveDays")
+        ))
+        summaries = []
+        for index, row in enumerate(rows):
+            dept_id = None if row.DepartmentID == NO_DEPARTMENT else row.DepartmentID
+            summaries.append(PayrollSummary(
+                DepartmentID=dept_id,
+                DepartmentName=names.get(dept_id, "Chưa phân công"),
+                Month=row.SummaryMonth,
+                Headcount=row.Headcount,
+                GrossSalary=row.GrossSalary,
+                NetSalary=row.NetSalary,
+                Deductions=row.Deductions,
+                Bonus=row.Bonus,
+                AttendanceHeadcount=row.AttendanceHeadcount,
+                WorkDays=row.WorkDays,
+                AbsentDays=row.AbsentDays,
+                LeaveDays=row.LeaveDays,
+                AttendanceRate=float(attendance_rate[index]),
+                AbsenceRate=float(absence_rate[index]),
+                LeaveRate=float(leave_rate[index]),
+                RefreshedAt=row.RefreshedAt,
+            ))
+        return summaries
+
+    @staticmethod
+    def _changed_months(payroll_db: Session, source: RollupSource, watermark: Optional[datetime]) -> Set[int]:
+        """Các tháng có rows ghi từ lần refresh trước (watermark None: bảng nguồn lúc đó còn rỗng)"""
+        stmt = select(_month_index(source.month_column)).distinct()
+        if watermark is not None:
+            # Dùng >= để không bỏ sót rows có cùng timestamp với watermark
+            stmt = stmt.where(source.model.UpdatedAt >= watermark)
+        return set(payroll_db.scalars(stmt))
+
+    @staticmethod
+    def _tombstones(payroll_db: Session) -> Dict[int, int]:
+        """TombstoneID -> month index của rows bị xóa/chuyển tháng từ lần refresh trước"""
+        return {
+            tombstone_id: month.year * 12 + month.month - 1
+            for tombstone_id, month in payroll_db.query(
+                PayrollSummaryTombstone.TombstoneID, PayrollSummaryTombstone.SourceMonth
+            )
+        }
+
+    @staticmethod
+    def _clear_tombstones(payroll_db: Session, tombstones: Dict[int, int]):
+        """Chỉ xóa tombstones đã đọc: tombstones commit sau snapshot để lại cho lần refresh sau"""
+        for id_chunk in chunked(sorted(tombstones)):
+            payroll_db.query(PayrollSummaryTombstone).filter(
+                PayrollSummaryTombstone.TombstoneID.in_(id_chunk)
+            ).delete(synchronize_session=False)
+
+    def _recompute(
+        self,
+        payroll_db: Session,
+        months: Optional[Iterable[int]] = None
+    ):
+        """Tính lại cells của months (None = tất cả), ghi cells thay đổi và xóa cells không còn rows"""
+        if months is not None:
+            months = set(months)
+            if not months:
+                return
+        cells = self._compute_cells(payroll_db, months=months)
+        self._write(payroll_db, cells, self._stored_cells(payroll_db, months))
+        self.months_recomputed += len(months) if months is not None else len({month for _, month in cells})
+
+    @staticmethod
+    def _compute_cells(
+        payroll_db: Session,
+        months: Optional[Set[int]] = None,
+        employee_ids: Optional[List[int]] = None
+    ) -> Dict[Cell, dict]:
+        """Summary values theo department × month, tính bằng PayrollAnalyticsService.aggregate"""
+        cells: Dict[Cell, dict] = defaultdict(_empty_cell)
+        salaries = PayrollAnalyticsService.aggregate(
+            payroll_db, SALARIES,
+            [
+                _cents(Salary.BaseSalary) + _cents(Salary.Bonus),
+                _cents(Salary.NetSalary),
+                _cents(Salary.Deductions),
+                _cents(Salary.Bonus),
+            ],
+            months=months, employee_ids=employee_ids
+        )
+        if salaries is not None:
+            for index, (dept_id, month) in enumerate(salaries.keys):
+                cell = cells[(PayrollSummaryTable._department(dept_id), month)]
+                cell["Headcount"] = int(salaries.employees[index])
+                cell["SalaryRows"] = int(salaries.source_rows[index])
+                for column, total in zip(("GrossSalary", "NetSalary", "Deductions", "Bonus"), salaries.totals):
+                    cell[column] = _money(total[index])
+
+        attendance = PayrollAnalyticsService.aggregate(
+            payroll_db, ATTENDANCE,
+            [
+                Attendance.WorkDays,
+                func.coalesce(Attendance.AbsentDays, 0),
+                func.coalesce(Attendance.LeaveDays, 0),
+            ],
+            months=months, employee_ids=employee_ids
+        )
+        if attendance is not None:
+            for index, (dept_id, month) in enumerate(attendance.keys):
+                cell = cells[(PayrollSummaryTable._department(dept_id), month)]
+                cell["AttendanceHeadcount"] = int(attendance.employees[index])
+                cell["AttendanceRows"] = int(attendance.source_rows[index])
+                for column, total in zip(("WorkDays", "AbsentDays", "LeaveDays"), attendance.totals):
+                    cell[column] = int(total[index])
+        return cells
+
+    def _write(self, payroll_db: Session, cells: Dict[Cell, dict], stored: Dict[Cell, dict]):
+        """Upsert cells có giá trị khác stored, xóa cells stored không còn rows nguồn"""
+        refreshed_at = datetime.utcnow()
+        changed = [
+            {
+                "DepartmentID": dept_id,
+                "SummaryMonth": _month_date(month),
+                **values,
+                "RefreshedAt": refreshed_at,
+            }
+            for (dept_id, month), values in cells.items()
+            if (values["SalaryRows"] or values["AttendanceRows"]) and stored.get((dept_id, month)) != values
+        ]
+        removed = [
+            (dept_id, _month_date(month))
+            for (dept_id, month) in stored
+            if not (cells.get((dept_id, month)) or {}).get("SalaryRows")
+            and not (cells.get((dept_id, month)) or {}).get("AttendanceRows")
+        ]
+
+        if changed:
+            bulk_upsert(
+                payroll_db, PayrollDepartmentMonthSummary, changed,
+                update_columns=VALUE_COLUMNS + ["RefreshedAt"]
+            )
+        for start in range(0, len(removed), 500):
+            payroll_db.query(PayrollDepartmentMonthSummary).filter(
+                tuple_(
+                    PayrollDepartmentMonthSummary.DepartmentID, PayrollDepartmentMonthSummary.SummaryMonth
+                ).in_(removed[start:start + 500])
+            ).delete(synchronize_session=False)
+        self.rows_written += len(changed)
+        self.rows_deleted += len(removed)
+
+    @staticmethod
+    def _stored_cells(
+        payroll_db: Session,
+        months: Optional[Set[int]] = None,
+        department_ids: Optional[Set[int]] = None,
+        for_update: bool = False
+    ) -> Dict[Cell, dict]:
+        """
+        Summary rows hiện có trong phạm vi months × department_ids (None = tất cả)
+        for_update: locking read, đọc bản commit mới nhất thay vì snapshot của transaction
+        """
+        query = payroll_db.query(
+            PayrollDepartmentMonthSummary.DepartmentID,
+            PayrollDepartmentMonthSummary.SummaryMonth,
+            *[getattr(PayrollDepartmentMonthSummary, column) for column in VALUE_COLUMNS]
+        )
+        if months is not None:
+            if not months:
+                return {}
+            query = query.filter(in_months(PayrollDepartmentMonthSummary.SummaryMonth, months))
+        if department_ids is not None:
+            query = query.filter(PayrollDepartmentMonthSummary.DepartmentID.in_(department_ids))
+        if for_update:
+            query = query.with_for_update()
+        return {
+            (row[0], row[1].year * 12 + row[1].month - 1): dict(zip(VALUE_COLUMNS, row[2:]))
+            for row in query
+        }
+
+    @staticmethod
+    def _department(dept_id: Optional[int]) -> int:
+        return NO_DEPARTMENT if dept_id is None else dept_id
+
+    def stats(self) -> dict:
+        return {
+            "Enabled": PAYROLL_SUMMARY_ENABLED,
+            "Stale": self._stale,
+            "Refreshes": self.refreshes,
+            "FullRefreshes": self.full_refreshes,
+            "MonthsRecomputed": self.months_recomputed,
+            "RowsWritten": self.rows_written,
+            "RowsDeleted": self.rows_deleted,
+            "MovesApplied": self.moves_applied,
+            "MoveFailures": self.move_failures,
+        }
+
+
+payroll_summary = PayrollSummaryTable(
+    probe_seconds=float(os.getenv("PAYROLL_SUMMARY_PROBE_SECONDS", "5"))
+)
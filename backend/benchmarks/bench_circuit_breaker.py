@@ -0,0 +1,114 @@
+"""
+Benchmark: thời gian requests chờ khi payroll database down, có và không có circuit breaker
+Database down = mỗi lần mở connection chờ LOGIN_SECONDS rồi lỗi (như LoginTimeout của SQL Server)
+no breaker: failure threshold vô hạn, request nào cũng chờ login timeout
+breaker: DB_CIRCUIT_FAILURE_THRESHOLD requests đầu chờ, sau đó fail fast; prober hot-swap engine khi database sống lại
+
+Usage:
+    cd backend
+    python benchmarks/bench_circuit_breaker.py [requests]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from common import make_databases  # noqa: F401  (thêm backend vào sys.path)
+
+from sqlalchemy import event, text
+
+from app.database.circuit import DatabaseUnavailable
+from app.database.connections import DatabaseManager
+
+LOGIN_SECONDS = 0.05
+PROBE_SECONDS = 0.02
+
+
+class OutageManager(DatabaseManager):
+    """DatabaseManager trên SQLite file, down=True thì mọi lần mở connection chờ LOGIN_SECONDS rồi lỗi"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.down = False
+        for circuit in self.circuits.values():
+            circuit.probe_seconds = circuit.probe_max_seconds = PROBE_SECONDS
+
+    def _mysql_url(self):
+        return f"sqlite:///{self.path}", {}
+
+    def _create_engine(self, name):
+        engine = super()._create_engine(name)
+
+        @event.listens_for(engine, "do_connect")
+        def do_connect(dialect, conn_rec, cargs, cparams):
+            if self.down:
+                time.sleep(LOGIN_SECONDS)
+                raise dialect.loaded_dbapi.OperationalError("Login timeout expired")
+
+        return engine
+
+
+def outage(manager, requests):
+    """requests lần get_payroll_db() khi database down, returns (tổng thời gian, số lần chờ timeout)"""
+    manager.down = True
+    manager.mysql_engine.dispose()
+    slow = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        try:
+            with manager.get_payroll_db() as payroll_db:
+                payroll_db.execute(text("SELECT 1"))
+        except DatabaseUnavailable:
+            continue
+        except Exception:
+            slow += 1
+    return time.perf_counter() - started, slow
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print("=" * 80)
+    print(f"CIRCUIT BREAKER BENCHMARK - {requests} requests trong lúc payroll database down "
+          f"(login timeout {LOGIN_SECONDS * 1000:.0f}ms)")
+    print("=" * 80)
+
+    results = {}
+    for label, threshold in (("no breaker", 10 ** 9), ("breaker", None)):
+        manager = OutageManager(os.path.join(tempfile.mkdtemp(), "payroll.db"))
+        if threshold:
+            manager.circuits["mysql"].failure_threshold = threshold
+        manager._connect("mysql")
+        manager.start_health_checks()
+        try:
+            elapsed, slow = outage(manager, requests)
+            results[label] = (elapsed, slow)
+            print(f"{label:<11} total={elapsed * 1000:.0f}ms  per request={elapsed / requests * 1000:.2f}ms  "
+                  f"waited for login timeout={slow}")
+            if threshold:
+                continue
+
+            old_engine = manager.mysql_engine
+            manager.down = False
+            started = time.perf_counter()
+            while not manager.mysql_available and time.perf_counter() - started < 5:
+                time.sleep(0.005)
+            recovery = time.perf_counter() - started
+            print(f"recovery    {recovery * 1000:.0f}ms  circuit={manager.circuits['mysql'].stats()['state']}  "
+                  f"new engine={manager.mysql_engine is not old_engine}")
+            with manager.get_payroll_db() as payroll_db:
+                payroll_db.execute(text("SELECT 1"))
+        finally:
+            manager.shutdown()
+
+    threshold = manager.circuits["mysql"].failure_threshold
+    assert results["breaker"][1] == threshold, results
+    print(f"✅ Chỉ {threshold} requests đầu chờ login timeout, các requests sau fail fast")
+    assert results["no breaker"][1] == requests
+    assert manager.circuits["mysql"].recoveries == 1
+    print("✅ Prober kết nối lại và hot-swap engine khi database sống lại")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
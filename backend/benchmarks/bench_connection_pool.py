@@ -0,0 +1,110 @@
+"""
+Benchmark: connection pool checkout cost và telemetry khi pool bão hòa
+pre_ping: pool_pre_ping=True (SELECT 1 mỗi checkout, cấu hình cũ)
+liveness: PoolSettings.engine_options() (pool_recycle + liveness check chạy nền)
+Sau đó chạy nhiều workers hơn pool capacity và đọc InstrumentedQueuePool.stats()
+SQLite file database (không dùng StaticPool) để có QueuePool thật
+
+Usage:
+    cd backend
+    python benchmarks/bench_connection_pool.py [checkouts] [workers]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from common import make_databases  # noqa: F401  (thêm backend vào sys.path)
+
+from sqlalchemy import create_engine
+
+from app.database.pool import PoolSettings, prewarm
+
+HOLD_SECONDS = 0.01
+POOL = PoolSettings(pool_size=4, max_overflow=2, timeout=0.05, recycle=1800, prewarm=4)
+
+
+def checkout_loop(engine, checkouts):
+    """Checkout + một query ngắn, như một request đọc"""
+    started = time.perf_counter()
+    for _ in range(checkouts):
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1").scalar()
+    return time.perf_counter() - started
+
+
+def saturate(engine, workers, rounds):
+    """workers threads, mỗi checkout giữ connection HOLD_SECONDS; timeouts được đếm, không raise"""
+    failures = [0]
+
+    def work():
+        for _ in range(rounds):
+            try:
+                with engine.connect() as conn:
+                    conn.exec_driver_sql("SELECT 1").scalar()
+                    time.sleep(HOLD_SECONDS)
+            except Exception:
+                failures[0] += 1
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return failures[0]
+
+
+def main():
+    checkouts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    print("=" * 80)
+    print(f"CONNECTION POOL BENCHMARK - {checkouts} checkouts, {workers} workers "
+          f"(pool {POOL.pool_size}+{POOL.max_overflow})")
+    print("=" * 80)
+
+    path = os.path.join(tempfile.mkdtemp(), "pool.db")
+    url = f"sqlite:///{path}"
+    options = POOL.engine_options()
+    pre_ping = create_engine(url, **{**options, "pool_pre_ping": True})
+    liveness = create_engine(url, **options)
+    pings = [0]
+    do_ping = pre_ping.dialect.do_ping
+
+    def counted_ping(dbapi_connection):
+        # Ping chạy thẳng trên DBAPI cursor, không qua before_cursor_execute
+        pings[0] += 1
+        return do_ping(dbapi_connection)
+
+    pre_ping.dialect.do_ping = counted_ping
+    prewarm(pre_ping, POOL.prewarm)
+    prewarm(liveness, POOL.prewarm)
+    pings[0] = 0
+    ping_time = checkout_loop(pre_ping, checkouts)
+    pings_per_checkout = pings[0] / checkouts
+    liveness_time = checkout_loop(liveness, checkouts)
+    print(f"checkout  pre_ping={ping_time / checkouts * 1e6:.0f}µs  liveness={liveness_time / checkouts * 1e6:.0f}µs  "
+          f"pings/checkout={pings_per_checkout:.0f}")
+
+    stats = liveness.pool.stats()
+    assert stats["checked_in"] == POOL.prewarm and stats["checkouts"] == checkouts + POOL.prewarm, stats
+    print("✅ Pool mở sẵn prewarm connections, telemetry đếm mọi checkout")
+
+    failures = saturate(liveness, workers, rounds=20)
+    stats = liveness.pool.stats()
+    print(f"saturated timeouts={stats['timeouts']}  wait avg={stats['wait_seconds_avg'] * 1000:.2f}ms  "
+          f"max={stats['wait_seconds_max'] * 1000:.1f}ms  buckets={stats['wait_buckets']}")
+    assert stats["timeouts"] == failures > 0, (stats["timeouts"], failures)
+    print("✅ Timeouts và thời gian chờ khi pool bão hòa hiện trong stats()")
+
+    liveness.dispose()
+    assert liveness.pool.stats()["timeouts"] == failures
+    print("✅ Counters giữ nguyên qua engine.dispose()")
+    # SQLite chạy in-process nên ping gần như miễn phí, với SQL Server/MySQL mỗi ping là một network round trip
+    assert pings_per_checkout == 1
+    print("✅ Bỏ pool_pre_ping: không còn round trip ping mỗi checkout")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
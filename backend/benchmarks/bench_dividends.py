@@ -0,0 +1,116 @@
+"""
+Benchmark: GET /hr/dividends khi bảng dividends lớn dần theo từng quý
+all: toàn bộ rows + joinedload Employee (behaviour cũ của get_employee_dividends)
+page: một page keyset của quý gần nhất (HRService.list_dividends_page)
+rollup: tổng theo employee × quý bằng một GROUP BY (HRService.get_dividend_rollup)
+Kiểm tra cost của page không tăng theo số quý lịch sử
+
+Usage:
+    cd backend
+    python benchmarks/bench_dividends.py [employee_count] [quarters]
+"""
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy.orm import joinedload
+
+from common import make_databases
+
+from app.database.models_hr import Dividend
+from app.modules.hr_management.services import HRService
+
+PAGE_SIZE = 100
+
+
+def seed_dividends(SessionLocal_HR, employee_count, quarters):
+    """Mỗi employee một dividend mỗi quý"""
+    hr_db = SessionLocal_HR()
+    try:
+        hr_db.execute(Dividend.__table__.insert(), [
+            {
+                "EmployeeID": emp_id,
+                "DividendAmount": Decimal(1000 + emp_id % 500),
+                "DividendDate": date(2000 + quarter // 4, quarter % 4 * 3 + 1, 15)
+            }
+            for quarter in range(quarters)
+            for emp_id in range(1, employee_count + 1)
+        ])
+        hr_db.commit()
+    finally:
+        hr_db.close()
+
+
+def timed(SessionLocal_HR, fn, repeats=5):
+    hr_db = SessionLocal_HR()
+    try:
+        best = None
+        for _ in range(repeats):
+            started = time.perf_counter()
+            result = fn(hr_db)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+    finally:
+        hr_db.close()
+
+
+def measure(SessionLocal_HR, last_quarter_start):
+    _, all_time = timed(
+        SessionLocal_HR,
+        lambda hr_db: hr_db.query(Dividend).options(joinedload(Dividend.employee)).all(),
+        repeats=1
+    )
+    page, page_time = timed(
+        SessionLocal_HR,
+        lambda hr_db: HRService.list_dividends_page(hr_db, from_date=last_quarter_start, limit=PAGE_SIZE)
+    )
+    employee_page, employee_time = timed(
+        SessionLocal_HR,
+        lambda hr_db: HRService.list_dividends_page(hr_db, employee_id=7, from_date=last_quarter_start)
+    )
+    rollup, rollup_time = timed(
+        SessionLocal_HR,
+        lambda hr_db: HRService.get_dividend_rollup(hr_db, from_date=last_quarter_start, period="quarter"),
+        repeats=1
+    )
+    return all_time, page_time, employee_time, rollup_time, page, employee_page, rollup
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    quarters = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    print("=" * 80)
+    print(f"DIVIDENDS BENCHMARK - {employee_count} employees, 4 → {quarters} quarters")
+    print("=" * 80)
+
+    page_times = []
+    for quarter_count in (4, quarters):
+        SessionLocal_HR, _, _, _ = make_databases(employee_count)
+        seed_dividends(SessionLocal_HR, employee_count, quarter_count)
+        last = quarter_count - 1
+        last_quarter_start = date(2000 + last // 4, last % 4 * 3 + 1, 1)
+        all_time, page_time, employee_time, rollup_time, page, employee_page, rollup = measure(
+            SessionLocal_HR, last_quarter_start
+        )
+        rows = employee_count * quarter_count
+        print(f"{quarter_count:>3} quarters ({rows} rows)  all={all_time * 1000:.0f}ms  "
+              f"page={page_time * 1000:.2f}ms  employee={employee_time * 1000:.2f}ms  "
+              f"rollup(last quarter)={rollup_time * 1000:.0f}ms")
+        page_times.append(page_time)
+
+        assert len(page.Items) == PAGE_SIZE and page.HasMore
+        assert all(item.DividendDate >= last_quarter_start for item in page.Items)
+        assert [item.EmployeeID for item in employee_page.Items] == [7]
+        assert rollup.DividendCount == employee_count
+        assert rollup.TotalAmount == sum(Decimal(1000 + emp_id % 500) for emp_id in range(1, employee_count + 1))
+
+    print("✅ Page/rollup chỉ đọc khoảng ngày được yêu cầu")
+    assert page_times[1] < page_times[0] * 3, "page cost tăng theo lịch sử dividends"
+    print(f"✅ Page cost gần như không đổi khi lịch sử tăng {quarters // 4}x")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,105 @@
+"""
+Benchmark: unified profiles của nhiều employees
+single: AsyncHRService.get_unified_employee_profile cho từng ID, mỗi lần một request (frontend fan-out)
+batch: AsyncHRService.get_unified_employee_profiles (chunked HR query + payroll IN query)
+loader: LOADER_LOOKUPS lookups theo từng ID trong cùng một request scope, DataLoader gộp thành một batch
+Kiểm tra số HR queries = ceil(IDs / MAX_IN_PARAMS), mỗi statement <= 2100 parameters
+và loader chỉ chạy 1 HR query + 1 payroll query
+
+Usage:
+    cd backend
+    python benchmarks/bench_employee_batch.py [employee_count] [batch_size]
+"""
+import asyncio
+import math
+import sys
+import time
+
+from sqlalchemy import event
+
+from common import make_databases, use_databases
+
+from app.core.dataloader import request_scope
+from app.database.query_utils import MAX_IN_PARAMS
+from app.modules.hr_management.async_services import PROFILE_LOADER, AsyncHRService
+from app.modules.hr_management.caches import payroll_snapshot_cache
+
+SQL_SERVER_MAX_PARAMS = 2100
+# 30 IDs khác nhau + 1 ID lặp lại
+LOADER_LOOKUPS = 31
+
+
+def reset(*counters):
+    payroll_snapshot_cache.invalidate()
+    for counter in counters:
+        counter.reset()
+
+
+async def run(employee_count: int, batch_size: int):
+    SessionLocal_HR, SessionLocal_Payroll, hr_counter, payroll_counter = make_databases(employee_count)
+    use_databases(SessionLocal_HR, SessionLocal_Payroll)
+    # 10 IDs không tồn tại để kiểm tra NotFound
+    employee_ids = list(range(employee_count - batch_size + 11, employee_count + 11))
+
+    max_params = []
+    event.listen(
+        SessionLocal_HR.kw["bind"], "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, context, executemany: max_params.append(len(parameters))
+    )
+
+    reset(hr_counter, payroll_counter)
+    started = time.perf_counter()
+    singles = [await AsyncHRService.get_unified_employee_profile(emp_id) for emp_id in employee_ids]
+    single_time = time.perf_counter() - started
+    print(f"single    time={single_time * 1000:.0f}ms  hr_queries={hr_counter.count}  "
+          f"payroll_queries={payroll_counter.count}")
+
+    reset(hr_counter, payroll_counter)
+    max_params.clear()
+    started = time.perf_counter()
+    batch = await AsyncHRService.get_unified_employee_profiles(employee_ids + employee_ids[:50])
+    batch_time = time.perf_counter() - started
+    batch_queries = (hr_counter.count, payroll_counter.count)
+    print(f"batch     time={batch_time * 1000:.0f}ms  hr_queries={batch_queries[0]}  "
+          f"payroll_queries={batch_queries[1]}  max_params={max(max_params)}  "
+          f"speedup={single_time / batch_time:.1f}x")
+
+    reset(hr_counter, payroll_counter)
+    lookup_ids = employee_ids[:LOADER_LOOKUPS - 1] + employee_ids[:1]
+    with request_scope() as loaders:
+        profiles = await asyncio.gather(*(
+            AsyncHRService.get_unified_employee_profile(emp_id) for emp_id in lookup_ids
+        ))
+    loader = loaders[PROFILE_LOADER]
+    loader_queries = (hr_counter.count, payroll_counter.count)
+    print(f"loader    lookups={loader.lookups}  coalesced={loader.coalesced}  "
+          f"hr_queries={loader_queries[0]}  payroll_queries={loader_queries[1]}")
+
+    found = [profile for profile in singles if profile is not None]
+    assert [item.model_dump() for item in batch.Items] == [profile.model_dump() for profile in found]
+    assert batch.NotFound == list(range(employee_count + 1, employee_count + 11))
+    print("✅ Batch khớp từng profile đơn lẻ, giữ thứ tự request và bỏ IDs trùng")
+    assert batch_queries[0] == math.ceil(batch_size / MAX_IN_PARAMS), batch_queries
+    assert max(max_params) <= SQL_SERVER_MAX_PARAMS
+    print(f"✅ {batch_queries[0]} HR queries, mỗi statement <= {SQL_SERVER_MAX_PARAMS} parameters")
+    assert [profile.model_dump() for profile in profiles] == [
+        singles[employee_ids.index(emp_id)].model_dump() for emp_id in lookup_ids
+    ]
+    assert loader_queries == (1, 1), loader_queries
+    assert loader.coalesced == LOADER_LOOKUPS - 1
+    print(f"✅ {LOADER_LOOKUPS} lookups trong một request -> 1 HR query + 1 payroll query")
+    return 0
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    # IDs lấy từ cuối bảng (10 IDs cuối không tồn tại) nên batch không lớn hơn số employees
+    batch_size = min(int(sys.argv[2]) if len(sys.argv) > 2 else 4500, employee_count)
+    print("=" * 80)
+    print(f"EMPLOYEE BATCH BENCHMARK - {batch_size} IDs trong {employee_count} employees")
+    print("=" * 80)
+    return asyncio.run(run(employee_count, batch_size))
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,71 @@
+"""
+Benchmark: query count của HRService.get_organization_structure
+Query count phải cố định theo số departments (không còn N+1)
+
+Usage:
+    cd backend
+    python benchmarks/bench_org_structure.py [employee_count]
+"""
+import sys
+import time
+
+from common import make_databases
+
+from app.modules.hr_management.services import HRService
+
+# Cache nguội: 2 version probes + 2 reference loads + 1 employees query bên HR, 1 payroll snapshot
+COLD_HR_QUERY_BUDGET = 5
+COLD_PAYROLL_QUERY_BUDGET = 1
+# Cache nóng (trong probe window / TTL): chỉ còn employees query
+WARM_HR_QUERY_BUDGET = 1
+WARM_PAYROLL_QUERY_BUDGET = 0
+
+
+def run(employee_count, department_count):
+    SessionLocal_HR, SessionLocal_Payroll, hr_counter, payroll_counter = make_databases(
+        employee_count, department_count
+    )
+    budgets = (
+        ("cold", COLD_HR_QUERY_BUDGET, COLD_PAYROLL_QUERY_BUDGET),
+        ("warm", WARM_HR_QUERY_BUDGET, WARM_PAYROLL_QUERY_BUDGET),
+    )
+    hr_db = SessionLocal_HR()
+    payroll_db = SessionLocal_Payroll()
+    try:
+        for label, hr_budget, payroll_budget in budgets:
+            hr_counter.reset()
+            payroll_counter.reset()
+            started = time.perf_counter()
+            org = HRService.get_organization_structure(hr_db, payroll_db)
+            elapsed = time.perf_counter() - started
+
+            print(
+                f"{label} departments={department_count:<4} employees={org.TotalEmployees:<6} "
+                f"hr_queries={hr_counter.count:<3} payroll_queries={payroll_counter.count:<3} "
+                f"time={elapsed * 1000:.1f}ms"
+            )
+            assert org.TotalEmployees == employee_count
+            assert hr_counter.count <= hr_budget, f"HR queries {hr_counter.count} > {hr_budget}"
+            assert payroll_counter.count <= payroll_budget, (
+                f"Payroll queries {payroll_counter.count} > {payroll_budget}"
+            )
+    finally:
+        hr_db.close()
+        payroll_db.close()
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print("=" * 80)
+    print(f"ORG STRUCTURE BENCHMARK - {employee_count} employees")
+    print("=" * 80)
+
+    for department_count in (5, 50, 200):
+        run(employee_count, department_count)
+
+    print("✅ Query count không phụ thuộc số departments")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
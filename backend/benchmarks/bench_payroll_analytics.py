@@ -0,0 +1,122 @@
+"""
+Benchmark: salary/attendance rollups theo department × month
+naive: load ORM objects rồi cộng dồn bằng dict trong Python
+numpy: PayrollAnalyticsService (một SELECT các cột, np.unique + np.bincount)
+Mỗi employee một row mỗi tháng, một phần tháng bị import trùng như dump payroll
+
+Usage:
+    cd backend
+    python benchmarks/bench_payroll_analytics.py [employee_count] [months]
+"""
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from common import make_databases
+
+from app.database.models_payroll import EmployeePayroll, Salary, Attendance
+from app.modules.payroll_analytics.services import PayrollAnalyticsService
+
+BUDGET_SECONDS = 1.0
+DUPLICATE_RATIO = 0.05
+
+
+def seed_history(SessionLocal_Payroll, employee_count, month_count, rng):
+    """Lương + chấm công cho mỗi employee mỗi tháng, một số rows bị insert hai lần"""
+    salaries = []
+    attendance = []
+    for month_offset in range(month_count):
+        month = date(2020 + month_offset // 12, month_offset % 12 + 1, 1)
+        for emp_id in range(1, employee_count + 1):
+            base = rng.randrange(5_000_000, 30_000_000, 100_000)
+            bonus = rng.randrange(0, 2_000_000, 50_000)
+            deductions = rng.randrange(0, 500_000, 10_000)
+            salary = {
+                "EmployeeID": emp_id, "SalaryMonth": month, "BaseSalary": base, "Bonus": bonus,
+                "Deductions": deductions, "NetSalary": base + bonus - deductions
+            }
+            absent = rng.randint(0, 3)
+            leave = rng.randint(0, 2)
+            record = {
+                "EmployeeID": emp_id, "AttendanceMonth": month,
+                "WorkDays": 22 - absent - leave, "AbsentDays": absent, "LeaveDays": leave
+            }
+            copies = 2 if rng.random() < DUPLICATE_RATIO else 1
+            salaries.extend([salary] * copies)
+            attendance.extend([record] * copies)
+
+    payroll_db = SessionLocal_Payroll()
+    try:
+        payroll_db.execute(Salary.__table__.insert(), salaries)
+        payroll_db.execute(Attendance.__table__.insert(), attendance)
+        payroll_db.commit()
+    finally:
+        payroll_db.close()
+    return len(salaries), len(attendance)
+
+
+def naive_salary_totals(payroll_db):
+    """Baseline: ORM objects + dict, bỏ rows trùng theo (EmployeeID, month)"""
+    departments = dict(payroll_db.query(EmployeePayroll.EmployeeID, EmployeePayroll.DepartmentID).all())
+    latest = {}
+    for salary in payroll_db.query(Salary).order_by(Salary.SalaryID).all():
+        latest[(salary.EmployeeID, salary.SalaryMonth)] = salary
+    totals = defaultdict(lambda: [0, Decimal(0), Decimal(0), Decimal(0)])
+    for (emp_id, month), salary in latest.items():
+        total = totals[(departments.get(emp_id), month)]
+        total[0] += 1
+        total[1] += Decimal(salary.NetSalary)
+        total[2] += Decimal(salary.Bonus or 0)
+        total[3] += Decimal(salary.Deductions or 0)
+    return totals
+
+
+def timed(SessionLocal_Payroll, fn):
+    payroll_db = SessionLocal_Payroll()
+    try:
+        started = time.perf_counter()
+        result = fn(payroll_db)
+        return result, time.perf_counter() - started
+    finally:
+        payroll_db.close()
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    month_count = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    rng = random.Random(7)
+    print("=" * 80)
+    print(f"PAYROLL ANALYTICS BENCHMARK - {employee_count} employees × {month_count} months")
+    print("=" * 80)
+
+    _, SessionLocal_Payroll, _, payroll_counter = make_databases(employee_count, synced_ratio=1.0)
+    salary_rows, attendance_rows = seed_history(SessionLocal_Payroll, employee_count, month_count, rng)
+    print(f"rows      salaries={salary_rows}  attendance={attendance_rows}")
+
+    naive, naive_time = timed(SessionLocal_Payroll, naive_salary_totals)
+    payroll_counter.reset()
+    salaries, salary_time = timed(SessionLocal_Payroll, PayrollAnalyticsService.salary_rollup)
+    salary_queries = payroll_counter.count
+    attendance, attendance_time = timed(SessionLocal_Payroll, PayrollAnalyticsService.attendance_rollup)
+    print(f"salaries  naive={naive_time * 1000:.0f}ms  numpy={salary_time * 1000:.0f}ms  "
+          f"speedup={naive_time / salary_time:.1f}x  groups={len(salaries)}  queries={salary_queries}")
+    print(f"attendance numpy={attendance_time * 1000:.0f}ms  groups={len(attendance)}")
+
+    assert len(salaries) == len(naive)
+    for rollup in salaries:
+        count, net, bonus, deductions = naive[(rollup.DepartmentID, rollup.Month)]
+        assert rollup.EmployeeCount == count
+        assert (rollup.TotalNetSalary, rollup.TotalBonus, rollup.TotalDeductions) == (net, bonus, deductions)
+    assert all(rollup.WorkDays + rollup.AbsentDays + rollup.LeaveDays == 22 * rollup.EmployeeCount
+               for rollup in attendance), "rows trùng bị cộng hai lần"
+    print("✅ NumPy rollup khớp baseline (đã bỏ rows trùng)")
+    assert salary_time < BUDGET_SECONDS and attendance_time < BUDGET_SECONDS
+    print(f"✅ Mỗi rollup < {BUDGET_SECONDS:.0f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,135 @@
+"""
+Benchmark: KPI reads từ payroll summary table vs rollup scan trên lịch sử lương
+rollup: PayrollAnalyticsService.salary_rollup (scan salaries của cả khoảng tháng)
+summary: payroll_summary.read (đọc payroll_department_month_summary)
+Sau đó đo refresh incremental khi thêm một tháng lương và khi execute_sync chuyển department,
+kiểm tra summary vẫn khớp rollup
+
+Usage:
+    cd backend
+    python benchmarks/bench_payroll_summary.py [employee_count] [months]
+"""
+import random
+import sys
+import time
+from datetime import date
+
+from common import make_databases
+from bench_payroll_analytics import seed_history
+
+from app.database.models_hr import Employee
+from app.database.models_payroll import Salary, Attendance
+from app.modules.hr_management.sync_service import SyncService
+from app.modules.payroll_analytics.services import PayrollAnalyticsService
+from app.modules.payroll_analytics.summary import payroll_summary
+
+MOVED_EMPLOYEES = 20
+READ_REPEATS = 20
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def add_month(SessionLocal_Payroll, employee_count, month, rng):
+    """Một tháng lương + chấm công mới cho tất cả employees"""
+    payroll_db = SessionLocal_Payroll()
+    try:
+        payroll_db.execute(Salary.__table__.insert(), [
+            {
+                "EmployeeID": emp_id, "SalaryMonth": month, "BaseSalary": 10_000_000,
+                "Bonus": rng.randrange(0, 1_000_000, 50_000), "Deductions": 0, "NetSalary": 10_000_000
+            }
+            for emp_id in range(1, employee_count + 1)
+        ])
+        payroll_db.execute(Attendance.__table__.insert(), [
+            {"EmployeeID": emp_id, "AttendanceMonth": month, "WorkDays": 22, "AbsentDays": 0, "LeaveDays": 0}
+            for emp_id in range(1, employee_count + 1)
+        ])
+        payroll_db.commit()
+    finally:
+        payroll_db.close()
+
+
+def assert_matches_rollup(payroll_db):
+    """Summary rows khớp rollup tính trực tiếp từ salaries"""
+    summaries = {(row.DepartmentID, row.Month): row for row in payroll_summary.read(payroll_db)}
+    rollups = PayrollAnalyticsService.salary_rollup(payroll_db)
+    assert len(summaries) == len(rollups), (len(summaries), len(rollups))
+    for rollup in rollups:
+        summary = summaries[(rollup.DepartmentID, rollup.Month)]
+        assert (summary.Headcount, summary.NetSalary, summary.Bonus, summary.Deductions) == (
+            rollup.EmployeeCount, rollup.TotalNetSalary, rollup.TotalBonus, rollup.TotalDeductions
+        ), (rollup, summary)
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    month_count = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    rng = random.Random(11)
+    print("=" * 80)
+    print(f"PAYROLL SUMMARY BENCHMARK - {employee_count} employees × {month_count} months")
+    print("=" * 80)
+
+    SessionLocal_HR, SessionLocal_Payroll, _, payroll_counter = make_databases(employee_count, synced_ratio=1.0)
+    salary_rows, _ = seed_history(SessionLocal_Payroll, employee_count, month_count, rng)
+    print(f"rows      salaries={salary_rows}")
+
+    payroll_db = SessionLocal_Payroll()
+    hr_db = SessionLocal_HR()
+    try:
+        _, full_time = timed(payroll_summary.refresh, payroll_db, True)
+        print(f"full      refresh={full_time * 1000:.0f}ms  {payroll_summary.stats()}")
+
+        # KPI: tất cả departments của năm gần nhất
+        last_year = date(2020 + (month_count - 1) // 12, 1, 1)
+        payroll_summary.probe_seconds = 3600
+        rollup_time = min(
+            timed(PayrollAnalyticsService.salary_rollup, payroll_db, last_year)[1] for _ in range(3)
+        )
+        payroll_counter.reset()
+        summary_time = min(
+            timed(payroll_summary.read, payroll_db, last_year)[1] for _ in range(READ_REPEATS)
+        )
+        read_queries = payroll_counter.count / READ_REPEATS
+        print(f"kpi read  rollup={rollup_time * 1000:.1f}ms  summary={summary_time * 1000:.2f}ms  "
+              f"speedup={rollup_time / summary_time:.0f}x  queries/read={read_queries:.0f}")
+
+        # Thêm một tháng: refresh chỉ tính lại tháng đó
+        payroll_summary.probe_seconds = 0
+        next_month = date(2020 + month_count // 12, month_count % 12 + 1, 1)
+        add_month(SessionLocal_Payroll, employee_count, next_month, rng)
+        recomputed = payroll_summary.months_recomputed
+        _, incremental_time = timed(payroll_summary.refresh, payroll_db)
+        incremental_months = payroll_summary.months_recomputed - recomputed
+        print(f"new month refresh={incremental_time * 1000:.0f}ms  months recomputed={incremental_months}")
+
+        # Chuyển department rồi execute_sync: summary cập nhật trong cùng transaction
+        moved = rng.sample(range(1, employee_count + 1), MOVED_EMPLOYEES)
+        hr_db.query(Employee).filter(Employee.EmployeeID.in_(moved)).update(
+            {Employee.DepartmentID: 1}, synchronize_session=False
+        )
+        hr_db.commit()
+        written = payroll_summary.rows_written
+        _, sync_time = timed(SyncService.execute_sync_bulk, hr_db, payroll_db, moved)
+        print(f"moves     execute_sync_bulk={sync_time * 1000:.0f}ms  "
+              f"summary rows written={payroll_summary.rows_written - written}")
+
+        payroll_summary.probe_seconds = 3600
+        assert_matches_rollup(payroll_db)
+    finally:
+        hr_db.close()
+        payroll_db.close()
+
+    print("✅ Summary khớp rollup sau tháng mới và department moves (không cần refresh)")
+    assert incremental_months <= 2, f"refresh incremental tính lại {incremental_months} tháng"
+    print("✅ Refresh incremental chỉ tính lại các tháng thay đổi")
+    assert summary_time < rollup_time
+    print("✅ KPI read từ summary nhanh hơn rollup scan")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
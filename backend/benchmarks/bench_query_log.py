@@ -0,0 +1,76 @@
+"""
+Benchmark: phát hiện N+1 của query log
+naive: một employees query mỗi department (pattern cũ của get_organization_structure)
+service: HRService.get_organization_structure (query count cố định)
+Cả hai chạy trong request_queries() như middleware, chỉ naive bị flag
+
+Usage:
+    cd backend
+    python benchmarks/bench_query_log.py [employee_count] [department_count]
+"""
+import sys
+import time
+
+from common import make_databases
+
+from app.core.metrics import instrument_engine, request_queries
+from app.core.query_log import N_PLUS_ONE_THRESHOLD, repeated_statements, server_timing, statement_shape
+from app.database.models_hr import Department, Employee
+from app.modules.hr_management.services import HRService
+
+
+def naive_org_structure(hr_db, payroll_db):
+    return {
+        department.DepartmentID: hr_db.query(Employee).filter(
+            Employee.DepartmentID == department.DepartmentID
+        ).all()
+        for department in hr_db.query(Department).all()
+    }
+
+
+def traced(fn, hr_db, payroll_db):
+    started = time.perf_counter()
+    with request_queries() as queries:
+        fn(hr_db, payroll_db)
+    elapsed = time.perf_counter() - started
+    return queries, elapsed
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    department_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print("=" * 80)
+    print(f"QUERY LOG BENCHMARK - {employee_count} employees, {department_count} departments "
+          f"(threshold {N_PLUS_ONE_THRESHOLD})")
+    print("=" * 80)
+
+    SessionLocal_HR, SessionLocal_Payroll, _, _ = make_databases(employee_count, department_count)
+    instrument_engine(SessionLocal_HR.kw["bind"], "sql_server")
+    instrument_engine(SessionLocal_Payroll.kw["bind"], "mysql")
+
+    hr_db = SessionLocal_HR()
+    payroll_db = SessionLocal_Payroll()
+    try:
+        results = {}
+        for label, fn in (("naive", naive_org_structure), ("service", HRService.get_organization_structure)):
+            queries, elapsed = traced(fn, hr_db, payroll_db)
+            repeated = repeated_statements(queries.statements, N_PLUS_ONE_THRESHOLD)
+            results[label] = repeated
+            print(f"{label:<8} queries={queries.total:<4} repeated shapes={len(repeated)}  "
+                  f"Server-Timing: {server_timing(queries.seconds, queries.queries, elapsed)}")
+    finally:
+        hr_db.close()
+        payroll_db.close()
+
+    statement = "SELECT x FROM t WHERE a = 'secret' AND id IN (?, ?, ?)"
+    assert "secret" not in statement_shape(statement)
+    print("✅ Shape không chứa literals (parameters được redact)")
+    assert len(results["naive"]) == 1 and results["naive"][0][2] == department_count
+    print(f"✅ Naive loop bị flag: {department_count}× cùng một shape")
+    assert not results["service"]
+    print("✅ get_organization_structure không bị flag")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,109 @@
+"""
+Benchmark: dữ liệu transfer của sync check full vs merkle
+Payroll được sync đầy đủ rồi làm lệch một số rows; merkle chỉ đọc fingerprints
+và rows của các leaf buckets lệch
+
+Usage:
+    cd backend
+    python benchmarks/bench_reconciliation.py [employee_count] [drifted_count]
+"""
+import sys
+import time
+
+from common import make_databases
+
+from app.database.models_payroll import EmployeePayroll
+from app.modules.hr_management.reconciliation import merkle_reconciler
+from app.modules.hr_management.sync_service import SyncService
+
+# Ước lượng wire size: bucket row = (bucket, count, sum), hash row = (EmployeeID, hash32)
+BUCKET_ROW_BYTES = 24
+HASH_ROW_BYTES = 12
+# EmployeeID, FullName, DepartmentID, PositionID, Status
+SYNC_ROW_BYTES = 8 + 32 + 8 + 8 + 24
+
+
+def drift_payroll(SessionLocal_Payroll, employee_count, drifted_count):
+    """Đổi Status của drifted_count rows rải đều trên dải EmployeeID"""
+    step = max(employee_count // max(drifted_count, 1), 1)
+    drifted_ids = list(range(1, employee_count + 1, step))[:drifted_count]
+    payroll_db = SessionLocal_Payroll()
+    try:
+        payroll_db.query(EmployeePayroll).filter(
+            EmployeePayroll.EmployeeID.in_(drifted_ids)
+        ).update({EmployeePayroll.Status: "Nghỉ việc"}, synchronize_session=False)
+        payroll_db.commit()
+    finally:
+        payroll_db.close()
+    return drifted_ids
+
+
+def timed_check(SessionLocal_HR, SessionLocal_Payroll, counters, mode):
+    hr_db = SessionLocal_HR()
+    payroll_db = SessionLocal_Payroll()
+    try:
+        for counter in counters:
+            counter.reset()
+        started = time.perf_counter()
+        result = SyncService.check_sync_needs(hr_db, payroll_db, mode=mode)
+        elapsed = time.perf_counter() - started
+    finally:
+        hr_db.close()
+        payroll_db.close()
+    return result, elapsed, sum(counter.count for counter in counters)
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    drifted_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print("=" * 80)
+    print(f"RECONCILIATION BENCHMARK - {employee_count} employees, {drifted_count} drifted")
+    print("=" * 80)
+
+    SessionLocal_HR, SessionLocal_Payroll, hr_counter, payroll_counter = make_databases(
+        employee_count, synced_ratio=1.0
+    )
+    drifted_ids = drift_payroll(SessionLocal_Payroll, employee_count, drifted_count)
+    counters = (hr_counter, payroll_counter)
+
+    full, full_elapsed, full_queries = timed_check(
+        SessionLocal_HR, SessionLocal_Payroll, counters, "full"
+    )
+    merkle, merkle_elapsed, merkle_queries = timed_check(
+        SessionLocal_HR, SessionLocal_Payroll, counters, "merkle"
+    )
+
+    hr_db = SessionLocal_HR()
+    payroll_db = SessionLocal_Payroll()
+    try:
+        stats = merkle_reconciler.diff(hr_db, payroll_db).Stats
+    finally:
+        hr_db.close()
+        payroll_db.close()
+
+    full_bytes = employee_count * 2 * SYNC_ROW_BYTES
+    merkle_rows = stats["BucketRows"] + stats["HashRows"] + stats["LeafRows"]
+    merkle_bytes = (
+        stats["BucketRows"] * BUCKET_ROW_BYTES
+        + stats["HashRows"] * HASH_ROW_BYTES
+        + stats["LeafRows"] * SYNC_ROW_BYTES
+    )
+    print(
+        f"full    need_sync={full.NeedSync:<6} queries={full_queries:<4} "
+        f"rows={employee_count * 2:<8} ~{full_bytes / 1024:.1f}KB time={full_elapsed * 1000:.1f}ms"
+    )
+    print(
+        f"merkle  need_sync={merkle.NeedSync:<6} queries={merkle_queries:<4} "
+        f"rows={merkle_rows:<8} ~{merkle_bytes / 1024:.1f}KB "
+        f"time={merkle_elapsed * 1000:.1f}ms levels={stats['Levels']}"
+    )
+
+    assert full.SyncNeeds == merkle.SyncNeeds, "merkle SyncNeeds khác full SyncNeeds"
+    assert [need.EmployeeID for need in merkle.SyncNeeds] == drifted_ids
+    assert full.TotalEmployees == merkle.TotalEmployees
+    print("✅ Merkle và full check trả về cùng drift set")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,126 @@
+"""
+Benchmark: chi phí build + serialize response cho 10k employees
+default: route trả về models, FastAPI validate lại theo response_model rồi json.dumps
+fast:    route trả về FastJSONResponse (orjson), không validate lần 2
+Dòng "build" so sánh constructor (validate trong pydantic-core) với model_construct
+
+Usage:
+    cd backend
+    python benchmarks/bench_serialization.py [employee_count] [rounds]
+"""
+import json
+import sys
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import List
+
+from common import make_databases  # noqa: F401  (sys.path setup)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import fast_json as fast_json_module
+from app.core.fast_json import FastJSONResponse
+from app.modules.hr_management.schemas import EmployeeListItem
+from app.modules.hr_management.services import HRService
+
+
+def make_rows(employee_count: int):
+    department_names = {dept_id: f"Phòng {dept_id}" for dept_id in range(1, 11)}
+    position_names = {pos_id: f"Chức vụ {pos_id}" for pos_id in range(1, 11)}
+    rows = [
+        SimpleNamespace(
+            EmployeeID=emp_id,
+            FullName=f"Nguyễn Văn {emp_id}",
+            DepartmentID=emp_id % 10 + 1,
+            PositionID=emp_id % 10 + 1,
+            Status="Đang làm việc",
+            HireDate=date(2020, 1, 1) + timedelta(days=emp_id % 1000)
+        )
+        for emp_id in range(1, employee_count + 1)
+    ]
+    return rows, (department_names, position_names)
+
+
+def build_items(rows, names) -> List[EmployeeListItem]:
+    """Service path: HRService._to_list_item (constructor, validate trong pydantic-core)"""
+    return [HRService._to_list_item(row, "synced", names) for row in rows]
+
+
+def build_constructed(rows, names) -> List[EmployeeListItem]:
+    """Cùng dữ liệu qua model_construct (bỏ validate nhưng chạy bằng Python)"""
+    department_names, position_names = names
+    return [
+        EmployeeListItem.model_construct(
+            EmployeeID=row.EmployeeID,
+            FullName=row.FullName,
+            DepartmentName=department_names.get(row.DepartmentID) or "Chưa phân công",
+            PositionName=position_names.get(row.PositionID) or "Chưa xác định",
+            Status=row.Status or "Đang làm việc",
+            SyncStatus="synced",
+            HireDate=row.HireDate
+        )
+        for row in rows
+    ]
+
+
+def make_app(rows, names) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default", response_model=List[EmployeeListItem])
+    def default_path():
+        return build_items(rows, names)
+
+    @app.get("/fast", response_model=List[EmployeeListItem])
+    def fast_path():
+        return FastJSONResponse(build_items(rows, names))
+
+    return app
+
+
+def best_of(rounds: int, fn):
+    timings = []
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    per_10k = 10000 / employee_count
+    print("=" * 80)
+    print(f"SERIALIZATION BENCHMARK - {employee_count} employees, best of {rounds}")
+    print(f"renderer: {'orjson' if fast_json_module.orjson is not None else 'pydantic-core'}")
+    print("=" * 80)
+
+    rows, names = make_rows(employee_count)
+
+    validated_time, validated = best_of(rounds, lambda: build_items(rows, names))
+    constructed_time, constructed = best_of(rounds, lambda: build_constructed(rows, names))
+    print(f"build     constructor={validated_time * per_10k * 1000:.1f}ms  "
+          f"model_construct={constructed_time * per_10k * 1000:.1f}ms  (per 10k)")
+
+    client = TestClient(make_app(rows, names))
+    default_time, default_response = best_of(rounds, lambda: client.get("/default"))
+    fast_time, fast_response = best_of(rounds, lambda: client.get("/fast"))
+    print(f"endpoint  default={default_time * per_10k * 1000:.1f}ms  "
+          f"fast={fast_time * per_10k * 1000:.1f}ms  "
+          f"speedup={default_time / fast_time:.1f}x  (per 10k, build + validate + render)")
+    render_time, _ = best_of(rounds, lambda: fast_json_module.dumps(validated))
+    print(f"render    fast_json.dumps={render_time * per_10k * 1000:.1f}ms  (per 10k)")
+
+    assert default_response.status_code == fast_response.status_code == 200
+    assert json.loads(default_response.content) == json.loads(fast_response.content), \
+        "fast path JSON khác default path"
+    assert [item.model_dump() for item in validated] == [item.model_dump() for item in constructed]
+    print("✅ Fast path trả về cùng JSON với default path")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
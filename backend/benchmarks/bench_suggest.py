@@ -0,0 +1,121 @@
+"""
+Benchmark: latency của /employees/suggest (type-ahead) trên employee_name_index
+Đo HRService.suggest_employees với prefixes ngẫu nhiên (đầu tên, đầu một từ, EmployeeID)
+rồi kiểm tra refresh incremental khi một employee đổi tên
+
+Usage:
+    cd backend
+    python benchmarks/bench_suggest.py [employee_count] [queries]
+"""
+import random
+import sys
+import time
+
+from common import make_databases
+
+from app.database.models_hr import Employee
+from app.modules.hr_management.search_index import employee_name_index, fold
+from app.modules.hr_management.services import HRService
+
+P99_BUDGET_MS = 5.0
+
+LAST_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ"]
+MIDDLE_NAMES = ["Văn", "Thị", "Hữu", "Đức", "Minh", "Quốc", "Thành", "Ngọc", "Thu", "Hồng", "Xuân"]
+FIRST_NAMES = [
+    "An", "Bình", "Cường", "Dung", "Đạt", "Giang", "Hà", "Hải", "Hạnh", "Hiếu", "Hoa", "Hùng",
+    "Khoa", "Lan", "Linh", "Long", "Mai", "Nam", "Ngân", "Phong", "Quân", "Sơn", "Tâm", "Trang"
+]
+
+
+def random_names(SessionLocal_HR, employee_count, rng):
+    """Đổi FullName của fixture thành họ tên tiếng Việt ngẫu nhiên"""
+    names = {
+        emp_id: f"{rng.choice(LAST_NAMES)} {rng.choice(MIDDLE_NAMES)} "
+                f"{rng.choice(MIDDLE_NAMES)} {rng.choice(FIRST_NAMES)}"
+        for emp_id in range(1, employee_count + 1)
+    }
+    hr_db = SessionLocal_HR()
+    try:
+        hr_db.bulk_update_mappings(Employee, [
+            {"EmployeeID": emp_id, "FullName": full_name} for emp_id, full_name in names.items()
+        ])
+        hr_db.commit()
+    finally:
+        hr_db.close()
+    return names
+
+
+def random_prefixes(names, query_count, rng):
+    """Prefix 1-8 ký tự của tên, của một từ trong tên (có/không dấu) hoặc của EmployeeID"""
+    full_names = list(names.values())
+    prefixes = []
+    for _ in range(query_count):
+        kind = rng.random()
+        if kind < 0.15:
+            prefixes.append(str(rng.randint(1, len(names)))[:rng.randint(1, 4)])
+            continue
+        full_name = rng.choice(full_names)
+        if kind < 0.6:
+            text = full_name
+        else:
+            text = rng.choice(full_name.split()[1:])
+        text = fold(text) if rng.random() < 0.5 else text
+        prefixes.append(text[:rng.randint(1, 8)])
+    return prefixes
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(42)
+    print("=" * 80)
+    print(f"SUGGEST BENCHMARK - {employee_count} employees, {query_count} prefixes")
+    print("=" * 80)
+
+    SessionLocal_HR, _, hr_counter, _ = make_databases(employee_count)
+    names = random_names(SessionLocal_HR, employee_count, rng)
+    prefixes = random_prefixes(names, query_count, rng)
+
+    hr_db = SessionLocal_HR()
+    try:
+        started = time.perf_counter()
+        employee_name_index.build(hr_db)
+        print(f"build     {(time.perf_counter() - started) * 1000:.0f}ms  {employee_name_index.stats()}")
+
+        hr_counter.reset()
+        timings = []
+        empty = 0
+        for prefix in prefixes:
+            started = time.perf_counter()
+            suggestions = HRService.suggest_employees(hr_db, prefix, 10)
+            timings.append(time.perf_counter() - started)
+            empty += not suggestions
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1000
+        p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+        print(f"suggest   p50={p50:.3f}ms  p99={p99:.3f}ms  max={timings[-1] * 1000:.3f}ms  "
+              f"empty={empty}  hr_queries={hr_counter.count}")
+
+        # Đổi tên một employee: refresh chỉ upsert row đó, không build lại
+        hr_db.query(Employee).filter(Employee.EmployeeID == 7).update(
+            {Employee.FullName: "Ông Thị Zuyên"}, synchronize_session=False
+        )
+        hr_db.commit()
+        builds = employee_name_index.builds
+        employee_name_index.probe_seconds = 0
+        renamed = HRService.suggest_employees(hr_db, "ong thi zu", 10)
+        old_name = HRService.suggest_employees(hr_db, fold(names[7]), 50)
+    finally:
+        hr_db.close()
+
+    assert [item.EmployeeID for item in renamed] == [7], renamed
+    assert 7 not in [item.EmployeeID for item in old_name]
+    assert employee_name_index.builds == builds, "refresh incremental không được build lại index"
+    print("✅ Refresh incremental cập nhật suggestions sau khi đổi tên")
+    assert p99 < P99_BUDGET_MS, f"p99 {p99:.3f}ms vượt budget {P99_BUDGET_MS}ms"
+    print(f"✅ p99 < {P99_BUDGET_MS}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,58 @@
+"""
+Benchmark: round trips per synced employee
+So sánh SyncService.execute_sync (từng employee) với execute_sync_bulk
+
+Usage:
+    cd backend
+    python benchmarks/bench_sync_execute.py [employee_count]
+"""
+import sys
+import time
+
+from common import make_databases
+
+from app.modules.hr_management.sync_service import SyncService
+
+
+def run(label, sync_fn, employee_count):
+    SessionLocal_HR, SessionLocal_Payroll, hr_counter, payroll_counter = make_databases(employee_count)
+    employee_ids = list(range(1, employee_count + 1))
+
+    hr_db = SessionLocal_HR()
+    payroll_db = SessionLocal_Payroll()
+    try:
+        hr_counter.reset()
+        payroll_counter.reset()
+        started = time.perf_counter()
+        result = sync_fn(hr_db, payroll_db, employee_ids)
+        elapsed = time.perf_counter() - started
+    finally:
+        hr_db.close()
+        payroll_db.close()
+
+    round_trips = hr_counter.count + payroll_counter.count
+    print(
+        f"{label:<14} synced={result.SyncedCount:<6} "
+        f"hr={hr_counter.count:<6} payroll={payroll_counter.count:<6} "
+        f"round_trips/employee={round_trips / max(result.SyncedCount, 1):.3f} "
+        f"time={elapsed * 1000:.1f}ms"
+    )
+    return result
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print("=" * 80)
+    print(f"EXECUTE SYNC BENCHMARK - {employee_count} employees (50% đã có trong payroll)")
+    print("=" * 80)
+
+    row_result = run("per_employee", SyncService.execute_sync, employee_count)
+    bulk_result = run("bulk", SyncService.execute_sync_bulk, employee_count)
+
+    assert row_result.Details == bulk_result.Details, "bulk Details khác per_employee Details"
+    print("✅ Details giống nhau giữa 2 engines")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,113 @@
+"""
+Benchmark fixtures - In-memory SQLite thay cho SQL Server (HR) và MySQL (Payroll)
+Đếm số statements gửi tới mỗi engine để đo round trips
+"""
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database.connections import Base_HR, Base_Payroll, db_manager
+from app.database.models_hr import Employee, Department, Position
+from app.database.models_payroll import EmployeePayroll, DepartmentPayroll, PositionPayroll
+from app.modules.hr_management.caches import payroll_snapshot_cache, reference_cache
+
+
+class StatementCounter:
+    """Đếm statements qua before_cursor_execute của một engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def _sqlite_engine():
+    return create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False}
+    )
+
+
+def make_databases(employee_count: int, department_count: int = 10, synced_ratio: float = 0.5):
+    """
+    Tạo HR + Payroll databases với dữ liệu giả
+    Returns (SessionLocal_HR, SessionLocal_Payroll, hr_counter, payroll_counter)
+    """
+    hr_engine = _sqlite_engine()
+    payroll_engine = _sqlite_engine()
+    Base_HR.metadata.create_all(hr_engine)
+    Base_Payroll.metadata.create_all(payroll_engine)
+
+    SessionLocal_HR = sessionmaker(bind=hr_engine, autocommit=False, autoflush=False)
+    SessionLocal_Payroll = sessionmaker(bind=payroll_engine, autocommit=False, autoflush=False)
+
+    hr_db = SessionLocal_HR()
+    payroll_db = SessionLocal_Payroll()
+    try:
+        for dept_id in range(1, department_count + 1):
+            hr_db.add(Department(DepartmentID=dept_id, DepartmentName=f"Phòng {dept_id}"))
+            hr_db.add(Position(PositionID=dept_id, PositionName=f"Chức vụ {dept_id}"))
+            payroll_db.add(DepartmentPayroll(DepartmentID=dept_id, DepartmentName=f"Phòng {dept_id}"))
+            payroll_db.add(PositionPayroll(PositionID=dept_id, PositionName=f"Chức vụ {dept_id}"))
+
+        synced_until = int(employee_count * synced_ratio)
+        for emp_id in range(1, employee_count + 1):
+            dept_id = emp_id % department_count + 1
+            hr_db.add(Employee(
+                EmployeeID=emp_id,
+                FullName=f"Nguyễn Văn {emp_id}",
+                DateOfBirth=date(1990, 1, 1),
+                HireDate=date(2020, 1, 1) + timedelta(days=emp_id % 1000),
+                DepartmentID=dept_id,
+                PositionID=dept_id,
+                Status="Đang làm việc",
+                UpdatedAt=datetime(2025, 1, 1)
+            ))
+            if emp_id <= synced_until:
+                payroll_db.add(EmployeePayroll(
+                    EmployeeID=emp_id,
+                    FullName=f"Nguyễn Văn {emp_id}",
+                    DepartmentID=dept_id,
+                    PositionID=dept_id,
+                    Status="Đang làm việc",
+                    SyncedAt=datetime(2025, 1, 1)
+                ))
+        hr_db.commit()
+        payroll_db.commit()
+    finally:
+        hr_db.close()
+        payroll_db.close()
+
+    # Caches là module-level, bỏ dữ liệu của fixture trước
+    payroll_snapshot_cache.invalidate()
+    reference_cache.invalidate()
+
+    return (
+        SessionLocal_HR,
+        SessionLocal_Payroll,
+        StatementCounter(hr_engine),
+        StatementCounter(payroll_engine),
+    )
+
+
+def use_databases(SessionLocal_HR, SessionLocal_Payroll):
+    """Trỏ db_manager vào fixture databases cho code đi qua run_hr/run_payroll (AsyncHRService)"""
+    db_manager.sql_server_engine = SessionLocal_HR.kw["bind"]
+    db_manager.mysql_engine = SessionLocal_Payroll.kw["bind"]
+    db_manager.SessionLocal_HR = SessionLocal_HR
+    db_manager.SessionLocal_Payroll = SessionLocal_Payroll
+    db_manager.sql_server_available = True
+    db_manager.mysql_available = True
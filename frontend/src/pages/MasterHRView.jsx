@@ -2,7 +2,7 @@
  * Master HR View - Premium Modern Design
  * Features: Glassmorphism, Gradients, Animations
  */
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import useEmployeeStore from '../store/useEmployeeStore';
 import SyncStatusBadge from '../components/SyncStatusBadge';
 
@@ -10,29 +10,49 @@ const MasterHRView = () => {
     const {
         employees,
         departments,
+        suggestions,
         loading,
         error,
         filters,
+        hasMore,
         fetchEmployees,
+        fetchMoreEmployees,
         fetchDepartments,
+        fetchSuggestions,
+        clearSuggestions,
         setFilters,
         clearFilters
     } = useEmployeeStore();
 
     const [searchInput, setSearchInput] = useState('');
+    const searchTimer = useRef(null);
+    const suggestTimer = useRef(null);
 
     useEffect(() => {
         fetchEmployees();
         fetchDepartments();
+        return () => {
+            clearTimeout(searchTimer.current);
+            clearTimeout(suggestTimer.current);
+        };
     }, []);
 
     const handleSearchChange = (e) => {
         const value = e.target.value;
         setSearchInput(value);
-        const timer = setTimeout(() => {
-            setFilters({ search: value });
-        }, 500);
-        return () => clearTimeout(timer);
+        // Type-ahead gần như tức thì, filter cả bảng đợi user gõ xong
+        clearTimeout(suggestTimer.current);
+        suggestTimer.current = setTimeout(() => fetchSuggestions(value), 80);
+        clearTimeout(searchTimer.current);
+        searchTimer.current = setTimeout(() => setFilters({ search: value }), 500);
+    };
+
+    const handleSelectSuggestion = (suggestion) => {
+        clearTimeout(searchTimer.current);
+        clearTimeout(suggestTimer.current);
+        setSearchInput(suggestion.FullName);
+        clearSuggestions();
+        setFilters({ search: suggestion.FullName });
     };
 
     const handleDepartmentFilter = (departmentId) => {
@@ -41,6 +61,7 @@ const MasterHRView = () => {
 
     const handleClearFilters = () => {
         setSearchInput('');
+        clearSuggestions();
         clearFilters();
     };
 
@@ -81,7 +102,7 @@ const MasterHRView = () => {
             <div className="glass-card p-6 mb-6">
                 <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
                     {/* Search */}
-                    <div>
+                    <div className="relative">
                         <label className="block text-sm font-semibold text-gray-700 mb-2">
                             🔍 Tìm kiếm nhân viên
                         </label>
@@ -89,9 +110,24 @@ const MasterHRView = () => {
                             type="text"
                             value={searchInput}
                             onChange={handleSearchChange}
-                            placeholder="Nhập tên nhân viên..."
+                            onBlur={() => setTimeout(clearSuggestions, 150)}
+                            placeholder="Nhập tên hoặc mã nhân viên..."
                             className="w-full px-4 py-3 border-2 border-gray-200 rounded-xl focus:outline-none focus:border-primary-500 focus:ring-4 focus:ring-primary-100 transition-all duration-200"
                         />
+                        {suggestions.length > 0 && (
+                            <ul className="absolute z-10 left-0 right-0 mt-1 bg-white border border-gray-200 rounded-xl shadow-lg overflow-hidden">
+                                {suggestions.map((suggestion) => (
+                                    <li
+                                        key={suggestion.EmployeeID}
+                                        onMouseDown={() => handleSelectSuggestion(suggestion)}
+                                        className="px-4 py-2 flex justify-between cursor-pointer hover:bg-primary-50"
+                                    >
+                                        <span className="text-sm font-medium text-gray-900">{suggestion.FullName}</span>
+                                        <span className="text-xs font-bold text-primary-600">#{suggestion.EmployeeID}</span>
+                                    </li>
+                                ))}
+                            </ul>
+                        )}
                     </div>
 
                     {/* Department Filter */}
@@ -235,6 +271,14 @@ const MasterHRView = () => {
                                 <div className="flex justify-between items-center text-sm">
                                     <div className="font-semibold text-gray-700">
                                         Hiển thị <span className="text-primary-600">{employees.length}</span> nhân viên
+                                        {hasMore && (
+                                            <button
+                                                onClick={() => fetchMoreEmployees()}
+                                                className="ml-4 text-primary-600 hover:underline"
+                                            >
+                                                Tải thêm
+                                            </button>
+                                        )}
                                     </div>
                                     <div className="flex gap-6">
                                         <span className="flex items-center gap-2">
@@ -6,12 +6,13 @@ import React, { useEffect, useState } from 'react';
 import useSyncStore from '../store/useSyncStore';
 
 const SyncCenter = () => {
-    const { syncNeeds, syncStatus, syncing, error, checkSync, executeSync } = useSyncStore();
+    const { syncNeeds, syncStatus, syncJob, syncing, error, checkSync, executeSync, subscribeSyncEvents } = useSyncStore();
     const [selectedIds, setSelectedIds] = useState([]);
     const [syncResult, setSyncResult] = useState(null);
 
     useEffect(() => {
         checkSync();
+        return subscribeSyncEvents();
     }, []);
 
     const handleSelectAll = (e) => {
@@ -36,10 +37,8 @@ const SyncCenter = () => {
         try {
             const result = await executeSync(selectedIds);
             setSyncResult(result);
-            setTimeout(() => {
-                checkSync();
-                setSelectedIds([]);
-            }, 1000);
+            // Danh sách và counts được cập nhật qua /hr/sync/events
+            setSelectedIds([]);
         } catch (err) {
             console.error('Sync failed:', err);
         }
@@ -150,6 +149,7 @@ const SyncCenter = () => {
                                     <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
                                 </svg>
                                 Đang đồng bộ...
+                                {syncJob && ` ${Math.round(syncJob.Progress * 100)}%`}
                             </span>
                         ) : (
                             `🚀 Đồng bộ (${selectedIds.length})`
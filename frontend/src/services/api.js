@@ -45,7 +45,10 @@ api.interceptors.response.use(
 export const hrAPI = {
   // Employees
   getEmployees: (params = {}) => api.get('/hr/employees', { params }),
+  // Type-ahead: prefix của tên (không dấu) hoặc EmployeeID
+  suggestEmployees: (q, limit = 8) => api.get('/hr/employees/suggest', { params: { q, limit } }),
   getEmployee: (id) => api.get(`/hr/employees/${id}`),
+  getEmployeesBatch: (ids) => api.post('/hr/employees/batch', { EmployeeIDs: ids }),
   
   // Organization
   getOrgStructure: () => api.get('/hr/org-structure'),
@@ -54,6 +57,11 @@ export const hrAPI = {
   // Sync
   checkSync: () => api.post('/hr/sync/check'),
   executeSync: (employeeIds) => api.post('/hr/sync/execute', { EmployeeIDs: employeeIds }),
+  createSyncJob: (employeeIds) => api.post('/hr/sync/jobs', { EmployeeIDs: employeeIds }),
+  getSyncJob: (jobId, includeDetails = true) =>
+    api.get(`/hr/sync/jobs/${jobId}`, { params: { include_details: includeDetails } }),
+  // Server-Sent Events: "drift" summary và "employee" status changes
+  openSyncEvents: () => new EventSource(`${api.defaults.baseURL}/hr/sync/events`),
   
   // Dividends
   getDividends: (employeeId) => 
@@ -8,8 +8,12 @@ import { hrAPI } from '../services/api';
 const useEmployeeStore = create((set, get) => ({
   // State
   employees: [],
+  nextCursor: null,
+  hasMore: false,
   selectedEmployee: null,
   departments: [],
+  suggestions: [],
+  suggestQuery: '',
   loading: false,
   error: null,
   filters: {
@@ -22,12 +26,53 @@ const useEmployeeStore = create((set, get) => ({
     set({ loading: true, error: null });
     try {
       const response = await hrAPI.getEmployees(filters);
-      set({ employees: response.data, loading: false });
+      set({
+        employees: response.data.Items,
+        nextCursor: response.data.NextCursor,
+        hasMore: response.data.HasMore,
+        loading: false
+      });
     } catch (error) {
       set({ error: error.message, loading: false });
     }
   },
   
+  fetchMoreEmployees: async () => {
+    const { nextCursor, filters } = get();
+    if (!nextCursor) return;
+    set({ loading: true, error: null });
+    try {
+      const response = await hrAPI.getEmployees({ ...filters, cursor: nextCursor });
+      set((state) => ({
+        employees: [...state.employees, ...response.data.Items],
+        nextCursor: response.data.NextCursor,
+        hasMore: response.data.HasMore,
+        loading: false
+      }));
+    } catch (error) {
+      set({ error: error.message, loading: false });
+    }
+  },
+  
+  fetchSuggestions: async (q) => {
+    set({ suggestQuery: q });
+    if (!q.trim()) {
+      set({ suggestions: [] });
+      return;
+    }
+    try {
+      const response = await hrAPI.suggestEmployees(q);
+      // Bỏ response của keystroke cũ nếu user đã gõ tiếp
+      if (get().suggestQuery === q) {
+        set({ suggestions: response.data });
+      }
+    } catch (error) {
+      console.error('Failed to fetch suggestions:', error);
+    }
+  },
+  
+  clearSuggestions: () => set({ suggestions: [], suggestQuery: '' }),
+  
   fetchEmployee: async (id) => {
     set({ loading: true, error: null });
     try {
@@ -4,9 +4,14 @@
 import { create } from 'zustand';
 import { hrAPI } from '../services/api';
 
+const JOB_POLL_INTERVAL_MS = 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 const useSyncStore = create((set) => ({
   syncNeeds: [],
   syncStatus: null,
+  syncJob: null,
   syncing: false,
   error: null,
   
@@ -24,12 +29,53 @@ const useSyncStore = create((set) => ({
     }
   },
   
-  executeSync: async ( employeeIds) => {
+  // Live updates qua SSE thay vì re-POST /hr/sync/check; trả về hàm unsubscribe
+  subscribeSyncEvents: () => {
+    const source = hrAPI.openSyncEvents();
+    source.addEventListener('drift', (event) => {
+      const summary = JSON.parse(event.data);
+      set((state) => ({
+        syncStatus: state.syncStatus ? { ...state.syncStatus, ...summary } : summary,
+      }));
+    });
+    source.addEventListener('employee', (event) => {
+      const change = JSON.parse(event.data);
+      if (change.SyncStatus === 'synced') {
+        set((state) => ({
+          syncNeeds: state.syncNeeds.filter((need) => need.EmployeeID !== change.EmployeeID),
+        }));
+      } else if (change.SyncStatus === 'needs_sync') {
+        // Thêm mới hoặc cập nhật Action/Reason của row đã có
+        const { SyncStatus, ...need } = change;
+        set((state) => {
+          const exists = state.syncNeeds.some((item) => item.EmployeeID === need.EmployeeID);
+          return {
+            syncNeeds: exists
+              ? state.syncNeeds.map((item) => (item.EmployeeID === need.EmployeeID ? { ...item, ...need } : item))
+              : [...state.syncNeeds, need],
+          };
+        });
+      }
+    });
+    return () => source.close();
+  },
+  
+  // Enqueue background sync job rồi poll progress tới khi xong
+  executeSync: async (employeeIds) => {
     set({ syncing: true, error: null });
     try {
-      const response = await hrAPI.executeSync(employeeIds);
-      set({ syncing: false });
-      return response.data;
+      const { data: created } = await hrAPI.createSyncJob(employeeIds);
+      let job = created;
+      set({ syncJob: job });
+      while (job.Status === 'queued' || job.Status === 'running') {
+        await sleep(JOB_POLL_INTERVAL_MS);
+        const response = await hrAPI.getSyncJob(job.JobID, false);
+        job = response.data;
+        set({ syncJob: job });
+      }
+      const { data: finished } = await hrAPI.getSyncJob(job.JobID);
+      set({ syncJob: finished, syncing: false });
+      return finished;
     } catch (error) {
       set({ error: error.message, syncing: false });
       throw error;